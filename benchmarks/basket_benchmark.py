@@ -0,0 +1,70 @@
+"""Compare eda.basket with the mlxtend apriori path on synthetic baskets.
+
+    python benchmarks/basket_benchmark.py [--orders 1000 10000 100000] [--items 40]
+
+Baskets draw items from a Zipf-like popularity curve so a handful of items
+are common and most are rare, like departments or products in the real
+data.  Each size is mined at the same support and lift thresholds with both
+engines, and the itemset counts are checked to agree.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from mlxtend.frequent_patterns import apriori
+from mlxtend.frequent_patterns import association_rules as mlxtend_rules
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from eda.basket import association_rules, frequent_itemsets, incidence_matrix  # noqa: E402
+
+
+def synthetic_lines(n_orders, n_items, mean_basket=8, seed=0):
+    rng = np.random.default_rng(seed)
+    sizes = rng.poisson(mean_basket - 1, n_orders) + 1
+    popularity = 1 / np.arange(1, n_items + 1) ** 0.7
+    items = rng.choice(n_items, sizes.sum(), p=popularity / popularity.sum())
+    return pd.DataFrame({"PURCHASE_ID": np.repeat(np.arange(n_orders), sizes), "ITEM": items})
+
+
+def time_mlxtend(lines, min_support, min_lift):
+    start = time.perf_counter()
+    basket = pd.crosstab(lines["PURCHASE_ID"], lines["ITEM"]).gt(0)
+    itemsets = apriori(basket, min_support=min_support, use_colnames=True)
+    rules = mlxtend_rules(itemsets, metric="lift", min_threshold=min_lift)
+    return time.perf_counter() - start, len(itemsets), len(rules)
+
+
+def time_eclat(lines, min_support, min_lift):
+    start = time.perf_counter()
+    matrix, _, items = incidence_matrix(lines, item="ITEM")
+    itemsets = frequent_itemsets(matrix, items, min_support)
+    rules = association_rules(itemsets, min_lift=min_lift)
+    return time.perf_counter() - start, len(itemsets), len(rules)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, nargs="+", default=[1_000, 10_000, 100_000, 300_000])
+    parser.add_argument("--items", type=int, default=40)
+    parser.add_argument("--min-support", type=float, default=0.02)
+    parser.add_argument("--min-lift", type=float, default=1.0)
+    parser.add_argument("--skip-mlxtend-above", type=int, default=10**6,
+                        help="don't run mlxtend for more orders than this")
+    args = parser.parse_args(argv)
+
+    print(f"{'orders':>10} {'engine':>8} {'seconds':>9} {'itemsets':>9} {'rules':>8}")
+    for n_orders in args.orders:
+        lines = synthetic_lines(n_orders, args.items)
+        results = {"eclat": time_eclat(lines, args.min_support, args.min_lift)}
+        if n_orders <= args.skip_mlxtend_above:
+            results["mlxtend"] = time_mlxtend(lines, args.min_support, args.min_lift)
+            assert results["mlxtend"][1:] == results["eclat"][1:], "engines disagree"
+        for engine, (seconds, n_itemsets, n_rules) in results.items():
+            print(f"{n_orders:>10} {engine:>8} {seconds:>9.3f} {n_itemsets:>9} {n_rules:>8}")
+
+
+if __name__ == "__main__":
+    main()
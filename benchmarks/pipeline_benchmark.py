@@ -0,0 +1,224 @@
+"""Time and memory-profile every stage of the report on synthetic data.
+
+    python benchmarks/pipeline_benchmark.py [--lines 1e4 1e5 1e6] [--backend pandas polars]
+                                            [--out results.json] [--compare baseline.json]
+
+For each size a dataset is generated with ``benchmarks/synthetic.py`` (or
+reused from ``--data-root``), and the report's pipeline is run stage by stage
+in a fresh process, outside Streamlit.  Each stage's inputs are computed
+before it starts, so a stage's numbers only cover its own work:
+
+``seconds`` / ``cpu_seconds``
+    wall and process CPU time.
+``peak_bytes``
+    the peak of memory allocated through Python while the stage ran, from
+    :mod:`tracemalloc` (numpy and pandas buffers included, Arrow and Polars
+    memory not).  Tracing slows allocation-heavy code down several times, so
+    it is measured in a second pass; ``--no-tracemalloc`` skips that pass.
+``rss_peak_delta``
+    how much the stage raised the process's peak resident size.
+``rows``
+    rows in the stage's results.
+
+Results are written as JSON.  With ``--compare`` the run is checked against
+an earlier results file and the script exits non-zero when a stage got
+slower than ``--tolerance`` allows.
+"""
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from eda.instrument import count_rows, track  # noqa: E402
+from synthetic import generate  # noqa: E402
+
+# stage name -> pipeline results it computes, in dependency order
+STAGES = [
+    ("load", ("product", "purchase_header")),
+    ("calendar", ("calendar",)),
+    ("cleaning", ("product_dims",)),
+    ("sample", ("line_sample", "memory")),
+    ("aggregation", ("cubes", "line_counts")),
+    ("quality", ("quality",)),
+    ("imputation", ("imputed_dims", "imputed_sample")),
+    ("log_features", ("log_dims", "log_sample")),
+    ("rules", ("frequent_itemsets", "two_way", "rule_graph")),
+    ("missingness", ("missingness", "imputed_missingness", "log_missingness")),
+    ("copurchase", ("copurchase",)),
+    ("windows", ("windows",)),
+]
+
+# stages faster than this are left out of regression checks; they are noise
+MIN_SECONDS = 0.05
+
+
+def measure(name, func, trace=True):
+    """Run ``func()`` and return its :func:`eda.instrument.track` record.
+
+    With ``trace`` the record also gets the tracemalloc peak as ``peak_bytes``.
+    """
+    if trace:
+        tracemalloc.start()
+    try:
+        with track(name, kind="benchmark") as record:
+            record["rows"] = count_rows(func())
+        record["peak_bytes"] = tracemalloc.get_traced_memory()[1] if trace else None
+    finally:
+        tracemalloc.stop()
+    return {"stage": name, **{key: value for key, value in record.items() if key not in ("name", "kind")}}
+
+
+def _renderers(pipeline, workers):
+    from eda.missingness import pattern_matrix
+    from eda.parallel import render_png
+    from eda.plotting import boxplot, histogram, regression
+
+    dims = pipeline.get("product_dims")
+    counts = pipeline.get("line_counts")
+
+    return {
+        "missing_data": lambda: render_png(pattern_matrix, (pipeline.get("missingness")["patterns"],)),
+        "histogram": lambda: render_png(histogram, (dims["WEIGHT_GRAMS"],), {"weights": counts, "bins": 500}),
+        "boxplot": lambda: render_png(boxplot, (dims["WEIGHT_GRAMS"], dims["DEPARTMENT_NAME"]),
+                                      {"weights": counts, "workers": workers}),
+        "regression": lambda: render_png(regression, (dims["VOLUME_INCHES"], dims["DENSITY"]),
+                                         {"weights": counts, "xlim": (0, 4000), "ylim": (0, 50)}),
+    }
+
+
+def run(data_dir, backend, workers, trace):
+    """Run every stage on ``data_dir`` and return one record per stage."""
+    import matplotlib
+    matplotlib.use("Agg")
+    from streamlit.logger import set_log_level
+    set_log_level("error")
+    from eda.pipeline import Pipeline
+
+    pipeline = Pipeline(data_dir, backend)
+    pipeline.configure(workers=workers)
+    records = []
+    for name, results in STAGES:
+        records.append(measure(name, lambda: [pipeline.get(result) for result in results], trace))
+    for name, render in _renderers(pipeline, workers).items():
+        records.append({**measure(f"render.{name}", render, trace), "rows": 0})
+    return records
+
+
+def _in_fresh_process(func, *args):
+    # a new process per run keeps caches and peak RSS from leaking between runs
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(func, *args).result()
+
+
+def _dataset(n_lines, data_root, seed):
+    data_dir = os.path.join(data_root, f"lines-{n_lines}")
+    if not os.path.exists(os.path.join(data_dir, "purchase_lines.csv")):
+        generate(data_dir, n_lines, seed=seed)
+    return data_dir
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _metadata(args):
+    import numpy
+    import pandas
+    import polars
+    return {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "versions": {"numpy": numpy.__version__, "pandas": pandas.__version__, "polars": polars.__version__},
+        "arguments": {key: value for key, value in vars(args).items() if key not in ("out", "compare")},
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Stages that got slower than ``baseline`` by more than ``tolerance``."""
+    def keyed(runs):
+        return {(run["lines"], run["backend"], record["stage"]): record
+                for run in runs for record in run["stages"]}
+
+    before = keyed(baseline["runs"])
+    regressions = []
+    for key, record in keyed(results["runs"]).items():
+        old = before.get(key)
+        if old is None or old["seconds"] < MIN_SECONDS:
+            continue
+        ratio = record["seconds"] / old["seconds"]
+        if ratio > 1 + tolerance:
+            regressions.append((*key, old["seconds"], record["seconds"], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=float, nargs="+", default=[1e4, 1e5, 1e6],
+                        help="approximate numbers of line items to benchmark")
+    parser.add_argument("--backend", nargs="+", default=["pandas"], choices=["pandas", "polars"])
+    parser.add_argument("--workers", type=int, default=0, help="worker processes for the pipeline")
+    parser.add_argument("--data-root", default=None,
+                        help="keep generated datasets here and reuse them (default: a temporary directory)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-tracemalloc", dest="trace", action="store_false")
+    parser.add_argument("--out", default="pipeline_benchmark.json")
+    parser.add_argument("--compare", default=None, help="earlier results file to check against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown per stage before --compare fails (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    data_root = args.data_root or tempfile.mkdtemp(prefix="eda-benchmark-")
+    results = {"metadata": _metadata(args), "runs": []}
+    try:
+        for n_lines in map(int, args.lines):
+            data_dir = _dataset(n_lines, data_root, args.seed)
+            for backend in args.backend:
+                stages = _in_fresh_process(run, data_dir, backend, args.workers, False)
+                if args.trace:
+                    traced = _in_fresh_process(run, data_dir, backend, args.workers, True)
+                    for record, traced_record in zip(stages, traced):
+                        record["peak_bytes"] = traced_record["peak_bytes"]
+                results["runs"].append({"lines": n_lines, "backend": backend, "stages": stages})
+                print(f"\n{n_lines:,} lines, {backend}")
+                print(f"{'stage':>22} {'seconds':>9} {'cpu':>9} {'peak MiB':>9} {'rss +MiB':>9} {'rows':>11}")
+                for record in stages:
+                    peak = record["peak_bytes"] / 2**20 if record["peak_bytes"] is not None else float("nan")
+                    print(f"{record['stage']:>22} {record['seconds']:>9.3f} {record['cpu_seconds']:>9.3f} "
+                          f"{peak:>9.1f} {record['rss_peak_delta'] / 2**20:>9.1f} {record['rows']:>11,}")
+    finally:
+        if args.data_root is None:
+            shutil.rmtree(data_root, ignore_errors=True)
+
+    with open(args.out, "w") as out:
+        json.dump(results, out, indent=2)
+    print(f"\nwrote {args.out}")
+
+    if args.compare:
+        with open(args.compare) as baseline:
+            regressions = compare(results, json.load(baseline), args.tolerance)
+        for n_lines, backend, stage, old, new, ratio in regressions:
+            print(f"slower: {stage} at {n_lines:,} lines ({backend}): {old:.3f} s -> {new:.3f} s ({ratio:.2f}x)")
+        print(f"{len(regressions)} stage(s) slower than {args.compare}" if regressions
+              else f"no stage slower than {args.compare}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
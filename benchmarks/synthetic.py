@@ -0,0 +1,126 @@
+"""Synthetic challenge data at any scale.
+
+    python benchmarks/synthetic.py OUT_DIR --lines 1000000 [--products 25000] [--parquet]
+
+Writes ``product.csv``, ``purchase_header.csv`` and ``purchase_lines.csv``
+in the layout of the real exports (see :mod:`eda.schema`): timestamps like
+``3/25/2020 1:25:29.5`` that increase with ``PURCHASE_ID``, departments and
+products drawn from Zipf-like popularity curves, dimensions with the real
+share of blanks and some non-positive values, and a few catalog rows
+repeated verbatim.  Line items are generated and written one block of orders
+at a time, so 10^8 lines don't need more memory than 10^6.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from eda.calendar import calendar_features  # noqa: E402
+from eda.convert import convert  # noqa: E402
+
+DEPARTMENTS = [
+    "Personal Care", "Snacks", "Pantry", "Beverages", "Frozen", "Dairy", "Produce", "Household",
+    "Canned Goods", "Bakery", "Breakfast", "Meat & Seafood", "Deli", "International", "Baby",
+    "Pets", "Alcohol", "Dry Goods & Pasta", "Condiments", "Baking", "Health", "Bulk", "Other",
+]
+
+# share of blank values per dimension in the real catalog
+BLANK_SHARE = {"HEIGHT_INCHES": .42, "WIDTH_INCHES": .42, "DEPTH_INCHES": .66, "WEIGHT_GRAMS": .12}
+INVALID_SHARE = .01
+DUPLICATE_SHARE = .005
+
+MEAN_BASKET = 8
+ORDERS_PER_BLOCK = 250_000
+FIRST_PURCHASE_ID = 386_000_000
+START = pd.Timestamp("2020-03-25")
+
+
+def _zipf(n, exponent, rng):
+    popularity = 1 / np.arange(1, n + 1) ** exponent
+    return rng.permutation(popularity / popularity.sum())
+
+
+def synthetic_products(n_products, rng):
+    """A product catalog with the columns and quirks of ``product.csv``."""
+    departments = rng.choice(len(DEPARTMENTS), n_products, p=_zipf(len(DEPARTMENTS), .5, rng))
+    product = pd.DataFrame({
+        "PRODUCT_ID": np.sort(rng.choice(21_000_000, n_products, replace=False)) + 300,
+        "DEPARTMENT_NAME": np.asarray(DEPARTMENTS)[departments],
+        "HEIGHT_INCHES": rng.lognormal(1.8, .6, n_products).round(2),
+        "WIDTH_INCHES": rng.lognormal(1.5, .7, n_products).round(2),
+        "DEPTH_INCHES": rng.lognormal(1.0, .6, n_products).round(2),
+        "WEIGHT_GRAMS": rng.lognormal(6.0, 1.1, n_products).round(1),
+    })
+    for column, share in BLANK_SHARE.items():
+        product.loc[rng.random(n_products) < share, column] = np.nan
+        invalid = rng.random(n_products) < INVALID_SHARE
+        product.loc[invalid, column] = -rng.integers(0, 2, invalid.sum()).astype(float)
+    duplicates = product.sample(frac=DUPLICATE_SHARE, random_state=rng.integers(2**31))
+    return pd.concat([product, duplicates]).sort_values("PRODUCT_ID", kind="stable")
+
+
+def format_timestamps(timestamps):
+    """``m/d/YYYY H:MM:SS.f`` strings, the format of ``PURCHASE_DATE_TIME``."""
+    calendar = calendar_features(timestamps)
+    tenths = calendar["PURCHASE_TIME"].to_numpy().view("int64") // 10**8
+    minutes = pd.Series(tenths // 600 % 60).astype(str).str.zfill(2)
+    seconds = pd.Series(tenths // 10 % 60).astype(str).str.zfill(2) + "." + pd.Series(tenths % 10).astype(str)
+    return (calendar["MONTH"].astype(str) + "/" + calendar["DAY"].astype(str) + "/"
+            + calendar["YEAR"].astype(str) + " " + calendar["HOUR"].astype(str) + ":"
+            + minutes.to_numpy() + ":" + seconds.to_numpy())
+
+
+def generate(out_dir, n_lines, n_products=25_000, days=18, seed=0, parquet=False):
+    """Write a synthetic dataset of about ``n_lines`` line items to ``out_dir``."""
+    rng = np.random.default_rng(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    product = synthetic_products(n_products, rng)
+    product.to_csv(os.path.join(out_dir, "product.csv"), index=False)
+    catalog = product["PRODUCT_ID"].unique()
+    product_popularity = _zipf(len(catalog), .9, rng)
+
+    n_orders = max(1, n_lines // MEAN_BASKET)
+    header_path = os.path.join(out_dir, "purchase_header.csv")
+    lines_path = os.path.join(out_dir, "purchase_lines.csv")
+    next_id, n_written = FIRST_PURCHASE_ID, 0
+    for first in range(0, n_orders, ORDERS_PER_BLOCK):
+        size = min(ORDERS_PER_BLOCK, n_orders - first)
+        ids = next_id + np.cumsum(rng.integers(1, 40, size))
+        next_id = int(ids[-1])
+        # purchases are spread evenly over ``days`` in PURCHASE_ID order
+        nanoseconds = (np.arange(first, first + size) + rng.random(size)) / n_orders * days * 86_400e9
+        timestamps = START + pd.to_timedelta(nanoseconds.astype("int64"), unit="ns").round("100ms")
+        header = pd.DataFrame({"PURCHASE_ID": ids, "PURCHASE_DATE_TIME": format_timestamps(timestamps)})
+        header.to_csv(header_path, mode="a" if first else "w", header=not first, index=False)
+
+        sizes = rng.poisson(MEAN_BASKET - 1, size) + 1
+        lines = pd.DataFrame({
+            "PURCHASE_ID": np.repeat(ids, sizes),
+            "PRODUCT_ID": rng.choice(catalog, sizes.sum(), p=product_popularity),
+            "QUANTITY": rng.geometric(.6, sizes.sum()).astype(float),
+        })
+        lines.to_csv(lines_path, mode="a" if first else "w", header=not first, index=False)
+        n_written += len(lines)
+    if parquet:
+        convert(out_dir)
+    return {"products": len(product), "orders": n_orders, "lines": n_written}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("out_dir")
+    parser.add_argument("--lines", type=float, default=1e6, help="approximate number of line items")
+    parser.add_argument("--products", type=int, default=25_000)
+    parser.add_argument("--days", type=int, default=18)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--parquet", action="store_true", help="also write Parquet copies with eda.convert")
+    args = parser.parse_args(argv)
+    sizes = generate(args.out_dir, int(args.lines), args.products, args.days, args.seed, args.parquet)
+    print(", ".join(f"{count} {name}" for name, count in sizes.items()))
+
+
+if __name__ == "__main__":
+    main()
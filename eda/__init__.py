@@ -0,0 +1 @@
+"""Data loading and computation helpers for the take-home EDA report."""
@@ -0,0 +1,192 @@
+"""Precomputed report artifacts.
+
+The report's results can be computed ahead of time, e.g. by a nightly job on
+a batch machine, and written to an artifact directory:
+
+    python -m eda.artifacts OUT_DIR [DATA_DIR] [--backend polars] [--workers 4] [--approximate]
+
+runs every pipeline stage outside Streamlit and writes each result to a new
+snapshot directory under ``OUT_DIR``: frames and series as Parquet, dicts of
+them as subdirectories, sparse matrices as ``.npz``, plus a few standard
+figures as PNG under ``figures/``.  ``artifacts.json`` describes every
+result and points at the snapshot; it is swapped in with
+:func:`eda.incremental.write_snapshot` once the snapshot is complete, so a
+running report keeps reading the previous results until then.
+
+With ``EDA_ARTIFACT_DIR`` pointing at such a directory the report reads its
+results from there, one file per result it actually shows, instead of
+computing them; results that aren't in the directory are still computed from
+the data files.
+"""
+import argparse
+import datetime
+import json
+import os
+
+import matplotlib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from eda.cubes import rollup
+from eda.data import DATA_DIR, file_signature
+from eda.graph import draw_graph
+from eda.incremental import write_snapshot
+from eda.instrument import collect, summary, track
+from eda.missingness import pattern_matrix
+from eda.parallel import render_panels
+from eda.plotting import bars, boxplot
+
+ARTIFACT_DIR = os.environ.get("EDA_ARTIFACT_DIR")
+MANIFEST = "artifacts.json"
+
+# inputs and options of the pipeline, not results
+_SKIPPED = {"state"}
+
+
+def _is_sets(column):
+    return column.dtype == object and len(column) and isinstance(column.iloc[0], frozenset)
+
+
+def save_result(value, path):
+    """Write one result under ``path`` (without extension) and return its spec."""
+    if value is None:
+        return {"kind": "none"}
+    if isinstance(value, dict):
+        os.makedirs(path, exist_ok=True)
+        return {"kind": "dict",
+                "items": {key: save_result(item, os.path.join(path, key)) for key, item in value.items()}}
+    if isinstance(value, pd.Series):
+        value.to_frame(name="value").to_parquet(path + ".parquet")
+        return {"kind": "series", "name": value.name}
+    if isinstance(value, pd.DataFrame):
+        # itemsets are frozensets, which Parquet stores as lists
+        sets = [column for column in value.columns if _is_sets(value[column])]
+        value.assign(**{column: value[column].map(sorted) for column in sets}).to_parquet(path + ".parquet")
+        return {"kind": "frame", "sets": sets}
+    if sparse.issparse(value):
+        sparse.save_npz(path + ".npz", value.tocsr())
+        return {"kind": "sparse"}
+    if isinstance(value, np.generic):
+        value = value.item()
+    return {"kind": "value", "value": value}
+
+
+def load_result(path, spec):
+    """Read a result written by :func:`save_result`."""
+    kind = spec["kind"]
+    if kind == "none":
+        return None
+    if kind == "dict":
+        return {key: load_result(os.path.join(path, key), item) for key, item in spec["items"].items()}
+    if kind == "series":
+        return pd.read_parquet(path + ".parquet")["value"].rename(spec["name"])
+    if kind == "frame":
+        frame = pd.read_parquet(path + ".parquet")
+        return frame.assign(**{column: frame[column].map(frozenset) for column in spec["sets"]})
+    if kind == "sparse":
+        return sparse.load_npz(path + ".npz").tocsr()
+    return spec["value"]
+
+
+def read_manifest(directory):
+    """The manifest of the artifacts in ``directory``, or ``None``.
+
+    Result paths are relative to ``snapshot_path(directory, manifest)``.
+    """
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path) as manifest:
+        return json.load(manifest)
+
+
+def artifact_signature(directory):
+    """Cache key for the artifacts in ``directory`` (``None`` when there are none)."""
+    path = os.path.join(directory, MANIFEST)
+    return file_signature(path) if os.path.exists(path) else None
+
+
+def _figures(pipeline):
+    """``(name, draw, args, kwargs, title)`` of the standard figures."""
+    dims = pipeline.get("product_dims")
+    counts = pipeline.get("line_counts")
+    orders = rollup(pipeline.get("cubes")["department_time"], "DEPARTMENT_NAME").sort_values()
+    return [
+        ("missing_data", pattern_matrix, (pipeline.get("missingness")["patterns"],), {}, "Missing Data Matrix"),
+        ("department_orders", bars, (orders.index, orders.to_numpy()),
+         {"xlabel": "Department", "ylabel": "Orders"}, "Orders per Department"),
+        ("weight_by_department", boxplot, (dims["WEIGHT_GRAMS"], dims["DEPARTMENT_NAME"]),
+         {"weights": counts, "ylabel": "Weight (g)"}, "Weight by Department"),
+        ("volume_by_department", boxplot, (dims["VOLUME_INCHES"], dims["DEPARTMENT_NAME"]),
+         {"weights": counts, "ylabel": "Volume (in^3)"}, "Volume by Department"),
+        ("rule_graph", draw_graph, (pipeline.get("rule_graph"),), {},
+         "Association Rules with Confidence Greater than 0.95"),
+    ]
+
+
+def export(pipeline, out_dir, names=None, figures=True, workers=None):
+    """Compute the results called ``names`` (default: all) and write them to ``out_dir``.
+
+    Returns the manifest.
+    """
+    # eda.pipeline reads artifacts with this module
+    from eda.pipeline import STAGES
+
+    names = [name for name in (names or STAGES) if name not in _SKIPPED]
+    results, written = {}, []
+
+    def write(path):
+        os.makedirs(path)
+        for name in names:
+            value = pipeline.get(name)
+            with track(name, kind="artifact"):
+                results[name] = save_result(value, os.path.join(path, name))
+        if figures:
+            matplotlib.use("Agg")
+            panels = _figures(pipeline)
+            os.makedirs(os.path.join(path, "figures"))
+            with track("figures", kind="artifact"):
+                images = render_panels([panel[1:] for panel in panels], workers, figsize=(10, 6))
+            for (name, *_), png in zip(panels, images):
+                with open(os.path.join(path, "figures", f"{name}.png"), "wb") as out:
+                    out.write(png)
+                written.append(f"figures/{name}.png")
+
+    # results and figures are filled in by write() before the manifest is saved
+    manifest = {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "options": {"backend": pipeline.get("backend"), "approximate": pipeline.get("approximate")},
+        "results": results,
+        "figures": written,
+    }
+    write_snapshot(out_dir, MANIFEST, manifest, write)
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute the report's results and figures.")
+    parser.add_argument("out_dir")
+    parser.add_argument("data_dir", nargs="?", default=DATA_DIR)
+    parser.add_argument("--backend", default="pandas", choices=["pandas", "polars"])
+    parser.add_argument("--state-dir", default=None, help="incremental state to read aggregates from")
+    parser.add_argument("--approximate", action="store_true", help="approximate medians (see eda.sketches)")
+    parser.add_argument("--workers", type=int, default=0, help="worker processes for statistics and figures")
+    parser.add_argument("--only", nargs="+", default=None, metavar="RESULT", help="results to write")
+    parser.add_argument("--no-figures", dest="figures", action="store_false")
+    args = parser.parse_args(argv)
+
+    from streamlit.logger import set_log_level
+    set_log_level("error")
+    from eda.pipeline import Pipeline
+
+    pipeline = Pipeline(args.data_dir, args.backend, args.state_dir, args.approximate)
+    pipeline.configure(workers=args.workers)
+    with collect() as records:
+        manifest = export(pipeline, args.out_dir, args.only, args.figures, args.workers)
+    print(summary(records).to_string(index=False))
+    print(f"wrote {len(manifest['results'])} results and {len(manifest['figures'])} figures to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
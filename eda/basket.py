@@ -0,0 +1,217 @@
+"""Market-basket mining on a sparse order x item incidence matrix.
+
+Frequent itemsets are found with Eclat: each item keeps the set of orders
+containing it as a packed bitset, and an itemset's support is the popcount
+of the AND of its items' bitsets.  Only items that are frequent on their own
+are ever expanded into bitsets, so the catalog can be as large as the
+product table while memory stays proportional to the frequent items.
+
+The output frames use the same columns as ``mlxtend.frequent_patterns``.
+"""
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# number of set bits in every possible byte
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def incidence_matrix(lines, item="DEPARTMENT_NAME", transaction="PURCHASE_ID"):
+    """Boolean CSR matrix with one row per transaction and one column per item.
+
+    ``item`` can be any line-level column, e.g. ``DEPARTMENT_NAME`` or
+    ``PRODUCT_ID``.  Returns the matrix and the transaction and item labels.
+    """
+    rows, transactions = pd.factorize(lines[transaction], sort=True)
+    columns, items = pd.factorize(lines[item], sort=True)
+    keep = columns >= 0
+    matrix = sparse.csr_matrix(
+        (np.ones(keep.sum(), dtype=bool), (rows[keep], columns[keep])),
+        shape=(len(transactions), len(items)),
+    )
+    return matrix, pd.Index(transactions), pd.Index(items)
+
+
+def _popcount(bitsets):
+    return _POPCOUNT[bitsets].sum(axis=-1, dtype=np.int64)
+
+
+def _item_bitsets(matrix, columns):
+    """Packed bitsets (one row per requested column) of a boolean matrix."""
+    if sparse.issparse(matrix):
+        matrix = matrix.tocsc()
+        n_rows = matrix.shape[0]
+        bitsets = np.empty((len(columns), (n_rows + 7) // 8), dtype=np.uint8)
+        for k, j in enumerate(columns):
+            bits = np.zeros(n_rows, dtype=bool)
+            bits[matrix.indices[matrix.indptr[j]:matrix.indptr[j + 1]]] = True
+            bitsets[k] = np.packbits(bits)
+        return bitsets
+    return np.packbits(np.asarray(matrix, dtype=bool)[:, columns].T, axis=1)
+
+
+def _column_counts(matrix):
+    if sparse.issparse(matrix):
+        return np.asarray((matrix != 0).sum(axis=0)).ravel()
+    return np.asarray(matrix, dtype=bool).sum(axis=0)
+
+
+def frequent_itemsets(matrix, items, min_support=0.5, max_len=None, weights=None):
+    """Itemsets contained in at least ``min_support`` of the transactions.
+
+    ``matrix`` is a boolean transaction x item matrix (scipy.sparse or dense)
+    and ``items`` labels its columns.  ``weights`` counts each row as that
+    many transactions, e.g. when rows are distinct baskets.  Returns a frame
+    with ``support`` and ``itemsets`` (frozensets of item labels).
+    """
+    items = np.asarray(items, dtype=object)
+    if weights is None:
+        n = matrix.shape[0]
+        counts = _column_counts(matrix)
+        support_count = _popcount
+    else:
+        # weighted supports are sums over rows, so the item columns are kept
+        # as plain boolean rows instead of packed bitsets
+        weights = np.asarray(weights, dtype="float64")
+        matrix = matrix.toarray() if sparse.issparse(matrix) else np.asarray(matrix, dtype=bool)
+        n = weights.sum()
+        counts = weights @ matrix
+
+        def support_count(bits):
+            return bits @ weights
+    frequent = np.flatnonzero(counts / n >= min_support)
+    # expanding the rarest items first keeps the intersections small
+    frequent = frequent[np.argsort(counts[frequent], kind="stable")]
+    bitsets = _item_bitsets(matrix, frequent) if weights is None else matrix[:, frequent].T
+
+    found = []
+
+    def expand(prefix, labels, bits, supports):
+        for i, label in enumerate(labels):
+            itemset = prefix + (label,)
+            found.append((supports[i], itemset))
+            if (max_len is not None and len(itemset) >= max_len) or i + 1 == len(labels):
+                continue
+            joined = bits[i + 1:] & bits[i]
+            joined_counts = support_count(joined)
+            keep = joined_counts / n >= min_support
+            if keep.any():
+                expand(itemset, labels[i + 1:][keep], joined[keep], joined_counts[keep])
+
+    expand((), items[frequent], bitsets, counts[frequent])
+    return pd.DataFrame({
+        "support": [count / n for count, _ in found],
+        "itemsets": [frozenset(itemset) for _, itemset in found],
+    })
+
+
+def association_rules(itemsets, min_confidence=0.0, min_lift=0.0, min_support=0.0):
+    """Rules ``antecedents -> consequents`` between frequent itemsets.
+
+    Every split of every frequent itemset into two non-empty parts is scored;
+    rules below any of the thresholds are dropped.
+    """
+    support = dict(zip(itemsets["itemsets"], itemsets["support"]))
+    antecedents, consequents = [], []
+    for itemset in support:
+        if len(itemset) < 2:
+            continue
+        members = sorted(itemset, key=str)
+        # every non-empty proper subset as the antecedent
+        for mask in range(1, 2 ** len(members) - 1):
+            antecedent = frozenset(m for b, m in enumerate(members) if mask >> b & 1)
+            antecedents.append(antecedent)
+            consequents.append(itemset - antecedent)
+
+    rules = pd.DataFrame({"antecedents": antecedents, "consequents": consequents})
+    rules["antecedent support"] = rules["antecedents"].map(support).astype(float)
+    rules["consequent support"] = rules["consequents"].map(support).astype(float)
+    rules["support"] = [support[a | c] for a, c in zip(antecedents, consequents)]
+    rules["support"] = rules["support"].astype(float)
+    rules["confidence"] = rules["support"] / rules["antecedent support"]
+    rules["lift"] = rules["confidence"] / rules["consequent support"]
+    rules["leverage"] = rules["support"] - rules["antecedent support"] * rules["consequent support"]
+    with np.errstate(divide="ignore"):
+        rules["conviction"] = (1 - rules["consequent support"]) / (1 - rules["confidence"])
+    keep = (
+        (rules["confidence"] >= min_confidence)
+        & (rules["lift"] >= min_lift)
+        & (rules["support"] >= min_support)
+    )
+    return rules[keep].reset_index(drop=True)
+
+
+def _only_item(itemset):
+    (item,) = itemset
+    return item
+
+
+def _single_item_rules(rules):
+    single = rules[(rules["antecedents"].map(len) == 1) & (rules["consequents"].map(len) == 1)]
+    return single.assign(
+        antecedent=single["antecedents"].map(_only_item),
+        consequent=single["consequents"].map(_only_item),
+    )
+
+
+def symmetric_pairs(rules):
+    """Item pairs whose rule holds in both directions.
+
+    Each single-item rule is keyed by its unordered pair ``(A, B)`` with
+    ``A < B``; the ``A -> B`` and ``B -> A`` halves are then joined on that key
+    in one merge.  Returns one row per pair with both directions' confidence
+    and lift.
+    """
+    single = _single_item_rules(rules)
+    forward = single["antecedent"].astype(str) < single["consequent"].astype(str)
+    keyed = pd.DataFrame({
+        "A": single["antecedent"].where(forward, single["consequent"]),
+        "B": single["consequent"].where(forward, single["antecedent"]),
+        "support": single["support"],
+        "confidence": single["confidence"],
+        "lift": single["lift"],
+    })
+    metrics = ["confidence", "lift"]
+    pairs = pd.merge(
+        keyed[forward.to_numpy()],
+        keyed[~forward.to_numpy()][["A", "B"] + metrics],
+        on=["A", "B"],
+        suffixes=("_ab", "_ba"),
+    )
+    return pairs.reset_index(drop=True)
+
+
+def bidirectional_rules(rules):
+    """The single-item rules of ``rules`` whose reverse rule is also present.
+
+    Keeps the rule columns and adds ``reverse confidence`` and
+    ``reverse lift`` from the opposite direction.
+    """
+    pairs = symmetric_pairs(rules)
+    directions = pd.concat([
+        pairs.rename(columns={"A": "antecedent", "B": "consequent",
+                              "confidence_ba": "reverse confidence", "lift_ba": "reverse lift"}),
+        pairs.rename(columns={"B": "antecedent", "A": "consequent",
+                              "confidence_ab": "reverse confidence", "lift_ab": "reverse lift"}),
+    ])[["antecedent", "consequent", "reverse confidence", "reverse lift"]]
+    single = _single_item_rules(rules)
+    matched = pd.merge(single, directions, on=["antecedent", "consequent"])
+    return matched.drop(columns=["antecedent", "consequent"])
+
+
+def department_rules(basket, departments, weights=None):
+    """Frequent itemsets and rules of the report's department analysis.
+
+    ``basket`` is a dense boolean order x department matrix.  The items are
+    departments an order has none of, with a minimum support of .6, and only
+    rules with a lift of at least 1 are kept.
+    """
+    itemsets = frequent_itemsets(~basket, departments, min_support=.6, weights=weights)
+    return itemsets, association_rules(itemsets, min_lift=1)
+
+
+def two_way_rules(rules):
+    """The one-to-one rules of ``rules`` that hold in both directions, by
+    decreasing confidence and lift."""
+    pairs = bidirectional_rules(rules)
+    return pairs.sort_values(["confidence", "lift"], ascending=[False, False])
@@ -0,0 +1,88 @@
+"""Calendar fields of purchases.
+
+A purchase has one timestamp shared by all of its line items, so calendar
+fields are derived once per purchase header row and then broadcast to line
+items by ``PURCHASE_ID``, the same way :func:`eda.products.with_product_columns`
+broadcasts product columns.  The timestamps themselves are parsed with an
+explicit format when the header is read (see :mod:`eda.schema`); every field
+here is integer arithmetic on their nanoseconds.
+"""
+import numpy as np
+import pandas as pd
+
+from eda.cubes import DAY_NAMES
+
+NS_PER_HOUR = 3_600 * 10**9
+NS_PER_DAY = 24 * NS_PER_HOUR
+
+# 1970-01-01 was a Thursday
+_EPOCH_DAY_OF_WEEK = 3
+
+CALENDAR_COLUMNS = ["PURCHASE_DATE", "PURCHASE_TIME", "HOUR", "DAY_OF_WEEK", "WEEKEND", "DAY", "MONTH", "YEAR"]
+
+
+def _civil_from_days(days):
+    # proleptic Gregorian year, month and day of days since 1970-01-01, in
+    # 400-year eras starting on March 1st (H. Hinnant, "chrono-Compatible
+    # Low-Level Date Algorithms")
+    days = days + 719_468
+    era = days // 146_097
+    day_of_era = days - era * 146_097
+    year_of_era = (day_of_era - day_of_era // 1_460 + day_of_era // 36_524 - day_of_era // 146_096) // 365
+    day_of_year = day_of_era - (365 * year_of_era + year_of_era // 4 - year_of_era // 100)
+    shifted_month = (5 * day_of_year + 2) // 153
+    day = day_of_year - (153 * shifted_month + 2) // 5 + 1
+    month = np.where(shifted_month < 10, shifted_month + 3, shifted_month - 9)
+    year = year_of_era + era * 400 + (month <= 2)
+    return year, month, day
+
+
+def calendar_features(timestamps):
+    """Calendar fields of ``timestamps``, one row per timestamp.
+
+    ``PURCHASE_DATE`` and ``PURCHASE_TIME`` are the datetime64 date and the
+    timedelta64 time of day; ``HOUR``, ``DAY``, ``MONTH`` and ``YEAR`` are
+    small integers (-1 where the timestamp is missing) and ``DAY_OF_WEEK`` is
+    an ordered categorical of :data:`eda.cubes.DAY_NAMES`.
+    """
+    timestamps = pd.Series(timestamps)
+    missing = timestamps.isna().to_numpy()
+    ns = timestamps.to_numpy("datetime64[ns]").view("int64")
+    days, time_of_day = np.divmod(ns, NS_PER_DAY)
+    dates = (days * NS_PER_DAY).view("datetime64[ns]")
+    dates[missing] = np.datetime64("NaT")
+    time_of_day = time_of_day.view("timedelta64[ns]")
+    time_of_day[missing] = np.timedelta64("NaT")
+    day_of_week = np.where(missing, -1, (days + _EPOCH_DAY_OF_WEEK) % 7).astype("int8")
+    year, month, day = (np.where(missing, -1, part) for part in _civil_from_days(days))
+    return pd.DataFrame({
+        "PURCHASE_DATE": dates,
+        "PURCHASE_TIME": time_of_day,
+        "HOUR": np.where(missing, -1, time_of_day.view("int64") // NS_PER_HOUR).astype("int8"),
+        "DAY_OF_WEEK": pd.Categorical.from_codes(day_of_week, DAY_NAMES, ordered=True),
+        "WEEKEND": day_of_week >= 5,
+        "DAY": day.astype("int8"),
+        "MONTH": month.astype("int8"),
+        "YEAR": year.astype("int16"),
+    }, index=timestamps.index)
+
+
+def purchase_calendar(purchase_header):
+    """Calendar fields of every purchase, indexed by ``PURCHASE_ID``.
+
+    The header's ``PURCHASE_DATE_TIME`` is kept alongside the fields.
+    """
+    timestamps = purchase_header["PURCHASE_DATE_TIME"]
+    calendar = calendar_features(timestamps.reset_index(drop=True))
+    calendar.insert(0, "PURCHASE_DATE_TIME", timestamps.to_numpy())
+    calendar.index = pd.Index(purchase_header["PURCHASE_ID"], name="PURCHASE_ID")
+    return calendar
+
+
+def with_calendar(lines, calendar, columns=CALENDAR_COLUMNS):
+    """Return ``lines`` with the calendar ``columns`` of their purchase on each row."""
+    rows = calendar.index.get_indexer(lines["PURCHASE_ID"])
+    lines = lines.copy(deep=False)
+    for column in columns:
+        lines[column] = calendar[column].take(rows).set_axis(lines.index)
+    return lines
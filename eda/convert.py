@@ -0,0 +1,39 @@
+"""One-time conversion of the CSV exports to typed Parquet files.
+
+    python -m eda.convert [DATA_DIR] [--out OUT_DIR]
+
+Writes ``product.parquet``, ``purchase_header.parquet`` and
+``purchase_lines.parquet`` next to the CSVs (or into ``OUT_DIR``).  Once they
+exist :mod:`eda.data` reads them instead of the CSVs.
+"""
+import argparse
+import os
+
+from eda.data import DATA_DIR, TABLES, read_csv, table_path
+
+
+def convert(data_dir=None, out_dir=None, tables=TABLES):
+    """Convert each CSV to Parquet and return the paths written."""
+    out_dir = out_dir or data_dir or DATA_DIR
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+    for name in tables:
+        frame = read_csv(table_path(name, data_dir), name)
+        path = table_path(name, out_dir, "parquet")
+        frame.to_parquet(path, index=False)
+        written.append(path)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert the challenge CSVs to Parquet.")
+    parser.add_argument("data_dir", nargs="?", default=DATA_DIR)
+    parser.add_argument("--out", dest="out_dir", default=None,
+                        help="directory for the Parquet files (defaults to DATA_DIR)")
+    args = parser.parse_args(argv)
+    for path in convert(args.data_dir, args.out_dir):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
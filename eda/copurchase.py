@@ -0,0 +1,266 @@
+"""Product-level co-purchase index.
+
+A dense order x product pivot is out of the question for a catalog of tens
+of thousands of products, but the number of product pairs that are ever
+bought together is small.  The index keeps, as a symmetric scipy CSR
+matrix, the number of orders containing each such pair, next to the number
+of orders containing each product and the total number of orders:
+
+``products``
+    orders containing each product, indexed by ``PRODUCT_ID`` in the order
+    of the matrix rows and columns.
+``pairs``
+    orders containing both products (the diagonal is left empty).
+
+Every count only grows by addition, so like :mod:`eda.incremental` the
+index records the highest ``PURCHASE_ID`` it has ingested and a refresh only
+adds newer purchases.  A product's partners are one row slice of the matrix,
+so :func:`top_partners` ranks them by support, confidence or lift without
+touching any orders.  The pairs are counted one chunk of line items at a
+time (see :func:`ingest`), so building the index takes memory for the pairs,
+not for the line file.
+
+    python -m eda.copurchase INDEX_DIR [DATA_DIR] [--header PATH] [--lines PATH]
+    python -m eda.copurchase INDEX_DIR --top PRODUCT_ID [--by lift] [-k 10]
+
+refreshes the index in ``INDEX_DIR`` or queries it.  The report reads the
+index from ``copurchase`` under ``EDA_STATE_DIR`` when there is one.
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from eda.data import DATA_DIR, file_signature, read_table, source_path
+from eda.incremental import snapshot_path, write_snapshot
+from eda.streaming import CHUNK_ROWS, iter_chunks
+
+INDEX_NAME = "copurchase"
+METRICS = ("support", "confidence", "lift")
+
+
+def empty_index():
+    return {
+        "watermark": None,
+        "orders": 0,
+        "products": pd.Series(dtype="int64", name="ORDERS", index=pd.Index([], dtype="int64", name="PRODUCT_ID")),
+        "pairs": sparse.csr_matrix((0, 0), dtype=np.int64),
+    }
+
+
+def _cooccurrence(order_rows, product_rows, n_orders, n_products):
+    # X^T X of the orders' incidence matrix: orders per product on the
+    # diagonal and per product pair off it
+    incidence = sparse.csr_matrix((np.ones(len(order_rows), dtype=np.int64), (order_rows, product_rows)),
+                                  shape=(n_orders, n_products))
+    # a product bought twice in an order counts once
+    incidence.data[:] = 1
+    return (incidence.T @ incidence).tocsr()
+
+
+def ingest(index, purchase_header, line_chunks, product):
+    """Add the purchases above the watermark to ``index`` and return the new index.
+
+    Line items are joined to ``purchase_header`` and ``product`` as in the
+    merged frame; only lines of new purchases are counted.  Each chunk's
+    orders are counted into a running sum of pair counts as the chunks go by;
+    only the chunk's last order, which may go on in the next chunk, is carried
+    over, so memory depends on the chunk size and the number of pairs, not on
+    the line file.  The lines of a purchase must therefore be next to each
+    other in the file, as they are in the exports; a ``ValueError`` is raised
+    when a purchase's lines turn up again after other purchases' lines.
+    """
+    watermark = index["watermark"]
+    if watermark is not None:
+        purchase_header = purchase_header[purchase_header["PURCHASE_ID"] > watermark]
+    if purchase_header.empty:
+        return index
+    orders = pd.Index(purchase_header["PURCHASE_ID"].unique())
+    catalog = pd.Index(product["PRODUCT_ID"].unique())
+    # products keep their position and new ones are appended, so pairs are
+    # counted in the index's own positions; products without orders are
+    # dropped again at the end
+    known = index["products"].index
+    space = pd.Index(np.concatenate([known.to_numpy(), catalog.difference(known).to_numpy()]))
+    positions = space.get_indexer(catalog)
+    n_space = len(space)
+
+    counts = sparse.csr_matrix((n_space, n_space), dtype=np.int64)
+    counted = np.zeros(len(orders), dtype=bool)
+
+    def count(rows, products):
+        nonlocal counts
+        if counted[rows].any():
+            raise ValueError("the lines of each purchase must be next to each other in the line file")
+        counted[rows] = True
+        block = _cooccurrence(rows, products, len(orders), n_space)
+        counts = counts + block if counts.nnz else block
+
+    carry_rows = carry_products = np.empty(0, dtype=np.int64)
+    for chunk in line_chunks:
+        rows = orders.get_indexer(chunk["PURCHASE_ID"])
+        products = catalog.get_indexer(chunk["PRODUCT_ID"])
+        joined = (rows >= 0) & (products >= 0)
+        rows = np.concatenate([carry_rows, rows[joined]])
+        products = np.concatenate([carry_products, positions[products[joined]]])
+        if not len(rows):
+            continue
+        tail = rows == rows[-1]
+        count(rows[~tail], products[~tail])
+        carry_rows, carry_products = rows[tail], products[tail]
+    count(carry_rows, carry_products)
+
+    product_orders = counts.diagonal()
+    product_orders[:len(known)] += index["products"].to_numpy()
+    # the diagonal is dropped in place, the pairs matrix being the largest
+    # thing held here
+    diagonal = counts.indices == np.repeat(np.arange(n_space, dtype=counts.indices.dtype), np.diff(counts.indptr))
+    counts.data[diagonal] = 0
+    del diagonal
+    counts.eliminate_zeros()
+    # appended products without orders have empty rows and columns; dropping
+    # them keeps the order of the rest
+    keep = product_orders > 0
+    keep[:len(known)] = True
+    n_products = int(keep.sum())
+    if n_products < n_space:
+        counts.indices = (np.cumsum(keep) - 1).astype(counts.indices.dtype)[counts.indices]
+        counts = sparse.csr_matrix((counts.data, counts.indices, np.concatenate([[0], counts.indptr[1:][keep]])),
+                                   shape=(n_products, n_products))
+    if index["pairs"].nnz:
+        pairs = index["pairs"].copy()
+        pairs.resize((n_products, n_products))
+        counts = (pairs + counts).tocsr()
+    return {
+        "watermark": int(purchase_header["PURCHASE_ID"].max()),
+        # purchases without any joined line item are not orders of any product
+        "orders": index["orders"] + int(counted.sum()),
+        "products": pd.Series(product_orders[keep], name="ORDERS", index=space[keep].rename("PRODUCT_ID")),
+        "pairs": counts,
+    }
+
+
+def top_partners(index, product_id, k=10, by="lift", min_orders=1):
+    """The ``k`` products most often bought with ``product_id``, best first.
+
+    ``by`` is one of :data:`METRICS`, all of the rule ``product_id ->
+    partner``: ``support`` is the share of all orders containing both,
+    ``confidence`` the share of ``product_id``'s orders that contain the
+    partner, and ``lift`` the confidence over the partner's own share of
+    orders.  Partners bought together with it in fewer than ``min_orders``
+    orders are left out, which keeps one-off pairs from topping the lift
+    ranking.  An unknown product has no partners.
+    """
+    if by not in METRICS:
+        raise ValueError(f"by must be one of {METRICS}")
+    products = index["products"]
+    row = products.index.get_indexer([product_id])[0]
+    pairs = index["pairs"]
+    start, end = (pairs.indptr[row], pairs.indptr[row + 1]) if row >= 0 else (0, 0)
+    partners, both = pairs.indices[start:end], pairs.data[start:end]
+    keep = both >= min_orders
+    partners, both = partners[keep], both[keep]
+
+    n = index["orders"]
+    product_orders = products.to_numpy()
+    support = both / n
+    confidence = both / product_orders[row] if len(both) else support
+    lift = confidence / (product_orders[partners] / n)
+    score = {"support": support, "confidence": confidence, "lift": lift}[by]
+    ids = products.index.to_numpy()[partners]
+    # everything tied with the k-th best is sorted too, so ties are broken
+    # the same way (by orders, then PRODUCT_ID) however the index was built
+    top = np.arange(len(score))
+    if len(score) > k:
+        top = np.flatnonzero(score >= np.partition(score, len(score) - k)[len(score) - k])
+    top = top[np.lexsort((ids[top], -both[top], -score[top]))][:k]
+    return pd.DataFrame({
+        "PRODUCT_ID": ids[top],
+        "orders": both[top],
+        "support": support[top],
+        "confidence": confidence[top],
+        "lift": lift[top],
+    })
+
+
+def _write_tables(index, path):
+    os.makedirs(path)
+    sparse.save_npz(os.path.join(path, "pairs.npz"), index["pairs"])
+    index["products"].to_frame().to_parquet(os.path.join(path, "products.parquet"))
+
+
+def save_index(index, directory):
+    """Write ``index`` to ``directory`` (the matrix, the products and a
+    manifest), atomically like :func:`eda.incremental.save_state`."""
+    write_snapshot(directory, "index.json", {"watermark": index["watermark"], "orders": index["orders"]},
+                   lambda path: _write_tables(index, path))
+
+
+def load_index(directory):
+    """Read an index written by :func:`save_index`, or an empty index."""
+    manifest_path = os.path.join(directory, "index.json")
+    if not os.path.exists(manifest_path):
+        return empty_index()
+    with open(manifest_path) as manifest:
+        index = json.load(manifest)
+    path = snapshot_path(directory, index)
+    index.pop("snapshot", None)
+    index["products"] = pd.read_parquet(os.path.join(path, "products.parquet"))["ORDERS"]
+    index["pairs"] = sparse.load_npz(os.path.join(path, "pairs.npz")).tocsr()
+    return index
+
+
+def index_signature(directory):
+    """Cache key for the index in ``directory`` (``None`` when there is none)."""
+    manifest_path = os.path.join(directory, "index.json")
+    return file_signature(manifest_path) if os.path.exists(manifest_path) else None
+
+
+def build(data_dir=None, header_path=None, lines_path=None, index=None, chunk_rows=CHUNK_ROWS):
+    """Ingest the purchases of the data files into ``index`` (a new one by default)."""
+    product = read_table(source_path("product", data_dir), "product", ("PRODUCT_ID",))
+    purchase_header = read_table(header_path or source_path("purchase_header", data_dir), "purchase_header",
+                                 ("PURCHASE_ID",))
+    lines = iter_chunks(lines_path or source_path("purchase_lines", data_dir),
+                        columns=("PURCHASE_ID", "PRODUCT_ID"), chunk_rows=chunk_rows)
+    return ingest(index if index is not None else empty_index(), purchase_header, lines, product)
+
+
+def refresh(index_dir, data_dir=None, header_path=None, lines_path=None, chunk_rows=CHUNK_ROWS):
+    """Ingest new purchases from the data files into the index in ``index_dir``."""
+    index = load_index(index_dir)
+    new_index = build(data_dir, header_path, lines_path, index, chunk_rows)
+    # like eda.incremental.refresh, nothing new leaves the snapshot alone
+    if new_index is not index:
+        save_index(new_index, index_dir)
+    return new_index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the product co-purchase index.")
+    parser.add_argument("index_dir")
+    parser.add_argument("data_dir", nargs="?", default=DATA_DIR)
+    parser.add_argument("--header", dest="header_path", default=None,
+                        help="purchase header file to ingest (defaults to DATA_DIR's)")
+    parser.add_argument("--lines", dest="lines_path", default=None,
+                        help="purchase lines file to ingest (defaults to DATA_DIR's)")
+    parser.add_argument("--top", type=int, default=None, metavar="PRODUCT_ID",
+                        help="print the partners of PRODUCT_ID instead of refreshing")
+    parser.add_argument("--by", choices=METRICS, default="lift")
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--min-orders", type=int, default=1)
+    args = parser.parse_args(argv)
+    if args.top is not None:
+        print(top_partners(load_index(args.index_dir), args.top, args.k, args.by, args.min_orders)
+              .to_string(index=False))
+        return
+    index = refresh(args.index_dir, args.data_dir, args.header_path, args.lines_path)
+    print(f"watermark {index['watermark']}: {index['orders']} orders, {len(index['products'])} products, "
+          f"{index['pairs'].nnz // 2} product pairs")
+
+
+if __name__ == "__main__":
+    main()
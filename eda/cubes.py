@@ -0,0 +1,17 @@
+"""Keys and roll-ups of the summary cubes behind the count charts.
+
+Every time and department chart in the report is a sum over line items, so
+:func:`eda.streaming.aggregate_lines` builds a cube keyed by department,
+date, hour and day of week, plus the two size distributions (lines per order
+and per product), in one pass over the line file.  Charts then aggregate the
+cube, whose size depends on the number of departments and days rather than
+on the number of line items.
+"""
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+CUBE_KEYS = ["DEPARTMENT_NAME", "PURCHASE_DATE", "HOUR", "DAY_OF_WEEK"]
+
+
+def rollup(cube, by, value="LINES"):
+    """Sum ``value`` over every cube key not in ``by``."""
+    return cube.groupby(by, observed=True)[value].sum()
@@ -0,0 +1,147 @@
+"""Cached loading of the challenge data.
+
+Streamlit re-executes the whole report on every widget click, so the
+product and purchase header tables are parsed once per file version and
+shared across reruns and sessions.  Cache keys include each file's mtime
+and size, so dropping in a new extract is picked up on the next rerun
+without clearing the cache by hand.
+
+Each table is read from ``<name>.parquet`` when ``python -m eda.convert`` has
+written one, and from ``<name>.csv`` otherwise.  Both paths produce the types
+in :mod:`eda.schema`, and both accept a column projection so callers only pay
+for the columns they use.
+
+The summary cubes, per-product line counts and order/department pairs are
+aggregated by :mod:`eda.streaming` one chunk of line items at a time, and
+row-level views use a bounded sample of line items; neither reads the whole
+line file into memory.
+"""
+import os
+
+import pandas as pd
+import streamlit as st
+
+from eda.products import build_product_dims
+from eda.schema import SCHEMAS, TIMESTAMP_FORMAT
+from eda.streaming import CHUNK_ROWS, SAMPLE_ROWS, aggregate_lines, iter_chunks, sample_lines
+
+# Frames handed out by this module are shared by every rerun.  With
+# copy-on-write enabled, any in-place edit made downstream (``.loc``
+# assignment, new columns) copies the touched data instead of mutating the
+# cached object.
+pd.set_option("mode.copy_on_write", True)
+
+DATA_DIR = os.environ.get("EDA_DATA_DIR", ".")
+
+TABLES = ("product", "purchase_header", "purchase_lines")
+
+
+def table_path(name, data_dir=None, fmt="csv"):
+    return os.path.join(data_dir or DATA_DIR, f"{name}.{fmt}")
+
+
+def source_path(name, data_dir=None):
+    """The Parquet copy of a table if one exists, otherwise its CSV."""
+    parquet = table_path(name, data_dir, "parquet")
+    if os.path.exists(parquet):
+        return parquet
+    return table_path(name, data_dir)
+
+
+def file_signature(path):
+    """Cache key for a file: absolute path plus modification time and size."""
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+
+def read_csv(path, name, columns=None):
+    """Parse a CSV export with the explicit types from :mod:`eda.schema`."""
+    schema = SCHEMAS[name]
+    usecols = list(columns) if columns is not None else list(schema)
+    dtypes = {c: t for c, t in schema.items() if c in usecols and not t.startswith("datetime")}
+    frame = pd.read_csv(path, usecols=usecols, dtype=dtypes)[usecols]
+    for column in usecols:
+        if schema[column].startswith("datetime"):
+            frame[column] = pd.to_datetime(frame[column], format=TIMESTAMP_FORMAT)
+    return frame
+
+
+def read_table(path, name, columns=None):
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path, columns=list(columns) if columns is not None else None)
+    return read_csv(path, name, columns)
+
+
+@st.cache_resource(show_spinner="Reading data...", max_entries=16)
+def _read(path, mtime_ns, size, name, columns):
+    return read_table(path, name, columns)
+
+
+def _read_only(frame):
+    # a shallow copy shares the cached buffers; copy-on-write keeps them intact
+    return frame.copy(deep=False)
+
+
+def _columns(columns):
+    return tuple(columns) if columns is not None else None
+
+
+def _signatures(data_dir):
+    return [file_signature(source_path(name, data_dir)) for name in TABLES]
+
+
+def load_table(name, columns=None, data_dir=None):
+    """Return one of the input tables, re-reading it only when the file changes."""
+    path = source_path(name, data_dir)
+    return _read_only(_read(*file_signature(path), name, _columns(columns)))
+
+
+@st.cache_resource(show_spinner="Computing product dimensions...", max_entries=1)
+def _product_dims(product_sig):
+    return build_product_dims(_read(*product_sig, "product", None))
+
+
+def load_product_dims(data_dir=None):
+    """Return :func:`eda.products.build_product_dims` of the product table."""
+    return _read_only(_product_dims(file_signature(source_path("product", data_dir))))
+
+
+@st.cache_resource(show_spinner="Aggregating line items...", max_entries=1)
+def _line_aggregates(product_sig, header_sig, lines_sig, chunk_rows):
+    product = _read(*product_sig, "product", ("PRODUCT_ID", "DEPARTMENT_NAME"))
+    purchase_header = _read(*header_sig, "purchase_header", None)
+    chunks = iter_chunks(lines_sig[0], "purchase_lines", chunk_rows=chunk_rows)
+    return aggregate_lines(chunks, purchase_header, product)
+
+
+def load_line_aggregates(data_dir=None, chunk_rows=CHUNK_ROWS):
+    """Return :func:`eda.streaming.aggregate_lines` of the line file."""
+    return _line_aggregates(*_signatures(data_dir), chunk_rows)
+
+
+def load_summary_cubes(data_dir=None):
+    """Return the summary cubes of :func:`eda.streaming.aggregate_lines`."""
+    cubes = load_line_aggregates(data_dir)["cubes"]
+    return {name: _read_only(cube) for name, cube in cubes.items()}
+
+
+def load_line_counts(data_dir=None):
+    """Number of line items per ``PRODUCT_ID``, including products never bought."""
+    return _read_only(load_line_aggregates(data_dir)["line_counts"])
+
+
+def load_order_departments(data_dir=None):
+    """Distinct ``(PURCHASE_ID, DEPARTMENT_NAME)`` pairs of the line items."""
+    return _read_only(load_line_aggregates(data_dir)["order_departments"])
+
+
+@st.cache_resource(show_spinner="Sampling line items...", max_entries=1)
+def _line_sample(product_sig, header_sig, lines_sig, n):
+    product = _read(*product_sig, "product", ("PRODUCT_ID", "DEPARTMENT_NAME"))
+    purchase_header = _read(*header_sig, "purchase_header", None)
+    return sample_lines(iter_chunks(lines_sig[0], "purchase_lines"), purchase_header, product, n)
+
+
+def load_line_sample(data_dir=None, n=SAMPLE_ROWS):
+    """Return :func:`eda.streaming.sample_lines` of the line file."""
+    return _read_only(_line_sample(*_signatures(data_dir), n))
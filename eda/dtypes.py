@@ -0,0 +1,49 @@
+"""Memory footprint of the frames the report holds.
+
+The tables are read with the compact types of :mod:`eda.schema`; to show
+what that saves, every frame is also measured with the types pandas would
+have given it without a schema.
+"""
+import pandas as pd
+
+from eda.schema import SCHEMAS
+
+# columns a plain read_csv leaves as strings
+TIMESTAMPS = {column for schema in SCHEMAS.values() for column, dtype in schema.items()
+              if dtype.startswith("datetime")}
+
+
+def memory_usage(frame):
+    """Total bytes held by ``frame``, counting the contents of object columns."""
+    return int(frame.memory_usage(index=False, deep=True).sum())
+
+
+def default_types(frame):
+    """``frame`` with pandas' default types: 64-bit numbers, strings for
+    categories, and the timestamps of :mod:`eda.schema` unparsed."""
+    columns = {}
+    for column in frame.columns:
+        values = frame[column]
+        if column in TIMESTAMPS or isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(str).astype(object)
+        elif pd.api.types.is_integer_dtype(values.dtype):
+            values = values.astype("int64")
+        elif pd.api.types.is_float_dtype(values.dtype):
+            values = values.astype("float64")
+        columns[column] = values
+    return pd.DataFrame(columns)
+
+
+def footprint(frames):
+    """Dtype and bytes of every column of ``frames`` (a dict of name -> frame),
+    with the schema's types and with pandas' defaults."""
+    rows = []
+    for name, frame in frames.items():
+        untyped = default_types(frame)
+        for column in frame.columns:
+            rows.append({
+                "table": name, "column": column,
+                "dtype": str(frame[column].dtype), "bytes": memory_usage(frame[[column]]),
+                "default_dtype": str(untyped[column].dtype), "default_bytes": memory_usage(untyped[[column]]),
+            })
+    return pd.DataFrame(rows)
@@ -0,0 +1,181 @@
+"""Association-rule networks: edge lists, layout and drawing.
+
+A rule ``A -> B`` and its reverse ``B -> A`` are one edge here.  The
+single-item rules are keyed by their unordered pair in one vectorized pass,
+the two directions' weights end up side by side, and only pairs where one
+direction is missing keep an arrow.  A graph is a dict of two frames:
+
+``edges``
+    ``source``, ``target``, ``weight`` (of ``source -> target``) and
+    ``reverse_weight`` (of ``target -> source``, NaN for one-way rules).
+``nodes``
+    ``x`` and ``y`` positions and ``degree``, indexed by item.
+
+Layouts are cached by the edge list they were computed for, and
+:func:`draw_graph` draws all edges and nodes as a few collections, so
+graphs with thousands of edges draw in about the time of a dozen.
+"""
+import hashlib
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from matplotlib.collections import LineCollection
+from scipy import sparse
+
+from eda.basket import _single_item_rules
+
+# edges kept by default, strongest first
+MAX_EDGES = 500
+
+# up to this many nodes are placed on concentric shells, beyond it by a
+# force-directed layout
+SHELL_NODES = 40
+
+
+def rule_edges(rules, weight="confidence", min_weight=0.0):
+    """One edge per pair of items with a single-item rule between them.
+
+    Rules with ``weight`` below ``min_weight`` are dropped first, so a pair
+    whose reverse rule is too weak becomes a one-way edge.
+    """
+    single = _single_item_rules(rules[rules[weight] >= min_weight])
+    source = single["antecedent"].astype(str).to_numpy()
+    target = single["consequent"].astype(str).to_numpy()
+    values = single[weight].to_numpy(dtype="float64")
+    forward = source < target
+    keyed = pd.DataFrame({
+        "source": np.where(forward, source, target),
+        "target": np.where(forward, target, source),
+        "weight": np.where(forward, values, np.nan),
+        "reverse_weight": np.where(forward, np.nan, values),
+    })
+    edges = keyed.groupby(["source", "target"], sort=True).max().reset_index()
+    # a rule only seen as target -> source is turned around
+    backward = edges["weight"].isna().to_numpy()
+    for first, second in (("source", "target"), ("weight", "reverse_weight")):
+        edges.loc[backward, [first, second]] = edges.loc[backward, [second, first]].to_numpy()
+    return edges
+
+
+def prune(edges, max_edges=MAX_EDGES):
+    """The ``max_edges`` edges with the strongest direction."""
+    strength = edges[["weight", "reverse_weight"]].max(axis=1)
+    return edges.loc[strength.nlargest(max_edges, keep="first").index.sort_values()].reset_index(drop=True)
+
+
+def force_layout(adjacency, iterations=50, seed=0, block=2048):
+    """Fruchterman-Reingold positions for a symmetric sparse ``adjacency``.
+
+    The same force model as ``networkx.spring_layout``, but each iteration
+    is a few array operations: repulsion between all pairs of nodes as
+    matrix products over blocks of nodes, attraction along the edges only.
+    Positions are scaled to [-1, 1].
+    """
+    n = adjacency.shape[0]
+    adjacency = sparse.coo_matrix(adjacency)
+    rows, columns = adjacency.row, adjacency.col
+    positions = np.random.default_rng(seed).random((n, 2))
+    k = 1 / np.sqrt(n)
+    temperature = .1
+    cooling = temperature / (iterations + 1)
+    for _ in range(iterations):
+        squares = (positions ** 2).sum(axis=1)
+        displacement = np.empty_like(positions)
+        for start in range(0, n, block):
+            part = positions[start:start + block]
+            # k^2 / d^2 times (p_i - p_j), summed over j, as matrix products
+            distances = squares[start:start + block, None] + squares[None, :] - 2 * part @ positions.T
+            force = k * k / np.maximum(distances, 1e-8)
+            force[np.arange(len(part)), np.arange(start, start + len(part))] = 0
+            displacement[start:start + block] = part * force.sum(axis=1)[:, None] - force @ positions
+        delta = positions[rows] - positions[columns]
+        pull = delta * (np.sqrt((delta ** 2).sum(axis=1)) / k)[:, None]
+        displacement[:, 0] -= np.bincount(rows, pull[:, 0], minlength=n)
+        displacement[:, 1] -= np.bincount(rows, pull[:, 1], minlength=n)
+        length = np.maximum(np.sqrt((displacement ** 2).sum(axis=1)), .01)
+        positions += displacement * (np.minimum(length, temperature) / length)[:, None]
+        temperature -= cooling
+    positions -= positions.mean(axis=0)
+    return positions / max(np.abs(positions).max(), 1e-12)
+
+
+def _edges_key(edges):
+    hashed = pd.util.hash_pandas_object(edges[["source", "target", "weight"]], index=False)
+    return hashlib.sha1(hashed.to_numpy().tobytes()).hexdigest()
+
+
+@st.cache_resource(max_entries=16)
+def _layout(key, _edges, seed):
+    # the key stands for _edges, which Streamlit doesn't hash
+    codes, nodes = pd.factorize(pd.concat([_edges["source"], _edges["target"]]), sort=True)
+    source, target = np.split(codes, 2)
+    n = len(nodes)
+    adjacency = sparse.coo_matrix((np.ones(len(codes)), (codes, np.concatenate([target, source]))),
+                                  shape=(n, n)).tocsr()
+    adjacency.data[:] = 1
+    if n <= SHELL_NODES:
+        # evenly on a circle, in name order, like networkx.shell_layout
+        angles = 2 * np.pi * np.arange(n) / max(n, 1)
+        positions = np.column_stack([np.cos(angles), np.sin(angles)])
+    else:
+        positions = force_layout(adjacency, seed=seed)
+    return pd.DataFrame({
+        "x": positions[:, 0],
+        "y": positions[:, 1],
+        "degree": np.diff(adjacency.indptr),
+    }, index=pd.Index(nodes, name="item"))
+
+
+def layout(edges, seed=0):
+    """Node positions for ``edges``, computed once per distinct edge list."""
+    return _layout(_edges_key(edges), edges, seed)
+
+
+def rule_graph(rules, weight="confidence", min_weight=0.0, max_edges=MAX_EDGES):
+    """The pruned, laid-out graph of the single-item rules in ``rules``."""
+    edges = prune(rule_edges(rules, weight, min_weight), max_edges)
+    return {"edges": edges, "nodes": layout(edges)}
+
+
+def draw_graph(ax, graph, max_labels=60, max_edge_labels=40):
+    """Draw ``graph`` on ``ax``: lines for two-way edges, arrows for one-way.
+
+    Line widths follow the edge weights.  Node and edge labels are only
+    drawn while there are few enough of them to read.
+    """
+    edges, nodes = graph["edges"], graph["nodes"]
+    if edges.empty:
+        ax.text(.5, .5, "No rules above the threshold", ha="center", va="center", transform=ax.transAxes)
+        ax.set_axis_off()
+        return
+    start = nodes.loc[edges["source"], ["x", "y"]].to_numpy()
+    end = nodes.loc[edges["target"], ["x", "y"]].to_numpy()
+    strength = edges[["weight", "reverse_weight"]].max(axis=1).to_numpy()
+    low, high = strength.min(), strength.max()
+    widths = .5 + 2.5 * ((strength - low) / (high - low) if high > low else np.ones_like(strength))
+    one_way = edges["reverse_weight"].isna().to_numpy()
+
+    ax.add_collection(LineCollection(np.stack([start, end], axis=1)[~one_way], linewidths=widths[~one_way],
+                                     colors="0.45", zorder=1))
+    few = len(nodes) <= max_labels
+    if one_way.any():
+        # arrows stop at the edge of the target's marker so the head stays visible
+        delta = (end - start)[one_way]
+        length = np.maximum(np.sqrt((delta ** 2).sum(axis=1)), 1e-12)
+        delta *= (1 - np.minimum(.1 if few else .01, length / 2) / length)[:, None]
+        ax.quiver(start[one_way, 0], start[one_way, 1], delta[:, 0], delta[:, 1], angles="xy",
+                  scale_units="xy", scale=1, width=.002, headwidth=6, color="C3", zorder=2)
+    ax.scatter(nodes["x"], nodes["y"], s=(900 if few else 40) + 10 * nodes["degree"], c="skyblue",
+               edgecolors="white", zorder=3)
+    if few:
+        for item, x, y in zip(nodes.index, nodes["x"], nodes["y"]):
+            ax.text(x, y, item, ha="center", va="center", fontsize=9, fontweight="bold", zorder=4)
+    if len(edges) <= max_edge_labels:
+        middle = (start + end) / 2
+        for (x, y), forward, reverse in zip(middle, edges["weight"], edges["reverse_weight"]):
+            label = f"{forward:.3f}" if np.isnan(reverse) else f"{forward:.3f} / {reverse:.3f}"
+            ax.text(x, y, label, ha="center", va="center", fontsize=8, zorder=4,
+                    bbox={"facecolor": "white", "edgecolor": "none", "pad": 1})
+    ax.margins(.08)
+    ax.set_axis_off()
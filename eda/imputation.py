@@ -0,0 +1,144 @@
+"""Group-wise imputation of missing values.
+
+Fill values are computed once per group (department by default) into a small
+lookup table, then every target column is filled by indexing that table with
+the rows' group codes.  Only the target columns are rebuilt; the rest of the
+frame is shared with the input.
+
+Frames at product grain can pass ``weights`` (e.g. line items per product) so
+the statistics come out exactly as if they had been computed over the
+line-item frame.
+
+The per-group statistics are independent, so passing ``workers`` computes
+them one group per task on a process pool (see :mod:`eda.parallel`).
+"""
+import numpy as np
+import pandas as pd
+
+from eda.parallel import map_groups
+from eda.sketches import approximate_median
+from eda.stats import group_order_statistic
+
+
+def median(values, codes, n_groups, weights):
+    """Group medians; with integer weights this matches ``groupby().median()``
+    over the expanded rows."""
+    low = group_order_statistic(values, codes, weights, n_groups, lambda n: np.floor((n - 1) / 2))
+    high = group_order_statistic(values, codes, weights, n_groups, lambda n: np.floor(n / 2))
+    return (low + high) / 2
+
+
+def trimmed_mean(values, codes, n_groups, weights, proportion=0.1):
+    """Group means after dropping ``proportion`` of the weight from each tail."""
+    lower = group_order_statistic(values, codes, weights, n_groups,
+                                  lambda n: np.floor(proportion * n))
+    upper = group_order_statistic(values, codes, weights, n_groups,
+                                  lambda n: np.ceil((1 - proportion) * n) - 1)
+    keep = ~np.isnan(values) & (codes >= 0)
+    keep[keep] &= (values[keep] >= lower[codes[keep]]) & (values[keep] <= upper[codes[keep]])
+    sums = np.bincount(codes[keep], values[keep] * weights[keep], minlength=n_groups)
+    counts = np.bincount(codes[keep], weights[keep], minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sums / counts
+
+
+# name -> function(values, codes, n_groups, weights) returning one value per group
+STRATEGIES = {
+    "median": median,
+    "trimmed_mean": trimmed_mean,
+    "approximate_median": approximate_median,
+}
+
+
+def _group_codes(frame, by):
+    groups = frame[by]
+    if isinstance(groups.dtype, pd.CategoricalDtype):
+        return groups.cat.codes.to_numpy(), groups.cat.categories
+    codes, labels = pd.factorize(groups)
+    return codes, pd.Index(labels)
+
+
+def _weights(frame, weights):
+    if weights is None:
+        return np.ones(len(frame))
+    return np.asarray(weights, dtype="float64")
+
+
+def _partition_fill_values(part, columns, by, strategy):
+    # one group's row of the lookup table
+    table = group_fill_values(part, columns, by, strategy, part["_weight"])
+    return table.loc[part[by].iloc[0]]
+
+
+def group_fill_values(frame, columns, by="DEPARTMENT_NAME", strategy="median", weights=None,
+                      workers=None):
+    """Lookup table of fill values, one row per group and one column per target."""
+    statistic = STRATEGIES[strategy] if isinstance(strategy, str) else strategy
+    codes, labels = _group_codes(frame, by)
+    weights = _weights(frame, weights)
+    if workers and workers > 1:
+        weighted = frame[list(columns) + [by]].assign(_weight=weights)
+        rows = map_groups(_partition_fill_values, weighted, by, workers, columns, by, strategy)
+        return pd.DataFrame(list(rows.values()), index=list(rows)).reindex(labels)
+    table = {
+        column: statistic(frame[column].to_numpy(dtype="float64"), codes, len(labels), weights)
+        for column in columns
+    }
+    return pd.DataFrame(table, index=labels)
+
+
+def nearest_product(frame, columns, by="DEPARTMENT_NAME", key="PRODUCT_ID"):
+    """Fill from the product in the same group whose ``key`` is closest.
+
+    Product IDs are assigned in catalog order, so neighbouring IDs tend to be
+    variants of the same item.  Returns one fill value per row of ``frame``.
+    """
+    keys = frame[key] if key in frame else frame.index.to_series(name=key)
+    fills = {}
+    for column in columns:
+        rows = pd.DataFrame({"row": np.arange(len(frame)), key: keys.to_numpy(),
+                             by: frame[by].to_numpy()}).sort_values(key)
+        known = rows.assign(fill=frame[column].to_numpy()[rows["row"]]).dropna(subset=["fill"])
+        matched = pd.merge_asof(rows, known[[key, by, "fill"]], on=key, by=by, direction="nearest")
+        fills[column] = matched.set_index("row")["fill"].reindex(np.arange(len(frame))).to_numpy()
+    return pd.DataFrame(fills, index=frame.index)
+
+
+def impute(frame, columns, by="DEPARTMENT_NAME", strategy="median", weights=None, workers=None,
+           fill_values=None):
+    """Fill missing values of ``columns`` from each row's group.
+
+    ``strategy`` is a name from :data:`STRATEGIES`, ``"nearest_product"``, or a
+    callable with the same signature as :func:`median`.  Returns the filled
+    frame and a per-column count of imputed cells (plus their total weight
+    when ``weights`` is given).  ``workers`` is passed on to
+    :func:`group_fill_values`; a lookup table computed elsewhere (e.g. by
+    :mod:`eda.polars_backend`) can be passed as ``fill_values`` instead.
+    """
+    weights_array = _weights(frame, weights)
+    if strategy == "nearest_product":
+        row_fills = nearest_product(frame, columns, by).to_numpy()
+
+        def fill(j, missing):
+            return row_fills[missing, j]
+    else:
+        codes, labels = _group_codes(frame, by)
+        if fill_values is None:
+            fill_values = group_fill_values(frame, columns, by, strategy, weights_array, workers)
+        table = fill_values.reindex(labels)[list(columns)].to_numpy()
+
+        def fill(j, missing):
+            return np.where(codes[missing] >= 0, table[codes[missing], j], np.nan)
+
+    filled = frame.copy(deep=False)
+    counts = {}
+    for j, column in enumerate(columns):
+        values = frame[column].to_numpy(copy=True)
+        missing = np.flatnonzero(np.isnan(values))
+        values[missing] = fill(j, missing)
+        imputed = missing[~np.isnan(values[missing])]
+        filled[column] = values
+        counts[column] = {"imputed": len(imputed)}
+        if weights is not None:
+            counts[column]["imputed_weight"] = weights_array[imputed].sum()
+    return filled, pd.DataFrame(list(counts.values()), index=list(counts))
@@ -0,0 +1,264 @@
+"""Incremental refresh of the line-item aggregates.
+
+Everything the report aggregates over line items can be kept as state that
+only grows by addition when new purchases arrive:
+
+``department_time`` / ``lines_per_order``
+    the summary cubes of :func:`eda.streaming.aggregate_lines`.  A purchase
+    is ingested once with all of its lines, so its distinct-order counts
+    never overlap with earlier state and every column can simply be summed.
+``line_counts``
+    line items per product.  The department medians are weighted medians
+    over these counts, so they stay exact without keeping any line items,
+    and ``lines_per_product`` is derived from them.
+``department_sets``
+    the number of orders with each set of departments, as a bitmask over
+    ``departments``.  This is all the department basket mining needs: the
+    distinct sets become the rows of the incidence matrix, weighted by how
+    many orders have them.
+``orders``
+    every order's ``PURCHASE_DATE_TIME`` and department ``MASK``, appended
+    as orders are ingested, for the report's time-window filters (see
+    :mod:`eda.slicing`).
+
+Purchase IDs are assigned in increasing order, so the state records the
+highest ``PURCHASE_ID`` ingested as its watermark and a refresh only joins
+purchases above it.  Line items that arrive for an already ingested purchase
+are not picked up.
+
+    python -m eda.incremental STATE_DIR [DATA_DIR] [--header PATH] [--lines PATH]
+
+refreshes (or creates) the state in ``STATE_DIR``.
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from eda.cubes import CUBE_KEYS
+from eda.data import DATA_DIR, file_signature, read_table, source_path
+from eda.streaming import CHUNK_ROWS, aggregate_lines, iter_chunks
+
+STATE_DIR = os.environ.get("EDA_STATE_DIR")
+
+# masks are int64, with one bit per department
+MAX_DEPARTMENTS = 63
+
+
+def empty_state():
+    return {
+        "watermark": None,
+        "departments": [],
+        "department_time": pd.DataFrame(columns=CUBE_KEYS + ["QUANTITY", "LINES", "ORDERS"]),
+        "lines_per_order": pd.DataFrame({"LINES": pd.Series(dtype="int64"), "ORDERS": pd.Series(dtype="int64")}),
+        "line_counts": pd.Series(dtype="int64", name="LINES", index=pd.Index([], name="PRODUCT_ID")),
+        "department_sets": pd.Series(dtype="int64", name="ORDERS", index=pd.Index([], name="MASK")),
+        "orders": pd.DataFrame({"PURCHASE_ID": pd.Series(dtype="int32"),
+                                "PURCHASE_DATE_TIME": pd.Series(dtype="datetime64[ns]"),
+                                "MASK": pd.Series(dtype="int64")}),
+    }
+
+
+def _sum_by(frames, keys):
+    # empty state frames carry no dtypes, so they are left out of the concat
+    combined = pd.concat([frame for frame in frames if len(frame)] or frames[-1:], ignore_index=True)
+    return combined.groupby(keys, observed=True, sort=True).sum().reset_index()
+
+
+def _department_masks(pairs, departments):
+    """Bitmask of each order's departments, extending ``departments`` with new ones."""
+    names = pairs["DEPARTMENT_NAME"].astype(str)
+    departments = departments + sorted(set(names.unique()) - set(departments))
+    if len(departments) > MAX_DEPARTMENTS:
+        raise ValueError(f"department bitmasks hold at most {MAX_DEPARTMENTS} departments")
+    bits = pd.Index(departments).get_indexer(names)
+    masks = pd.Series(np.left_shift(1, bits, dtype=np.int64)).groupby(pairs["PURCHASE_ID"].to_numpy()).sum()
+    return masks, departments
+
+
+def order_masks(pairs, purchase_header, departments=()):
+    """One row per order of ``pairs`` with its ``PURCHASE_DATE_TIME`` (from
+    ``purchase_header``) and the ``MASK`` of its departments, and the
+    department labels of the mask bits (``departments`` first)."""
+    masks, departments = _department_masks(pairs, list(departments))
+    rows = pd.Index(purchase_header["PURCHASE_ID"]).get_indexer(masks.index)
+    orders = pd.DataFrame({
+        "PURCHASE_ID": masks.index.to_numpy().astype("int32"),
+        "PURCHASE_DATE_TIME": purchase_header["PURCHASE_DATE_TIME"].to_numpy()[rows],
+        "MASK": masks.to_numpy(),
+    })
+    return orders, departments
+
+
+def ingest(state, purchase_header, line_chunks, product):
+    """Add the purchases above the watermark to ``state`` and return the new state.
+
+    ``purchase_header`` may contain purchases that were already ingested and
+    ``line_chunks`` lines of any purchase; only lines of new purchases are
+    joined.
+    """
+    watermark = state["watermark"]
+    if watermark is not None:
+        purchase_header = purchase_header[purchase_header["PURCHASE_ID"] > watermark]
+    if purchase_header.empty:
+        return state
+    new = aggregate_lines(line_chunks, purchase_header, product)
+    cube = new["cubes"]["department_time"]
+    cube = cube.assign(DEPARTMENT_NAME=cube["DEPARTMENT_NAME"].astype(str))
+    orders, departments = order_masks(new["order_departments"], purchase_header, state["departments"])
+
+    department_time = _sum_by([state["department_time"], cube], CUBE_KEYS)
+    department_time["DEPARTMENT_NAME"] = department_time["DEPARTMENT_NAME"].astype("category")
+    new_counts = new["line_counts"][new["line_counts"] > 0]
+    return {
+        "watermark": int(purchase_header["PURCHASE_ID"].max()),
+        "departments": departments,
+        "department_time": department_time,
+        "lines_per_order": _sum_by([state["lines_per_order"], new["cubes"]["lines_per_order"]], "LINES"),
+        "line_counts": (state["line_counts"].add(new_counts, fill_value=0).astype("int64")
+                        .rename("LINES").rename_axis("PRODUCT_ID")),
+        "department_sets": (state["department_sets"].add(orders["MASK"].value_counts(), fill_value=0)
+                            .astype("int64").rename("ORDERS").rename_axis("MASK")),
+        "orders": pd.concat([state["orders"], orders], ignore_index=True),
+    }
+
+
+def cubes(state):
+    """The summary cubes of :func:`eda.streaming.aggregate_lines` from ``state``."""
+    per_product = state["line_counts"].value_counts().sort_index()
+    per_product.index.name = "LINES"
+    return {
+        "department_time": state["department_time"],
+        "lines_per_order": state["lines_per_order"],
+        "lines_per_product": per_product.rename("PRODUCTS").reset_index(),
+    }
+
+
+def department_sets(state):
+    """Boolean order-set x department matrix, department labels and set counts."""
+    masks = state["department_sets"]
+    order = np.argsort(state["departments"], kind="stable")
+    matrix = (masks.index.to_numpy()[:, None] >> order) & 1
+    departments = pd.Index(np.asarray(state["departments"], dtype=object)[order])
+    return matrix.astype(bool), departments, masks.to_numpy()
+
+
+def write_snapshot(directory, manifest_name, manifest, write):
+    """Write a new snapshot of persisted tables under ``directory``.
+
+    ``write(path)`` writes the tables into a fresh ``snapshot-*``
+    subdirectory, and only then is ``manifest`` (plus the snapshot's name)
+    swapped in for the manifest file with :func:`os.replace`.  A reader
+    therefore sees either the previous tables and watermark or the new ones,
+    never new totals next to an old watermark, which the next refresh would
+    ingest a second time.
+
+    The snapshot being replaced is kept, so a reader that loaded the
+    previous manifest can still read its tables; it is removed by the write
+    after this one, along with any snapshot left behind by an interrupted
+    write.
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest_path = os.path.join(directory, manifest_name)
+    previous = None
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as current:
+            previous = json.load(current).get("snapshot")
+    snapshot = f"snapshot-{time.time_ns()}"
+    write(os.path.join(directory, snapshot))
+    temporary = f"{manifest_path}.tmp"
+    with open(temporary, "w") as out:
+        json.dump({**manifest, "snapshot": snapshot}, out)
+    os.replace(temporary, manifest_path)
+    for name in os.listdir(directory):
+        if name.startswith("snapshot-") and name not in (snapshot, previous):
+            shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+
+def snapshot_path(directory, manifest):
+    """The directory holding the tables of ``manifest`` (a loaded manifest)."""
+    # state written before snapshots keeps its tables next to the manifest
+    return os.path.join(directory, manifest.get("snapshot", ""))
+
+
+def _write_tables(state, path):
+    os.makedirs(path)
+    state["department_time"].to_parquet(os.path.join(path, "department_time.parquet"), index=False)
+    state["lines_per_order"].to_parquet(os.path.join(path, "lines_per_order.parquet"), index=False)
+    state["line_counts"].to_frame().to_parquet(os.path.join(path, "line_counts.parquet"))
+    state["department_sets"].to_frame().to_parquet(os.path.join(path, "department_sets.parquet"))
+    state["orders"].to_parquet(os.path.join(path, "orders.parquet"), index=False)
+
+
+def save_state(state, directory):
+    """Write ``state`` to ``directory`` (one Parquet file per table plus a
+    manifest), atomically with :func:`write_snapshot`."""
+    write_snapshot(directory, "state.json", {"watermark": state["watermark"], "departments": state["departments"]},
+                   lambda path: _write_tables(state, path))
+
+
+def load_state(directory):
+    """Read state written by :func:`save_state`, or an empty state."""
+    manifest_path = os.path.join(directory, "state.json")
+    if not os.path.exists(manifest_path):
+        return empty_state()
+    with open(manifest_path) as manifest:
+        state = json.load(manifest)
+    path = snapshot_path(directory, state)
+    state.pop("snapshot", None)
+    state["department_time"] = pd.read_parquet(os.path.join(path, "department_time.parquet"))
+    state["lines_per_order"] = pd.read_parquet(os.path.join(path, "lines_per_order.parquet"))
+    state["line_counts"] = pd.read_parquet(os.path.join(path, "line_counts.parquet"))["LINES"]
+    state["department_sets"] = pd.read_parquet(os.path.join(path, "department_sets.parquet"))["ORDERS"]
+    if not os.path.exists(os.path.join(path, "orders.parquet")):
+        raise ValueError(f"the state in {directory} was written before orders were kept; "
+                         "remove it and run python -m eda.incremental again")
+    state["orders"] = pd.read_parquet(os.path.join(path, "orders.parquet"))
+    return state
+
+
+def state_signature(directory):
+    """Cache key for the state in ``directory`` (``None`` when there is none)."""
+    manifest_path = os.path.join(directory, "state.json")
+    return file_signature(manifest_path) if os.path.exists(manifest_path) else None
+
+
+def refresh(state_dir, data_dir=None, header_path=None, lines_path=None, chunk_rows=CHUNK_ROWS):
+    """Ingest new purchases from the data files into the state in ``state_dir``.
+
+    ``header_path`` and ``lines_path`` default to the tables in ``data_dir``;
+    pointing them at the day's extract avoids reading the full history.
+    """
+    state = load_state(state_dir)
+    product = read_table(source_path("product", data_dir), "product", ("PRODUCT_ID", "DEPARTMENT_NAME"))
+    header_path = header_path or source_path("purchase_header", data_dir)
+    lines_path = lines_path or source_path("purchase_lines", data_dir)
+    purchase_header = read_table(header_path, "purchase_header")
+    new_state = ingest(state, purchase_header, iter_chunks(lines_path, chunk_rows=chunk_rows), product)
+    # nothing past the watermark: the current snapshot (and the report's
+    # cache key) stays as it is
+    if new_state is not state:
+        save_state(new_state, state_dir)
+    return new_state
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Add new purchases to the persisted aggregates.")
+    parser.add_argument("state_dir")
+    parser.add_argument("data_dir", nargs="?", default=DATA_DIR)
+    parser.add_argument("--header", dest="header_path", default=None,
+                        help="purchase header file to ingest (defaults to DATA_DIR's)")
+    parser.add_argument("--lines", dest="lines_path", default=None,
+                        help="purchase lines file to ingest (defaults to DATA_DIR's)")
+    args = parser.parse_args(argv)
+    state = refresh(args.state_dir, args.data_dir, args.header_path, args.lines_path)
+    print(f"watermark {state['watermark']}: {state['lines_per_order']['ORDERS'].sum()} orders, "
+          f"{state['line_counts'].sum()} line items")
+
+
+if __name__ == "__main__":
+    main()
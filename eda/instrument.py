@@ -0,0 +1,126 @@
+"""Timing and memory records of pipeline stages and chart renders.
+
+:func:`track` measures a block of code: wall time, CPU time, how much it
+raised the process's peak resident size and, when the caller sets it, how
+many rows it produced.  Records go to the innermost :func:`collect` block of
+the current context (each Streamlit session runs in its own thread, so
+sessions don't see each other's records) and to the ``eda.performance``
+logger as one JSON object per message.
+
+Setting ``EDA_PERF_LOG`` to a file name appends those JSON lines to the file
+(``-`` writes them to stderr).
+
+CPU time is the whole process's, so it includes other threads working at
+the same time, e.g. Polars' thread pool or another session.
+"""
+import contextlib
+import contextvars
+import datetime
+import json
+import logging
+import os
+import resource
+import sys
+import time
+
+import pandas as pd
+
+PERF_LOG = os.environ.get("EDA_PERF_LOG")
+
+_logger = logging.getLogger("eda.performance")
+if PERF_LOG:
+    _handler = logging.StreamHandler(sys.stderr) if PERF_LOG == "-" else logging.FileHandler(PERF_LOG)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    _logger.addHandler(_handler)
+    _logger.setLevel(logging.INFO)
+
+# records of the current collect() block and the point the next checkpoint
+# is measured from
+_collector = contextvars.ContextVar("collector", default=None)
+
+
+def peak_rss():
+    """Peak resident size of this process so far, in bytes."""
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def count_rows(value):
+    """Rows in a frame or array, summed over dicts and tuples of them."""
+    if isinstance(value, dict):
+        return sum(count_rows(item) for item in value.values())
+    if isinstance(value, (tuple, list)):
+        return sum(count_rows(item) for item in value)
+    shape = getattr(value, "shape", None)
+    return shape[0] if shape else 0
+
+
+def _mark():
+    return time.perf_counter(), time.process_time(), peak_rss()
+
+
+def _finish(record, start):
+    wall, cpu, rss = start
+    record.update({
+        "seconds": time.perf_counter() - wall,
+        "cpu_seconds": time.process_time() - cpu,
+        "rss_peak_delta": peak_rss() - rss,
+    })
+    collector = _collector.get()
+    if collector is not None:
+        collector["records"].append(record)
+        collector["mark"] = _mark()
+    if _logger.isEnabledFor(logging.INFO):
+        _logger.info(json.dumps({
+            "time": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="milliseconds"),
+            "pid": os.getpid(),
+            **record,
+        }))
+    return record
+
+
+@contextlib.contextmanager
+def track(name, kind="stage"):
+    """Record the enclosed block as one ``kind`` event called ``name``.
+
+    Yields the record, which the block may give a ``rows`` count; the
+    measurements are added to it when the block exits.
+    """
+    start = _mark()
+    record = {"name": name, "kind": kind, "rows": None}
+    try:
+        yield record
+    finally:
+        _finish(record, start)
+
+
+def checkpoint(name, kind="chart"):
+    """Record everything since the last record of the current :func:`collect` block.
+
+    Charts are drawn in steps spread over a report section, so a chart is
+    measured up to the moment it is shown, from where the previous one ended.
+    Outside a :func:`collect` block nothing is recorded.
+    """
+    collector = _collector.get()
+    if collector is not None:
+        _finish({"name": name, "kind": kind, "rows": None}, collector["mark"])
+
+
+@contextlib.contextmanager
+def collect():
+    """Gather the records made in the enclosed block into the yielded list."""
+    collector = {"records": [], "mark": _mark()}
+    token = _collector.set(collector)
+    try:
+        yield collector["records"]
+    finally:
+        _collector.reset(token)
+
+
+def summary(records):
+    """``records`` as a frame, one row each, in the order they were made."""
+    frame = pd.DataFrame(records, columns=["name", "kind", "seconds", "cpu_seconds", "rss_peak_delta", "rows"])
+    frame["rss_peak_delta"] = frame["rss_peak_delta"] / 2**20
+    frame["rows"] = frame["rows"].astype("Int64")
+    return frame.rename(columns={"rss_peak_delta": "peak_rss_mib"})
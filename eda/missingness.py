@@ -0,0 +1,175 @@
+"""Missing-data profiles that scale with the number of rows.
+
+A row-by-row null matrix has one pixel row per line item, which is slow to
+draw at millions of rows and unreadable long before that.  Instead, every row
+is coded by its null pattern (one bit per column) in a single vectorized
+pass, and the pattern counts, overall and per group and date, are all the
+profile keeps.  Column null counts and the co-occurrence of nulls between
+columns follow from the patterns, and the charts here draw from the profile,
+so their cost doesn't depend on the number of rows.
+"""
+import numpy as np
+import pandas as pd
+
+# patterns are int64 bitmasks
+MAX_COLUMNS = 63
+
+
+def null_patterns(frame, columns=None):
+    """Code each row of ``frame`` by its null pattern.
+
+    Returns ``(codes, patterns)``: the pattern number of every row, and a
+    boolean frame with one row per distinct pattern (True where null).
+    """
+    columns = list(columns) if columns is not None else list(frame.columns)
+    if len(columns) > MAX_COLUMNS:
+        raise ValueError(f"null patterns cover at most {MAX_COLUMNS} columns")
+    masks = np.zeros(len(frame), dtype=np.int64)
+    for bit, column in enumerate(columns):
+        masks |= frame[column].isna().to_numpy().astype(np.int64) << bit
+    codes, uniques = pd.factorize(masks)
+    patterns = pd.DataFrame((uniques[:, None] >> np.arange(len(columns))) & 1, columns=columns).astype(bool)
+    return codes, patterns
+
+
+def _pattern_counts(codes, n_patterns, weights, keys=None):
+    # (key, pattern) counts in one bincount; without keys a single row
+    if keys is None:
+        return np.bincount(codes, weights, minlength=n_patterns)[None, :]
+    key_codes, labels = keys
+    cells = key_codes.astype(np.int64) * n_patterns + codes
+    counts = np.bincount(cells[key_codes >= 0], None if weights is None else weights[key_codes >= 0],
+                         minlength=len(labels) * n_patterns)
+    return counts.reshape(len(labels), n_patterns)
+
+
+def _null_shares(counts, patterns, labels, name):
+    # null share of each column per key: pattern counts times pattern bits
+    totals = counts.sum(axis=1)
+    nulls = counts @ patterns.to_numpy(dtype="float64")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shares = nulls / totals[:, None]
+    return pd.DataFrame(shares, index=pd.Index(labels, name=name), columns=patterns.columns)
+
+
+def profile(frame, columns=None, weights=None, by="DEPARTMENT_NAME", time="PURCHASE_DATE"):
+    """Missing-data profile of ``frame``, optionally with ``weights`` per row.
+
+    Returns a dict of frames:
+
+    ``columns``
+        null count and share per column.
+    ``patterns``
+        every distinct null pattern (True where null) with its ``ROWS``,
+        most frequent first.
+    ``co_occurrence``
+        column x column counts of rows where both are null (the diagonal is
+        the column's null count).
+    ``by_group`` / ``over_time``
+        null share per column for each value of ``by`` / ``time``, when
+        ``frame`` has that column.
+    """
+    columns = list(columns) if columns is not None else list(frame.columns)
+    codes, patterns = null_patterns(frame, columns)
+    weights = np.asarray(weights, dtype="float64") if weights is not None else None
+    counts = _pattern_counts(codes, len(patterns), weights)[0]
+    bits = patterns.to_numpy(dtype="float64")
+    total = counts.sum()
+
+    nulls = counts @ bits
+    result = {
+        "columns": pd.DataFrame({"nulls": nulls, "share": nulls / total if total else np.nan},
+                                index=pd.Index(columns, name="column")),
+        "patterns": patterns.assign(ROWS=counts).sort_values("ROWS", ascending=False, kind="stable")
+                            .reset_index(drop=True),
+        "co_occurrence": pd.DataFrame(bits.T @ (bits * counts[:, None]), index=columns, columns=columns),
+    }
+    for name, key in (("by_group", by), ("over_time", time)):
+        if key is not None and key in frame:
+            key_codes, labels = pd.factorize(frame[key], sort=True)
+            key_counts = _pattern_counts(codes, len(patterns), weights, (key_codes, labels))
+            result[name] = _null_shares(key_counts, patterns, labels, key)
+    return result
+
+
+def pattern_matrix(ax, patterns, max_patterns=20, min_height=.04):
+    """msno-style matrix of the most frequent null patterns.
+
+    Each pattern is a band, dark where values are present and white where
+    they are null, labelled with its number of rows.  Band heights follow
+    the patterns' shares of rows but are at least ``min_height`` so rare
+    patterns stay visible; the remaining patterns share a hatched band at
+    the bottom.
+    """
+    columns = [c for c in patterns.columns if c != "ROWS"]
+    rows = patterns["ROWS"].to_numpy()
+    shown = min(len(patterns), max_patterns)
+    counts = np.append(rows[:shown], rows[shown:].sum()) if len(patterns) > shown else rows
+    heights = np.maximum(counts / counts.sum(), min_height)
+    heights = heights / heights.sum()
+    bottoms = np.concatenate([[0], np.cumsum(heights)[:-1]])
+
+    band, column = np.nonzero(~patterns[columns].to_numpy()[:shown])
+    ax.bar(column, heights[band], bottom=bottoms[band], width=1, align="edge", color="0.25")
+    if len(counts) > shown:
+        ax.bar(0, heights[-1], bottom=bottoms[-1], width=len(columns), align="edge", color="0.85",
+               hatch="//", edgecolor="0.6", linewidth=0)
+    for index, count in enumerate(counts):
+        label = f"{count:,.0f}" if index < shown else f"{count:,.0f} ({len(patterns) - shown} other patterns)"
+        ax.text(len(columns) + .1, bottoms[index] + heights[index] / 2, label, va="center", fontsize=8)
+    ax.set_xlim(0, len(columns))
+    ax.set_ylim(1, 0)
+    ax.set_xticks(np.arange(len(columns)) + .5, columns, rotation=90)
+    ax.set_yticks([])
+    ax.set_ylabel("Null patterns by number of rows")
+    for edge in range(1, len(columns)):
+        ax.axvline(edge, color="white", linewidth=1)
+
+
+def null_share_bars(ax, columns):
+    """Null share per column, from the ``columns`` frame of a profile."""
+    ax.bar(range(len(columns)), columns["share"], color="C0")
+    for x, (nulls, share) in enumerate(zip(columns["nulls"], columns["share"])):
+        if nulls:
+            ax.text(x, share, f"{nulls:,.0f}", ha="center", va="bottom", fontsize=8)
+    ax.set_xticks(range(len(columns)), columns.index, rotation=90)
+    ax.set_ylim(0, max(columns["share"].max() * 1.15, 1e-3))
+    ax.set_ylabel("Share missing")
+
+
+def share_heatmap(ax, shares, max_labels=40):
+    """Null share per column (x) for each group or date (y)."""
+    # columns without nulls would only add blank stripes
+    shares = shares.loc[:, shares.columns[np.nanmax(shares.to_numpy(), axis=0, initial=0) > 0]]
+    if shares.shape[1] == 0:
+        ax.text(.5, .5, "No missing values", ha="center", va="center", transform=ax.transAxes)
+        ax.set_axis_off()
+        return
+    image = ax.imshow(shares.to_numpy(), aspect="auto", cmap="Blues", vmin=0, vmax=1, interpolation="nearest")
+    ax.set_xticks(range(shares.shape[1]), shares.columns, rotation=90)
+    step = max(1, len(shares) // max_labels)
+    labels = shares.index[::step]
+    if isinstance(labels, pd.DatetimeIndex):
+        labels = labels.strftime("%Y-%m-%d")
+    ax.set_yticks(range(0, len(shares), step), labels)
+    ax.set_ylabel(shares.index.name)
+    ax.figure.colorbar(image, ax=ax, label="Share missing")
+
+
+def sample_rows(frame, max_rows=1000, seed=0):
+    """At most ``max_rows`` rows of ``frame``, drawn at random and kept in order."""
+    if len(frame) <= max_rows:
+        return frame
+    rows = np.sort(np.random.default_rng(seed).choice(len(frame), max_rows, replace=False))
+    return frame.iloc[rows]
+
+
+def sampled_matrix(ax, frame, columns=None, max_rows=1000, seed=0):
+    """Row-by-row null matrix of a random sample of ``frame``."""
+    columns = list(columns) if columns is not None else list(frame.columns)
+    sample = sample_rows(frame[columns], max_rows, seed)
+    ax.imshow(~sample.isna().to_numpy(), aspect="auto", cmap="gray_r", vmin=0, vmax=1.6,
+              interpolation="nearest")
+    ax.set_xticks(range(len(columns)), columns, rotation=90)
+    ax.set_ylabel(f"{len(sample):,} sampled rows of {len(frame):,}")
+    ax.set_yticks([])
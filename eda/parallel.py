@@ -0,0 +1,113 @@
+"""Process-pool execution of per-group computations and figure panels.
+
+Per-department statistics and independent chart panels don't depend on each
+other, so with ``workers > 1`` they are farmed out to a pool of worker
+processes and the results are put back together in order.  ``workers`` of 0
+or 1 runs everything in the calling process, which is also the fallback the
+report uses by default.
+
+There is a single pool of ``MAX_WORKERS`` processes for the whole server,
+shut down at exit; ``workers`` limits how many of them a call uses by
+splitting its tasks into that many batches.
+
+Workers are started with ``spawn`` rather than ``fork``: the Streamlit server
+is multi-threaded, and forking a threaded process can deadlock the child.
+Callables sent to the pool must therefore be module-level functions.
+"""
+import atexit
+import contextlib
+import io
+import multiprocessing
+import os
+import sys
+import threading
+import types
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from matplotlib.figure import Figure
+
+MAX_WORKERS = os.cpu_count() or 1
+
+# Streamlit runs each session's script on its own thread; this guards the
+# shared pool and the __main__ swap while a call submits its tasks
+_lock = threading.Lock()
+_executor = None
+
+
+def get_executor():
+    """The shared pool of ``MAX_WORKERS`` processes, created on first use."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=MAX_WORKERS,
+                                            mp_context=multiprocessing.get_context("spawn"))
+            atexit.register(_executor.shutdown)
+        return _executor
+
+
+@contextlib.contextmanager
+def _detached_main():
+    # spawned workers re-import the parent's __main__, which under Streamlit
+    # is the report script itself; everything sent to the pool lives in eda.*,
+    # so workers are started without it
+    main = sys.modules["__main__"]
+    sys.modules["__main__"] = types.ModuleType("__main__")
+    try:
+        yield
+    finally:
+        sys.modules["__main__"] = main
+
+
+def _run_batch(func, batch):
+    return [func(*task) for task in batch]
+
+
+def _map(func, tasks, workers):
+    if not workers or workers <= 1:
+        return _run_batch(func, tasks)
+    # at most ``workers`` batches run at once, each one in order in one process
+    bounds = np.linspace(0, len(tasks), min(workers, max(1, len(tasks))) + 1).astype(int)
+    batches = [tasks[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+    executor = get_executor()
+    # the pool starts its processes as tasks are submitted, so the swap and
+    # the submissions happen under the lock
+    with _lock, _detached_main():
+        futures = [executor.submit(_run_batch, func, batch) for batch in batches]
+    return [result for future in futures for result in future.result()]
+
+
+def map_groups(func, frame, by, workers=None, *args):
+    """Call ``func(group_frame, *args)`` for every group of ``frame[by]``.
+
+    Returns a dict from group label to result, in sorted group order.
+    """
+    groups = [(label, part) for label, part in frame.groupby(by, observed=True, sort=True)]
+    results = _map(func, [(part, *args) for _, part in groups], workers)
+    return {label: result for (label, _), result in zip(groups, results)}
+
+
+def map_chunks(func, frame, n_chunks, workers=None, *args):
+    """Call ``func(chunk_frame, *args)`` for ``n_chunks`` contiguous row chunks
+    of ``frame`` and return the results in order."""
+    bounds = np.linspace(0, len(frame), max(1, n_chunks) + 1).astype(int)
+    return _map(func, [(frame.iloc[start:stop], *args) for start, stop in zip(bounds[:-1], bounds[1:])], workers)
+
+
+def render_png(draw, args=(), kwargs=None, figsize=(7.5, 6), dpi=100, title=None):
+    """Draw one panel with ``draw(ax, *args, **kwargs)`` and return it as PNG bytes."""
+    fig = Figure(figsize=figsize)
+    ax = fig.subplots()
+    draw(ax, *args, **(kwargs or {}))
+    if title is not None:
+        ax.set_title(title)
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=dpi)
+    return buffer.getvalue()
+
+
+def render_panels(panels, workers=None, figsize=(7.5, 6), dpi=100):
+    """Render ``(draw, args, kwargs, title)`` panels to PNG bytes, in order."""
+    return _map(render_png, [(draw, args, kwargs, figsize, dpi, title)
+                             for draw, args, kwargs, title in panels], workers)
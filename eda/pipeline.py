@@ -0,0 +1,344 @@
+"""Named intermediate results of the report, computed on demand.
+
+Each stage is a function registered under the names of the results it
+produces, together with the names of the results it reads.  A
+:class:`Pipeline` resolves a name by computing its inputs first, runs the
+stage once and keeps the result, so report sections only pay for the stages
+they actually ask for and share everything they have in common.
+
+Every stage run is recorded with :func:`eda.instrument.track`.
+
+No stage holds every line item.  Aggregates over line items are streamed
+from the line file, product-grain results are weighted by ``line_counts``,
+and row-level views (``line_sample`` and the results built on it) use a
+bounded random sample of line items.
+
+One pipeline is kept per backend and version of the input files (see
+:func:`get_pipeline`), which makes the memoized results valid across reruns
+and sessions until a file changes.  With ``backend="polars"`` the
+aggregations over line items and products run on :mod:`eda.polars_backend`.
+When a ``state_dir`` with :mod:`eda.incremental` state is given, the cubes,
+line counts and basket rules are read from that state instead of the line
+file, and the product co-purchase index from its ``copurchase`` directory.
+Results written by :mod:`eda.artifacts` are read from the artifact directory
+instead of being computed.
+"""
+import os
+import threading
+
+import pandas as pd
+import streamlit as st
+
+from eda import polars_backend
+from eda.artifacts import ARTIFACT_DIR, artifact_signature, load_result, read_manifest
+from eda.basket import department_rules, incidence_matrix, two_way_rules
+from eda.calendar import purchase_calendar, with_calendar
+from eda.copurchase import INDEX_NAME, index_signature, load_index
+from eda.copurchase import build as build_copurchase
+from eda.data import (_signatures, load_line_counts, load_line_sample, load_order_departments,
+                      load_product_dims, load_summary_cubes, load_table)
+from eda.dtypes import footprint
+from eda.graph import rule_graph as build_rule_graph
+from eda.imputation import impute
+from eda.incremental import (STATE_DIR, department_sets, load_state, order_masks, snapshot_path,
+                             state_signature)
+from eda.incremental import cubes as state_cubes
+from eda.instrument import count_rows, track
+from eda.missingness import profile
+from eda.products import DIMENSIONS, LOG_COLUMNS, add_volume_density, with_product_columns
+from eda.quality import evaluate
+from eda.slicing import build_windows
+
+LINE_COLUMNS = ["PURCHASE_ID", "PRODUCT_ID", "QUANTITY", "PURCHASE_DATE_TIME", "DEPARTMENT_NAME"]
+
+# calendar fields broadcast onto the line items
+LINE_CALENDAR = ["PURCHASE_DATE_TIME", "PURCHASE_DATE", "PURCHASE_TIME", "DAY_OF_WEEK"]
+
+IMPUTED_COLUMNS = DIMENSIONS + ["VOLUME_INCHES", "VOLUME_CM", "DENSITY"]
+
+
+# result name -> (stage function, input names, output names)
+STAGES = {}
+
+
+def stage(outputs, inputs=()):
+    """Register a stage producing ``outputs`` (a name or tuple of names).
+
+    The stage is called with one keyword argument per input name; a stage
+    with several outputs returns a tuple in the same order.
+    """
+    outputs = (outputs,) if isinstance(outputs, str) else tuple(outputs)
+
+    def register(func):
+        for name in outputs:
+            STAGES[name] = (func, tuple(inputs), outputs)
+        return func
+    return register
+
+
+def _read_only(value):
+    # callers may add columns to what they get back; a shallow copy keeps
+    # that from changing the memoized object (copy-on-write protects the data)
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy(deep=False)
+    if isinstance(value, dict):
+        return {key: _read_only(item) for key, item in value.items()}
+    return value
+
+
+class Pipeline:
+    """Memoized evaluation of :data:`STAGES` for one data directory."""
+
+    def __init__(self, data_dir=None, backend="pandas", state_dir=None, approximate=False, artifact_dir=None):
+        self._values = {"data_dir": data_dir, "backend": backend, "state_dir": state_dir,
+                        "approximate": approximate, "workers": None}
+        manifest = read_manifest(artifact_dir) if artifact_dir else None
+        # results are read from the snapshot the manifest pointed to when the
+        # pipeline was created, even if a newer export is swapped in meanwhile
+        self._artifact_dir = snapshot_path(artifact_dir, manifest) if manifest else None
+        self._artifacts = manifest["results"] if manifest else {}
+        self._lock = threading.RLock()
+
+    def get(self, name):
+        """Return the result called ``name``, computing it if needed."""
+        with self._lock:
+            if name not in self._values and name in self._artifacts:
+                with track(name, kind="artifact") as record:
+                    result = load_result(os.path.join(self._artifact_dir, name), self._artifacts[name])
+                    record["rows"] = count_rows(result)
+                self._values[name] = result
+            elif name not in self._values:
+                func, inputs, outputs = STAGES[name]
+                arguments = {key: self.get(key) for key in inputs}
+                # inputs are recorded as stages of their own
+                with track(", ".join(outputs)) as record:
+                    result = func(**arguments)
+                    record["rows"] = count_rows(result)
+                if len(outputs) == 1:
+                    result = (result,)
+                self._values.update(zip(outputs, result))
+            return _read_only(self._values[name])
+
+    def configure(self, **options):
+        """Set options that stages can take as inputs (e.g. ``workers``).
+
+        Options change how results are computed, not what they are, so
+        results that are already memoized are kept.
+        """
+        with self._lock:
+            self._values.update(options)
+
+    def computed(self):
+        """Names of the results computed so far."""
+        return [name for name in self._values if name in STAGES]
+
+
+BACKENDS = ("pandas", "polars")
+
+
+@st.cache_resource(max_entries=4)
+def _pipeline(data_dir, signatures, backend, state_dir, state_sig, approximate, artifact_dir, artifact_sig):
+    return Pipeline(data_dir, backend, state_dir, approximate, artifact_dir)
+
+
+def get_pipeline(data_dir=None, backend="pandas", state_dir=STATE_DIR, approximate=False,
+                 artifact_dir=ARTIFACT_DIR):
+    """The shared pipeline for ``backend`` and the current input files and state.
+
+    With ``approximate`` the department medians used for imputation are read
+    from quantile sketches (see :mod:`eda.sketches`).  Artifacts computed
+    with the same ``approximate`` setting are used as they are, without
+    looking at the data files, until the artifact directory is rewritten.
+    """
+    artifact_sig = artifact_signature(artifact_dir) if artifact_dir else None
+    if artifact_sig is not None and read_manifest(artifact_dir)["options"]["approximate"] == approximate:
+        return _pipeline(data_dir, None, backend, state_dir, None, approximate, artifact_dir, artifact_sig)
+    state_sig = None
+    if state_dir:
+        state_sig = (state_signature(state_dir), index_signature(os.path.join(state_dir, INDEX_NAME)))
+    return _pipeline(data_dir, tuple(_signatures(data_dir)), backend, state_dir, state_sig, approximate, None, None)
+
+
+@stage(("product", "purchase_header"), ("data_dir",))
+def tables(data_dir):
+    # the line file is only ever read in chunks (see eda.streaming)
+    return tuple(load_table(name, data_dir=data_dir) for name in ("product", "purchase_header"))
+
+
+@stage("calendar", ("data_dir",))
+def calendar(data_dir):
+    return purchase_calendar(load_table("purchase_header", data_dir=data_dir))
+
+
+@stage("line_sample", ("data_dir", "calendar", "product_dims"))
+def line_sample(data_dir, calendar, product_dims):
+    # a bounded sample of line items with their purchase timestamp and
+    # department, for previews and row-level charts
+    lines = with_calendar(load_line_sample(data_dir), calendar, LINE_CALENDAR)
+    lines = with_product_columns(lines, product_dims, ["DEPARTMENT_NAME"])
+    lines = lines.astype({"DEPARTMENT_NAME": product_dims["DEPARTMENT_NAME"].dtype})
+    return lines[LINE_COLUMNS + LINE_CALENDAR[1:]]
+
+
+@stage("memory", ("product", "purchase_header", "line_sample"))
+def memory(product, purchase_header, line_sample):
+    return footprint({"product": product, "purchase_header": purchase_header, "line_sample": line_sample})
+
+
+def _line_profile(dims, columns, line_counts, line_sample):
+    # every line item carries its product's values, so the product rows
+    # weighted by their line items give the exact line-level profile; only
+    # the purchase dates are per line and come from the sample
+    bought = line_counts.to_numpy() > 0
+    result = profile(dims[bought], ["DEPARTMENT_NAME"] + columns, weights=line_counts[bought])
+    sample = with_product_columns(line_sample, dims, columns)
+    result["over_time"] = profile(sample, ["DEPARTMENT_NAME"] + columns)["over_time"]
+    return result
+
+
+@stage("missingness", ("product_dims", "line_counts", "line_sample"))
+def missingness(product_dims, line_counts, line_sample):
+    return _line_profile(product_dims, DIMENSIONS, line_counts, line_sample)
+
+
+@stage("product_dims", ("data_dir", "backend"))
+def product_dims(data_dir, backend):
+    if backend == "polars":
+        return polars_backend.product_dims(data_dir)
+    return load_product_dims(data_dir)
+
+
+@stage("quality", ("product", "line_counts"))
+def quality(product, line_counts):
+    # rules are checked once per product, like product_dims
+    product = product.drop_duplicates("PRODUCT_ID").set_index("PRODUCT_ID")
+    return evaluate(product, weights=line_counts.reindex(product.index, fill_value=0))
+
+
+@stage("state", ("state_dir",))
+def state(state_dir):
+    if state_dir is None or state_signature(state_dir) is None:
+        return None
+    return load_state(state_dir)
+
+
+@stage("cubes", ("data_dir", "backend", "state"))
+def cubes(data_dir, backend, state):
+    if state is not None:
+        return state_cubes(state)
+    if backend == "polars":
+        return polars_backend.summary_cubes(data_dir)
+    return load_summary_cubes(data_dir)
+
+
+@stage("line_counts", ("data_dir", "backend", "state", "product_dims"))
+def line_counts(data_dir, backend, state, product_dims):
+    if state is not None:
+        counts = state["line_counts"]
+    elif backend == "polars":
+        counts = polars_backend.line_counts(data_dir)
+    else:
+        counts = load_line_counts(data_dir)
+    # weighting each product by its number of line items reproduces the
+    # line-level distributions from the product table
+    return counts.reindex(product_dims.index, fill_value=0)
+
+
+def _fill_values(columns, data_dir, backend, state, approximate):
+    # with incremental state the medians come from its line counts; Polars'
+    # medians are exact, so approximate ones are computed from the sketches
+    if backend == "polars" and state is None and not approximate:
+        return polars_backend.group_fill_values(columns, data_dir)
+    return None
+
+
+def _strategy(approximate):
+    return "approximate_median" if approximate else "median"
+
+
+@stage(("imputed_dims", "imputed_cells"), ("data_dir", "backend", "state", "approximate", "product_dims",
+                                           "line_counts", "workers"))
+def imputed_dims(data_dir, backend, state, approximate, product_dims, line_counts, workers):
+    dims, cells = impute(product_dims, DIMENSIONS, strategy=_strategy(approximate), weights=line_counts,
+                         workers=workers,
+                         fill_values=_fill_values(DIMENSIONS, data_dir, backend, state, approximate))
+    return add_volume_density(dims), cells
+
+
+@stage("imputed_sample", ("line_sample", "imputed_dims"))
+def imputed_sample(line_sample, imputed_dims):
+    return with_product_columns(line_sample, imputed_dims, IMPUTED_COLUMNS)
+
+
+@stage("imputed_missingness", ("imputed_dims", "line_counts", "line_sample"))
+def imputed_missingness(imputed_dims, line_counts, line_sample):
+    return _line_profile(imputed_dims, IMPUTED_COLUMNS, line_counts, line_sample)
+
+
+@stage(("log_dims", "log_imputed_cells"), ("data_dir", "backend", "state", "approximate", "product_dims",
+                                           "line_counts", "workers"))
+def log_dims(data_dir, backend, state, approximate, product_dims, line_counts, workers):
+    return impute(product_dims, list(LOG_COLUMNS), strategy=_strategy(approximate), weights=line_counts,
+                  workers=workers,
+                  fill_values=_fill_values(list(LOG_COLUMNS), data_dir, backend, state, approximate))
+
+
+@stage("log_sample", ("line_sample", "log_dims"))
+def log_sample(line_sample, log_dims):
+    return with_product_columns(line_sample, log_dims, list(LOG_COLUMNS))
+
+
+@stage("log_missingness", ("log_dims", "line_counts", "line_sample"))
+def log_missingness(log_dims, line_counts, line_sample):
+    return _line_profile(log_dims, list(LOG_COLUMNS), line_counts, line_sample)
+
+
+@stage(("frequent_itemsets", "rules"), ("data_dir", "backend", "state"))
+def basket_rules(data_dir, backend, state):
+    if state is not None:
+        # one row per distinct department set, weighted by its order count
+        basket, departments, weights = department_sets(state)
+    else:
+        if backend == "polars":
+            pairs = polars_backend.order_departments(data_dir)
+        else:
+            pairs = load_order_departments(data_dir)
+        basket, _, departments = incidence_matrix(pairs, item="DEPARTMENT_NAME")
+        basket, weights = basket.toarray(), None
+    return department_rules(basket, departments, weights)
+
+
+@stage("two_way", ("rules",))
+def two_way(rules):
+    return two_way_rules(rules)
+
+
+@stage("windows", ("data_dir", "backend", "state", "cubes"))
+def windows(data_dir, backend, state, cubes):
+    # with incremental state, the cube and the orders both come from the
+    # state and the data files aren't read
+    if state is not None:
+        return build_windows(cubes["department_time"], state["orders"], state["departments"])
+    if backend == "polars":
+        pairs = polars_backend.order_departments(data_dir)
+    else:
+        pairs = load_order_departments(data_dir)
+    purchase_header = load_table("purchase_header", data_dir=data_dir)
+    return build_windows(cubes["department_time"], *order_masks(pairs, purchase_header))
+
+
+@stage("rule_graph", ("two_way",))
+def rule_graph(two_way):
+    # the report's network: rules with a confidence of .95 or more, laid out
+    # once per rule set
+    return build_rule_graph(two_way, min_weight=.95)
+
+
+@stage("copurchase", ("data_dir", "state_dir"))
+def copurchase(data_dir, state_dir):
+    index_dir = os.path.join(state_dir, INDEX_NAME) if state_dir else None
+    if index_dir and index_signature(index_dir) is not None:
+        return load_index(index_dir)
+    # without a persisted index, pairs are counted from the line file chunk
+    # by chunk like the other line-item aggregates
+    return build_copurchase(data_dir)
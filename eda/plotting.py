@@ -0,0 +1,236 @@
+"""Chart helpers that draw from precomputed summaries.
+
+Histograms are binned with ``np.histogram`` and box plots are drawn from
+quartiles and whiskers computed up front, so matplotlib only ever receives
+one outline per histogram and a handful of numbers per box.  Both accept
+``weights``, which lets the report plot the product table weighted by line
+items instead of passing every line item to seaborn.
+
+Every function draws onto an ``ax`` it is given and only takes picklable
+arguments, so panels can also be rendered on worker processes with
+:func:`eda.parallel.render_panels`.
+"""
+import numpy as np
+import pandas as pd
+
+from eda.parallel import map_chunks, map_groups
+from eda.sketches import digest_box_stats, group_digests, merge_digests
+from eda.stats import group_quantile
+
+
+def histogram(ax, values, bins=10, weights=None, color=None, alpha=0.75, label=None, xlabel=None):
+    """Draw a histogram of ``values`` and return ``(counts, edges)``.
+
+    ``bins`` is anything ``np.histogram`` accepts (a bin count or edges).
+    Missing values are ignored.
+    """
+    values = np.asarray(values, dtype="float64")
+    keep = np.isfinite(values)
+    if weights is not None:
+        weights = np.asarray(weights, dtype="float64")[keep]
+    counts, edges = np.histogram(values[keep], bins=bins, weights=weights)
+    ax.stairs(counts, edges, fill=True, color=color, alpha=alpha, label=label)
+    ax.set_ylabel("Count")
+    if xlabel is not None:
+        ax.set_xlabel(xlabel)
+    return counts, edges
+
+
+def bars(ax, labels, heights, xlabel=None, ylabel=None):
+    """Vertical bar chart of ``heights`` with one bar per label."""
+    ax.bar(range(len(labels)), heights)
+    ax.set_xticks(range(len(labels)), labels, rotation=90)
+    if xlabel is not None:
+        ax.set_xlabel(xlabel)
+    if ylabel is not None:
+        ax.set_ylabel(ylabel)
+
+
+def _codes(groups):
+    groups = pd.Series(groups)
+    if not isinstance(groups.dtype, pd.CategoricalDtype):
+        groups = groups.astype("category")
+    return groups.cat.codes.to_numpy(), groups.cat.categories
+
+
+def _partition_box_stats(part, whis):
+    _, stats = box_stats(part["value"], part["group"], part["weight"], whis)
+    return stats[part["group"].cat.codes.iloc[0]]
+
+
+def _partition_digests(part):
+    return group_digests(part["value"], part["group"], part["weight"])
+
+
+def box_stats(values, groups, weights=None, whis=1.5, workers=None, approximate=False):
+    """Tukey box-plot statistics per group, in the format of ``Axes.bxp``.
+
+    Whiskers reach the most extreme values within ``whis`` IQRs of the box,
+    as in seaborn and matplotlib.  Fliers are returned once per distinct
+    value since repeated points would be drawn on top of each other.
+    Returns the group labels and one stats dict per group (``None`` for
+    groups without values).  With ``workers``, each group is computed on a
+    process pool.
+
+    With ``approximate`` the statistics come from :mod:`eda.sketches`
+    instead of exact order statistics; with ``workers`` the sketches are
+    built for one chunk of rows per worker and merged.
+    """
+    values = np.asarray(values, dtype="float64")
+    codes, labels = _codes(groups)
+    n = len(labels)
+    weights = np.ones(len(values)) if weights is None else np.asarray(weights, dtype="float64")
+    if approximate:
+        frame = pd.DataFrame({"value": values, "weight": weights,
+                              "group": pd.Categorical.from_codes(codes, labels)})
+        if workers and workers > 1:
+            sketch = merge_digests(map_chunks(_partition_digests, frame, workers, workers))
+        else:
+            sketch = _partition_digests(frame)
+        by_label = dict(zip(*digest_box_stats(sketch, whis)))
+        return list(labels), [by_label.get(label) for label in labels]
+    if workers and workers > 1:
+        frame = pd.DataFrame({"value": values, "weight": weights,
+                              "group": pd.Categorical.from_codes(codes, labels)})
+        by_group = map_groups(_partition_box_stats, frame, "group", workers, whis)
+        return list(labels), [by_group.get(label) for label in labels]
+    q1, median, q3 = (group_quantile(values, codes, weights, n, q) for q in (0.25, 0.5, 0.75))
+    low_fence = q1 - whis * (q3 - q1)
+    high_fence = q3 + whis * (q3 - q1)
+
+    keep = ~np.isnan(values) & (codes >= 0) & (weights > 0)
+    frame = pd.DataFrame({"code": codes[keep], "value": values[keep]})
+    inside = (frame["value"] >= low_fence[frame["code"]]) & (frame["value"] <= high_fence[frame["code"]])
+    whiskers = frame[inside.to_numpy()].groupby("code")["value"].agg(["min", "max"])
+    fliers = frame[~inside.to_numpy()].drop_duplicates().groupby("code")["value"].apply(np.asarray)
+
+    stats = []
+    for code in range(n):
+        if np.isnan(median[code]):
+            stats.append(None)
+            continue
+        stats.append({
+            "label": labels[code],
+            "med": median[code],
+            "q1": q1[code],
+            "q3": q3[code],
+            "whislo": whiskers["min"].get(code, q1[code]),
+            "whishi": whiskers["max"].get(code, q3[code]),
+            "fliers": fliers.get(code, np.empty(0)),
+        })
+    return list(labels), stats
+
+
+def boxplot(ax, values, groups, weights=None, color="C0", xlabel=None, ylabel=None, workers=None,
+            approximate=False):
+    """Horizontal box plot of ``values`` by ``groups``, one row per group."""
+    labels, stats = box_stats(values, groups, weights, workers=workers, approximate=approximate)
+    positions = [i for i, s in enumerate(stats) if s is not None]
+    ax.bxp(
+        [s for s in stats if s is not None],
+        positions=positions,
+        vert=False,
+        widths=0.8,
+        patch_artist=True,
+        boxprops={"facecolor": color},
+        medianprops={"color": "0.2"},
+        flierprops={"marker": "o", "markerfacecolor": "none", "markeredgecolor": "0.2"},
+    )
+    ax.set_yticks(range(len(labels)), labels)
+    ax.set_ylim(len(labels) - 0.5, -0.5)
+    if xlabel is not None:
+        ax.set_xlabel(xlabel)
+    if ylabel is not None:
+        ax.set_ylabel(ylabel)
+    return stats
+
+
+def fit_line(x, y, weights=None):
+    """Closed-form (weighted) least-squares fit of ``y = intercept + slope * x``.
+
+    Returns ``(intercept, slope, stderr)`` where ``stderr(x)`` gives the
+    standard error of the fitted mean at ``x``.  Rows with a missing ``x`` or
+    ``y`` are ignored; weights count as repeated observations.
+    """
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    w = np.ones(len(x)) if weights is None else np.asarray(weights, dtype="float64")
+    keep = np.isfinite(x) & np.isfinite(y) & (w > 0)
+    x, y, w = x[keep], y[keep], w[keep]
+    n = w.sum()
+    x_mean = np.dot(w, x) / n
+    y_mean = np.dot(w, y) / n
+    sxx = np.dot(w, (x - x_mean) ** 2)
+    slope = np.dot(w, (x - x_mean) * (y - y_mean)) / sxx
+    intercept = y_mean - slope * x_mean
+    residual_var = np.dot(w, (y - intercept - slope * x) ** 2) / max(n - 2, 1)
+
+    def stderr(at):
+        return np.sqrt(residual_var * (1 / n + (np.asarray(at) - x_mean) ** 2 / sxx))
+
+    return intercept, slope, stderr
+
+
+def stratified_sample(x, weights=None, max_points=5000, strata=20, seed=0):
+    """Indices of at most ``max_points`` rows, drawn in proportion to
+    ``weights`` within quantile strata of ``x`` so the tails stay represented."""
+    x = np.asarray(x, dtype="float64")
+    w = np.ones(len(x)) if weights is None else np.asarray(weights, dtype="float64")
+    candidates = np.flatnonzero(np.isfinite(x) & (w > 0))
+    if w[candidates].sum() <= max_points or len(candidates) <= max_points:
+        return candidates
+    stratum = pd.qcut(x[candidates], strata, labels=False, duplicates="drop")
+    # weighted sampling without replacement: keep the largest u ** (1 / w)
+    keys = np.random.default_rng(seed).random(len(candidates)) ** (1 / w[candidates])
+    frame = pd.DataFrame({"stratum": stratum, "key": keys, "weight": w[candidates]})
+    quota = (frame.groupby("stratum")["weight"].transform("sum") / w[candidates].sum() * max_points)
+    rank = frame.groupby("stratum")["key"].rank(ascending=False, method="first")
+    chosen = np.flatnonzero((rank <= np.ceil(quota)).to_numpy())
+    # rounding quotas up can overshoot by a few rows per stratum
+    chosen = chosen[np.argsort(-keys[chosen], kind="stable")[:max_points]]
+    return candidates[np.sort(chosen)]
+
+
+def regression(ax, x, y, weights=None, mode="hexbin", max_points=5000, xlim=None, ylim=None,
+               gridsize=50, color="C0", xlabel=None, ylabel=None, grid=False):
+    """Scatter-with-regression panel that scales to any number of points.
+
+    The line and its 95% band come from the closed-form fit over all rows
+    (no bootstrapping).  The points are shown either as a ``hexbin`` density
+    over the visible window or as a stratified ``sample`` of at most
+    ``max_points`` rows.  The panel notes how many observations it stands for.
+    """
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    w = np.ones(len(x)) if weights is None else np.asarray(weights, dtype="float64")
+    keep = np.isfinite(x) & np.isfinite(y) & (w > 0)
+    x, y, w = x[keep], y[keep], w[keep]
+    xlim = xlim if xlim is not None else (x.min(), x.max())
+    ylim = ylim if ylim is not None else (y.min(), y.max())
+
+    if mode == "hexbin":
+        ax.hexbin(x, y, C=w, reduce_C_function=np.sum, gridsize=gridsize, mincnt=1,
+                  extent=(*xlim, *ylim), cmap="Blues", bins="log")
+        shown = ""
+    else:
+        sample = stratified_sample(x, w, max_points)
+        ax.scatter(x[sample], y[sample], s=8, alpha=0.5, color=color, linewidths=0)
+        shown = f", {len(sample):,} shown"
+
+    intercept, slope, stderr = fit_line(x, y, w)
+    line_x = np.linspace(*xlim, 100)
+    fitted = intercept + slope * line_x
+    band = 1.96 * stderr(line_x)
+    ax.plot(line_x, fitted, color=color, linewidth=2)
+    ax.fill_between(line_x, fitted - band, fitted + band, color=color, alpha=0.15, linewidth=0)
+    ax.text(0.02, 0.98, f"n = {w.sum():,.0f}{shown}\nslope = {slope:.3g}", transform=ax.transAxes,
+            va="top", fontsize=9)
+    ax.set_xlim(*xlim)
+    ax.set_ylim(*ylim)
+    if xlabel is not None:
+        ax.set_xlabel(xlabel)
+    if ylabel is not None:
+        ax.set_ylabel(ylabel)
+    if grid:
+        ax.grid(True)
+    return intercept, slope
@@ -0,0 +1,215 @@
+"""Polars implementation of the report's data pipeline.
+
+Every table is scanned lazily, so joins, filters and projections are planned
+as one query and run multi-threaded by Polars; results are converted to
+pandas only when they are returned, in the same shapes and types as the
+pandas functions they mirror.  The pipeline uses these functions when it is
+created with ``backend="polars"``.
+
+    python -m eda.polars_backend [DATA_DIR]
+
+compares the aggregates of both backends on the files in ``DATA_DIR`` and
+exits non-zero if they differ.
+"""
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+import polars as pl
+
+from eda.data import DATA_DIR, read_table, source_path
+from eda.imputation import group_fill_values as pandas_fill_values
+from eda.products import CUBIC_INCH_TO_CM, DIMENSIONS, LOG_COLUMNS, build_product_dims
+from eda.quality import blanked
+from eda.schema import SCHEMAS
+from eda.streaming import aggregate_lines, iter_chunks
+
+# strftime for Polars, which writes fractional seconds as %.f
+TIMESTAMP_FORMAT = "%m/%d/%Y %H:%M:%S%.f"
+
+_TYPES = {
+    "int32": pl.Int32,
+    "float32": pl.Float32,
+    # categories are assigned on the pandas side, where they are sorted
+    "category": pl.Utf8,
+    "datetime64[ns]": pl.Utf8,
+}
+
+
+def scan_table(name, data_dir=None):
+    """Lazy frame of one input table with the types of :mod:`eda.schema`."""
+    path = source_path(name, data_dir)
+    schema = SCHEMAS[name]
+    if path.endswith(".parquet"):
+        frame = pl.scan_parquet(path)
+    else:
+        frame = pl.scan_csv(path, schema_overrides={c: _TYPES[t] for c, t in schema.items()})
+    casts = []
+    for column, dtype in schema.items():
+        if dtype.startswith("datetime"):
+            if not path.endswith(".parquet"):
+                casts.append(pl.col(column).str.strptime(pl.Datetime("ns"), TIMESTAMP_FORMAT))
+        elif dtype == "category":
+            casts.append(pl.col(column).cast(pl.Utf8))
+    return frame.with_columns(casts) if casts else frame
+
+
+def scan_lines(data_dir=None):
+    """Line items inner-joined to their purchase header and product."""
+    product = scan_table("product", data_dir).unique("PRODUCT_ID", keep="first", maintain_order=True)
+    return (
+        scan_table("purchase_lines", data_dir)
+        .join(scan_table("purchase_header", data_dir), on="PURCHASE_ID")
+        .join(product, on="PRODUCT_ID")
+    )
+
+
+def _categories(frame, column="DEPARTMENT_NAME"):
+    frame[column] = frame[column].astype("category")
+    return frame
+
+
+def summary_cubes(data_dir=None):
+    """Same as the ``cubes`` of :func:`eda.streaming.aggregate_lines`."""
+    lines = scan_lines(data_dir)
+    timestamps = pl.col("PURCHASE_DATE_TIME")
+    department_time = (
+        lines.filter(pl.col("DEPARTMENT_NAME").is_not_null())
+        .group_by(
+            "DEPARTMENT_NAME",
+            timestamps.dt.truncate("1d").alias("PURCHASE_DATE"),
+            timestamps.dt.hour().cast(pl.Int8).alias("HOUR"),
+            (timestamps.dt.weekday() - 1).cast(pl.Int8).alias("DAY_OF_WEEK"),
+        )
+        .agg(
+            # summed in float64 like the pandas cubes, not in the column's float32
+            pl.col("QUANTITY").cast(pl.Float64).sum(),
+            pl.col("QUANTITY").count().cast(pl.Int64).alias("LINES"),
+            pl.col("PURCHASE_ID").n_unique().cast(pl.Int64).alias("ORDERS"),
+        )
+        .sort("DEPARTMENT_NAME", "PURCHASE_DATE", "HOUR", "DAY_OF_WEEK")
+    )
+
+    def size_distribution(key, name):
+        return (
+            lines.group_by(key).agg(pl.col("QUANTITY").count().cast(pl.Int64).alias("LINES"))
+            .group_by("LINES").agg(pl.len().cast(pl.Int64).alias(name))
+            .sort("LINES")
+        )
+
+    department_time, per_order, per_product = pl.collect_all([
+        department_time,
+        size_distribution("PURCHASE_ID", "ORDERS"),
+        size_distribution("PRODUCT_ID", "PRODUCTS"),
+    ])
+    return {
+        "department_time": _categories(department_time.to_pandas()),
+        "lines_per_order": per_order.to_pandas(),
+        "lines_per_product": per_product.to_pandas(),
+    }
+
+
+def line_counts(data_dir=None):
+    """Number of line items per ``PRODUCT_ID`` (products that were bought)."""
+    counts = scan_lines(data_dir).group_by("PRODUCT_ID").agg(pl.len().alias("count")).collect()
+    return counts.to_pandas().set_index("PRODUCT_ID")["count"].astype("int64")
+
+
+def order_departments(data_dir=None):
+    """Distinct ``(PURCHASE_ID, DEPARTMENT_NAME)`` pairs of the line items."""
+    pairs = (
+        scan_lines(data_dir).select("PURCHASE_ID", "DEPARTMENT_NAME")
+        .drop_nulls().unique().sort("PURCHASE_ID", "DEPARTMENT_NAME")
+        .collect()
+    )
+    return _categories(pairs.to_pandas())
+
+
+def _product_dims(data_dir=None):
+    product = scan_table("product", data_dir).unique("PRODUCT_ID", keep="first", maintain_order=True).collect()
+    # the "blank" rules of eda.quality (which may need department quantiles)
+    # are evaluated on the catalog in pandas, so both backends blank the same
+    # products whatever the rules are
+    invalid = pl.Series("BLANKED", blanked(product.to_pandas()))
+    volume = pl.col("HEIGHT_INCHES") * pl.col("WIDTH_INCHES") * pl.col("DEPTH_INCHES")
+    return (
+        product.with_columns(invalid).lazy()
+        .with_columns([pl.when(pl.col("BLANKED")).then(None).otherwise(pl.col(c)).alias(c) for c in DIMENSIONS])
+        .drop("BLANKED")
+        .with_columns(volume.alias("VOLUME_INCHES"))
+        .with_columns((pl.col("VOLUME_INCHES") * pl.lit(CUBIC_INCH_TO_CM, pl.Float32)).alias("VOLUME_CM"))
+        .with_columns((pl.col("WEIGHT_GRAMS") / pl.col("VOLUME_CM")).alias("DENSITY"))
+        .with_columns([pl.col(c).log().cast(pl.Float32).alias(log) for log, c in LOG_COLUMNS.items()])
+    )
+
+
+def product_dims(data_dir=None):
+    """Same as :func:`eda.products.build_product_dims` of the product table."""
+    dims = _product_dims(data_dir).collect().to_pandas()
+    return _categories(dims).set_index("PRODUCT_ID")
+
+
+def group_fill_values(columns, data_dir=None, by="DEPARTMENT_NAME"):
+    """Department medians of product ``columns`` over the line items.
+
+    Matches :func:`eda.imputation.group_fill_values` of the product table
+    weighted by line counts, with one row per department in the catalog.
+    """
+    medians = (
+        scan_table("purchase_lines", data_dir).select("PURCHASE_ID", "PRODUCT_ID")
+        .join(scan_table("purchase_header", data_dir).select("PURCHASE_ID"), on="PURCHASE_ID")
+        .join(_product_dims(data_dir).select(["PRODUCT_ID", by] + list(columns)), on="PRODUCT_ID")
+        .group_by(by).agg([pl.col(c).cast(pl.Float64).median() for c in columns])
+        .collect()
+        .to_pandas()
+        .set_index(by)
+    )
+    departments = pd.Index(np.sort(scan_table("product", data_dir).select(by).drop_nulls().unique()
+                                   .collect()[by].to_numpy()), name=by)
+    return medians.reindex(departments)
+
+
+def compare(data_dir=None):
+    """Differences between the pandas and Polars aggregates, by name."""
+    product = read_table(source_path("product", data_dir), "product")
+    header = read_table(source_path("purchase_header", data_dir), "purchase_header")
+    aggregates = aggregate_lines(iter_chunks(source_path("purchase_lines", data_dir)), header, product)
+    dims = build_product_dims(product)
+    counts = aggregates["line_counts"].reindex(dims.index, fill_value=0)
+    cubes = summary_cubes(data_dir)
+
+    pairs = {
+        **{name: (cube, cubes[name]) for name, cube in aggregates["cubes"].items()},
+        "line_counts": (counts[counts > 0].sort_index(), line_counts(data_dir).sort_index()),
+        "order_departments": (aggregates["order_departments"].sort_values(["PURCHASE_ID", "DEPARTMENT_NAME"])
+                              .reset_index(drop=True), order_departments(data_dir)),
+        "product_dims": (dims, product_dims(data_dir)),
+        "fill_values": (pandas_fill_values(dims, DIMENSIONS, weights=counts),
+                        group_fill_values(DIMENSIONS, data_dir)),
+    }
+    differences = {}
+    for name, (expected, actual) in pairs.items():
+        try:
+            check = pd.testing.assert_series_equal if isinstance(expected, pd.Series) else pd.testing.assert_frame_equal
+            # types must match; float32 logs and float64 sums in a different
+            # order can still differ in the last bits between engines
+            check(expected, actual, check_names=False, check_categorical=False, rtol=1e-5)
+        except AssertionError as error:
+            differences[name] = str(error)
+    return differences
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the pandas and Polars backends.")
+    parser.add_argument("data_dir", nargs="?", default=DATA_DIR)
+    args = parser.parse_args(argv)
+    differences = compare(args.data_dir)
+    for name, message in differences.items():
+        print(f"{name}:\n{message}\n")
+    print("backends differ" if differences else "backends agree")
+    return 1 if differences else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""Product-grain dimension table.
+
+Dimensions, volume, density and their logs only depend on the product, so
+they are computed once per ``PRODUCT_ID`` here rather than once per line
+item.  Line items pick up the columns they need through
+:func:`with_product_columns` when a chart or table actually uses them.
+"""
+import numpy as np
+
+DIMENSIONS = ["HEIGHT_INCHES", "WIDTH_INCHES", "DEPTH_INCHES", "WEIGHT_GRAMS"]
+
+CUBIC_INCH_TO_CM = 16.387
+
+# log feature -> the column it is taken of
+LOG_COLUMNS = {
+    "LOG_HEIGHT": "HEIGHT_INCHES",
+    "LOG_WIDTH": "WIDTH_INCHES",
+    "LOG_DEPTH": "DEPTH_INCHES",
+    "LOG_WEIGHT": "WEIGHT_GRAMS",
+    "LOG_VOLUME": "VOLUME_INCHES",
+    "LOG_DENSITY": "DENSITY",
+}
+
+
+def clean_dimensions(product):
+    """Blank out every dimension of products that fail a ``"blank"`` rule of
+    :mod:`eda.quality` (by default, any non-positive dimension)."""
+    # eda.quality computes its features with this module
+    from eda.quality import blanked
+
+    product = product.copy(deep=False)
+    product.loc[blanked(product), DIMENSIONS] = np.nan
+    return product
+
+
+def add_volume_density(frame):
+    """Add ``VOLUME_INCHES``, ``VOLUME_CM`` and ``DENSITY`` from the dimensions."""
+    frame = frame.copy(deep=False)
+    frame["VOLUME_INCHES"] = frame["HEIGHT_INCHES"] * frame["WIDTH_INCHES"] * frame["DEPTH_INCHES"]
+    frame["VOLUME_CM"] = frame["VOLUME_INCHES"] * CUBIC_INCH_TO_CM
+    frame["DENSITY"] = frame["WEIGHT_GRAMS"] / frame["VOLUME_CM"]
+    return frame
+
+
+def add_logs(frame):
+    """Add the ``LOG_*`` columns in :data:`LOG_COLUMNS`."""
+    frame = frame.copy(deep=False)
+    for log_column, column in LOG_COLUMNS.items():
+        frame[log_column] = np.log(frame[column])
+    return frame
+
+
+def build_product_dims(product):
+    """One row per ``PRODUCT_ID`` with cleaned dimensions and derived metrics.
+
+    The catalog export contains some exact duplicate rows; they are dropped so
+    the result can be indexed by ``PRODUCT_ID``.
+    """
+    product = product.drop_duplicates("PRODUCT_ID")
+    return add_logs(add_volume_density(clean_dimensions(product))).set_index("PRODUCT_ID")
+
+
+def with_product_columns(lines, product_dims, columns):
+    """Return ``lines`` with product-grain ``columns`` broadcast onto each row."""
+    rows = product_dims.index.get_indexer(lines["PRODUCT_ID"])
+    lines = lines.copy(deep=False)
+    for column in columns:
+        lines[column] = product_dims[column].to_numpy()[rows]
+    return lines
@@ -0,0 +1,156 @@
+"""Data-quality rules for the product catalog.
+
+Checks are declared in :data:`RULES` and evaluated over the product table
+with array operations only, one column per rule, so a catalog refresh of
+millions of SKUs costs a few vectorized passes and one sort per outlier
+rule (for the per-department quantiles), never a sort of the line items.
+
+``positive``
+    the value is missing or greater than 0.
+``range``
+    the value is missing or within ``[lower, upper]``.
+``iqr_fence``
+    the value is within ``k`` interquartile ranges of its department's
+    quartiles.
+``robust_z``
+    the value's robust z-score within its department, ``0.6745 (x - median)
+    / MAD``, is at most ``threshold`` in absolute value.
+
+Outlier rules run on the ``LOG_*`` columns, where the skewed dimensions are
+roughly symmetric, and only over products that pass every rule with
+``"blank"`` action: those have all of their dimensions blanked in
+``product_dims`` (see :func:`eda.products.clean_dimensions`), while the
+other rules only report.
+"""
+import numpy as np
+import pandas as pd
+
+from eda.products import DIMENSIONS, add_logs, add_volume_density
+from eda.stats import group_quantile
+
+# plausible product densities in g/cm^3; foam packaging is about .02, and
+# nothing on a grocery shelf is much denser than table salt (2.2)
+DENSITY_RANGE = (.01, 5.0)
+
+# name -> (check, column, parameters, action)
+RULES = {
+    **{f"{column.split('_')[0].lower()}_positive": ("positive", column, {}, "blank") for column in DIMENSIONS},
+    **{f"{column.split('_')[1].lower()}_outlier": ("iqr_fence", column, {"k": 3.0}, "flag")
+       for column in ("LOG_HEIGHT", "LOG_WIDTH", "LOG_DEPTH", "LOG_WEIGHT")},
+    "volume_outlier": ("robust_z", "LOG_VOLUME", {"threshold": 5.0}, "flag"),
+    "density_plausible": ("range", "DENSITY", {"lower": DENSITY_RANGE[0], "upper": DENSITY_RANGE[1]}, "flag"),
+}
+
+
+def _positive(values, codes, n_groups):
+    return values <= 0, 0.0, np.inf
+
+
+def _range(values, codes, n_groups, lower=-np.inf, upper=np.inf):
+    return (values < lower) | (values > upper), lower, upper
+
+
+def _iqr_fence(values, codes, n_groups, k=1.5):
+    weights = np.ones(len(values))
+    q1 = group_quantile(values, codes, weights, n_groups, .25)
+    q3 = group_quantile(values, codes, weights, n_groups, .75)
+    lower, upper = q1 - k * (q3 - q1), q3 + k * (q3 - q1)
+    return _outside(values, codes, lower, upper), lower, upper
+
+
+def _robust_z(values, codes, n_groups, threshold=3.5):
+    weights = np.ones(len(values))
+    median = group_quantile(values, codes, weights, n_groups, .5)
+    deviation = np.abs(values - np.where(codes >= 0, median[codes], np.nan))
+    mad = group_quantile(deviation, codes, weights, n_groups, .5)
+    lower, upper = median - threshold * mad / .6745, median + threshold * mad / .6745
+    return _outside(values, codes, lower, upper), lower, upper
+
+
+def _outside(values, codes, lower, upper):
+    grouped = codes >= 0
+    row_lower = np.where(grouped, lower[codes], np.nan)
+    row_upper = np.where(grouped, upper[codes], np.nan)
+    return (values < row_lower) | (values > row_upper)
+
+
+CHECKS = {"positive": _positive, "range": _range, "iqr_fence": _iqr_fence, "robust_z": _robust_z}
+
+
+def _features(product):
+    # the derived columns, with logs only of positive values
+    frame = add_volume_density(product)
+    for column in DIMENSIONS + ["VOLUME_INCHES", "DENSITY"]:
+        frame[column] = frame[column].where(frame[column] > 0)
+    return add_logs(frame)
+
+
+def blanked(product, rules=RULES, by="DEPARTMENT_NAME"):
+    """Rows of ``product`` that fail a rule with ``"blank"`` action."""
+    codes, labels = pd.factorize(product[by], sort=True)
+    invalid = np.zeros(len(product), dtype=bool)
+    for check, column, parameters, action in rules.values():
+        if action == "blank":
+            values = product[column].to_numpy(dtype="float64")
+            invalid |= CHECKS[check](values, codes, len(labels), **parameters)[0]
+    return invalid
+
+
+def evaluate(product, rules=RULES, by="DEPARTMENT_NAME", weights=None):
+    """Evaluate ``rules`` on ``product`` (one row per product).
+
+    ``weights``, e.g. line items per product, adds how many of them each
+    rule affects.  Returns a dict of frames:
+
+    ``flags``
+        one boolean column per rule, True where the row fails it, aligned
+        with ``product``.
+    ``summary``
+        per rule its check, column and action, the ``products`` failing it,
+        their ``share`` of products with a value, and ``lines`` when
+        weighted.
+    ``bounds``
+        the accepted ``lower`` and ``upper`` value per rule and department
+        (in the rule column's units; logs for the outlier rules).
+    """
+    invalid = blanked(product, rules, by)
+    features = _features(product)
+    codes, labels = pd.factorize(product[by], sort=True)
+    weights = None if weights is None else np.asarray(weights, dtype="float64")
+
+    flags, summary, bounds = {}, [], []
+    for name, (check, column, parameters, action) in rules.items():
+        source = product if action == "blank" else features
+        values = source[column].to_numpy(dtype="float64")
+        if action != "blank":
+            # outliers are only looked for among products with usable dimensions
+            values = np.where(invalid, np.nan, values)
+        failed, lower, upper = CHECKS[check](values, codes, len(labels), **parameters)
+        flags[name] = failed
+        summary.append({
+            "rule": name, "check": check, "column": column, "action": action,
+            "products": int(failed.sum()),
+            "share": failed.sum() / max((~np.isnan(values)).sum(), 1),
+            **({} if weights is None else {"lines": weights[failed].sum()}),
+        })
+        bounds.append(pd.DataFrame({
+            "rule": name,
+            by: labels,
+            "lower": np.broadcast_to(lower, len(labels)),
+            "upper": np.broadcast_to(upper, len(labels)),
+        }))
+    return {
+        "flags": pd.DataFrame(flags, index=product.index),
+        "summary": pd.DataFrame(summary),
+        "bounds": pd.concat(bounds, ignore_index=True),
+    }
+
+
+def flagged(product, result, rule, n=5):
+    """The first ``n`` rows of ``product`` that fail ``rule``, with the
+    rule's column added when it is a derived one."""
+    rows = product[result["flags"][rule].to_numpy()].head(n)
+    column = RULES[rule][1] if rule in RULES else None
+    if column is not None and column not in rows:
+        rows = rows.assign(**{column: _features(rows)[column]})
+    return rows
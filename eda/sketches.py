@@ -0,0 +1,148 @@
+"""Mergeable quantile sketches per group.
+
+A sketch keeps, for every group, a t-digest: the group's values sorted and
+merged into weighted centroids whose size in rank is bounded by the ``k1``
+scale function, small at the tails and widest at the median.  With the
+default compression of 200 a group is summarized by at most about 100
+centroids (a few kilobytes per column for all departments), and a quantile
+read from it is off by at most about ``pi / compression`` (1.6%) in rank at
+the median and much less towards the tails.  The exact minimum and maximum
+are kept alongside.
+
+Sketches of different chunks or partitions of the same data merge into the
+sketch of the whole with :func:`merge_digests`, so they can be built where
+the data is and combined afterwards.  Every function is vectorized over
+groups; a sketch is a dict of two small frames:
+
+``centroids``
+    ``GROUP`` (categorical), ``MEAN`` and ``WEIGHT``, sorted by group and mean.
+``extremes``
+    ``MIN`` and ``MAX`` per group label.
+"""
+import numpy as np
+import pandas as pd
+
+COMPRESSION = 200
+
+
+def _codes(groups):
+    groups = pd.Series(groups)
+    if not isinstance(groups.dtype, pd.CategoricalDtype):
+        groups = groups.astype("category")
+    return groups.cat.codes.to_numpy(), groups.cat.categories
+
+
+def _build(codes, values, weights, labels, compression, minimum=None, maximum=None):
+    keep = ~np.isnan(values) & (codes >= 0) & (weights > 0)
+    codes, values, weights = codes[keep], values[keep], weights[keep]
+    order = np.lexsort((values, codes))
+    codes, values, weights = codes[order], values[order], weights[order]
+
+    n_groups = len(labels)
+    totals = np.bincount(codes, weights, minlength=n_groups)
+    group_starts = np.cumsum(totals) - totals
+    # each point's mid-rank within its group, mapped through the k1 scale;
+    # points whose scale falls in the same unit interval form one centroid
+    before = np.cumsum(weights) - weights - group_starts[codes]
+    q = (before + weights / 2) / totals[codes]
+    scale = np.floor(compression / (2 * np.pi) * np.arcsin(2 * q - 1) + compression / 4).astype(np.int64)
+    keys = codes.astype(np.int64) * (compression // 2 + 2) + scale
+    starts = np.flatnonzero(np.diff(keys, prepend=-1))
+    if len(starts):
+        centroid_weights = np.add.reduceat(weights, starts)
+        centroid_means = np.add.reduceat(values * weights, starts) / centroid_weights
+    else:
+        centroid_weights = centroid_means = np.empty(0)
+
+    counts = np.bincount(codes, minlength=n_groups)
+    present = np.flatnonzero(counts)
+    first = (np.cumsum(counts) - counts)[present]
+    extremes = pd.DataFrame({"MIN": np.nan, "MAX": np.nan}, index=labels)
+    extremes.iloc[present, 0] = values[first] if minimum is None else minimum[present]
+    extremes.iloc[present, 1] = values[first + counts[present] - 1] if maximum is None else maximum[present]
+    return {
+        "centroids": pd.DataFrame({
+            "GROUP": pd.Categorical.from_codes(codes[starts], labels),
+            "MEAN": centroid_means,
+            "WEIGHT": centroid_weights,
+        }),
+        "extremes": extremes,
+    }
+
+
+def group_digests(values, groups, weights=None, compression=COMPRESSION):
+    """Sketch of ``values`` per group, each value counted ``weights`` times."""
+    values = np.asarray(values, dtype="float64")
+    codes, labels = _codes(groups)
+    weights = np.ones(len(values)) if weights is None else np.asarray(weights, dtype="float64")
+    return _build(codes, values, weights, labels, compression)
+
+
+def merge_digests(sketches, compression=COMPRESSION):
+    """The sketch of the union of the data behind ``sketches``."""
+    labels = pd.Index(sorted(set().union(*(sketch["extremes"].index for sketch in sketches))))
+    centroids = pd.concat([sketch["centroids"] for sketch in sketches], ignore_index=True)
+    extremes = pd.concat([sketch["extremes"] for sketch in sketches]).groupby(level=0)
+    codes = labels.get_indexer(centroids["GROUP"].astype(object))
+    return _build(codes, centroids["MEAN"].to_numpy(), centroids["WEIGHT"].to_numpy(), labels, compression,
+                  extremes["MIN"].min().reindex(labels).to_numpy(),
+                  extremes["MAX"].max().reindex(labels).to_numpy())
+
+
+def _quantile(means, weights, minimum, maximum, q):
+    # interpolate between centroid mid-ranks, anchored at the exact extremes
+    total = weights.sum()
+    ranks = np.concatenate([[0], np.cumsum(weights) - weights / 2, [total]])
+    points = np.concatenate([[minimum], means, [maximum]])
+    return np.interp(np.asarray(q) * total, ranks, points)
+
+
+def digest_quantiles(sketch, q):
+    """Quantiles ``q`` (a float or list) per group; NaN for empty groups."""
+    qs = np.atleast_1d(q)
+    extremes = sketch["extremes"]
+    result = pd.DataFrame(np.nan, index=extremes.index, columns=qs)
+    for label, part in sketch["centroids"].groupby("GROUP", observed=True):
+        result.loc[label] = _quantile(part["MEAN"].to_numpy(), part["WEIGHT"].to_numpy(),
+                                      extremes.at[label, "MIN"], extremes.at[label, "MAX"], qs)
+    return result
+
+
+def digest_box_stats(sketch, whis=1.5):
+    """Tukey box-plot statistics per group from ``sketch``, like
+    :func:`eda.plotting.box_stats`.
+
+    Whiskers end at the most extreme centroid (or exact extreme) within
+    ``whis`` IQRs of the box, and the centroids beyond them are the fliers.
+    """
+    extremes = sketch["extremes"]
+    by_group = dict(list(sketch["centroids"].groupby("GROUP", observed=True)))
+    stats = []
+    for label in extremes.index:
+        part = by_group.get(label)
+        if part is None or not len(part):
+            stats.append(None)
+            continue
+        low, high = extremes.at[label, "MIN"], extremes.at[label, "MAX"]
+        q1, median, q3 = _quantile(part["MEAN"].to_numpy(), part["WEIGHT"].to_numpy(), low, high,
+                                   [0.25, 0.5, 0.75])
+        points = np.unique(np.concatenate([[low], part["MEAN"].to_numpy(), [high]]))
+        inside = (points >= q1 - whis * (q3 - q1)) & (points <= q3 + whis * (q3 - q1))
+        stats.append({
+            "label": label,
+            "med": median,
+            "q1": q1,
+            "q3": q3,
+            "whislo": points[inside].min() if inside.any() else q1,
+            "whishi": points[inside].max() if inside.any() else q3,
+            "fliers": points[~inside],
+        })
+    return list(extremes.index), stats
+
+
+def approximate_median(values, codes, n_groups, weights):
+    """Group medians from a sketch; an imputation strategy like
+    :func:`eda.imputation.median`."""
+    labels = pd.RangeIndex(n_groups)
+    sketch = _build(codes, values, weights, labels, COMPRESSION)
+    return digest_quantiles(sketch, 0.5)[0.5].to_numpy()
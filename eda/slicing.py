@@ -0,0 +1,120 @@
+"""Time windows and department filters over the report's aggregates.
+
+The report's filters (a date range, an hour range and a set of departments)
+are served from one pipeline result, ``windows``, a dict of the aggregates
+laid out sorted by time so a date range is a binary search for its first
+and last row rather than a mask over every row:
+
+``cube``
+    the ``department_time`` cube of :func:`eda.streaming.aggregate_lines`,
+    sorted by date, then department, then hour.  Each day is one contiguous
+    block of rows.
+``orders``
+    one row per order with its ``PURCHASE_DATE_TIME``, ``HOUR`` and the
+    ``MASK`` of its departments (a bitmask over ``departments``, as in
+    :mod:`eda.incremental`), sorted by timestamp.  Orders without a
+    timestamp can't fall in any window and are left out.
+``departments``
+    the department labels of the mask bits, sorted.
+
+Only the rows of the window are filtered further by hour and department,
+so the cost of a filter change depends on the size of the window: on a
+year of synthetic data the count charts of a window take milliseconds, and
+the basket rules of a week need only that week's orders, as their distinct
+department sets.
+"""
+import numpy as np
+import pandas as pd
+
+from eda.basket import department_rules, two_way_rules
+
+HOURS = (0, 23)
+
+
+def build_windows(cube, orders, departments):
+    """The ``windows`` result from a ``department_time`` cube, one row per
+    order with its ``PURCHASE_DATE_TIME`` and department ``MASK``, and the
+    department labels of the mask bits (see :func:`eda.incremental.order_masks`)."""
+    cube = cube.sort_values(["PURCHASE_DATE", "DEPARTMENT_NAME", "HOUR"], kind="stable", ignore_index=True)
+    # incremental state numbers departments as they first appear; renumber
+    # the bits so they follow the sorted labels
+    sort = np.argsort(np.asarray(departments, dtype=object), kind="stable")
+    masks = orders["MASK"].to_numpy()
+    sorted_masks = np.zeros(len(masks), dtype=np.int64)
+    for bit, old in enumerate(sort):
+        sorted_masks |= ((masks >> old) & 1) << bit
+    timestamps = orders["PURCHASE_DATE_TIME"].to_numpy()
+    timed = ~np.isnat(timestamps)
+    # orders come in PURCHASE_ID order, which a stable sort keeps for ties
+    order = np.argsort(timestamps[timed], kind="stable")
+    timestamps = timestamps[timed][order]
+    return {
+        "cube": cube,
+        "orders": pd.DataFrame({
+            "PURCHASE_DATE_TIME": timestamps,
+            "HOUR": pd.DatetimeIndex(timestamps).hour.to_numpy().astype("int8"),
+            "MASK": sorted_masks[timed][order],
+        }),
+        "departments": [departments[i] for i in sort],
+    }
+
+
+def date_range(windows):
+    """The first and last purchase date, as ``datetime.date``."""
+    dates = windows["cube"]["PURCHASE_DATE"]
+    if dates.empty:
+        today = pd.Timestamp.now().date()
+        return today, today
+    return dates.iloc[0].date(), dates.iloc[-1].date()
+
+
+def _rows(timestamps, start, end):
+    # the window runs from midnight on ``start`` to midnight after ``end``
+    bounds = np.array([pd.Timestamp(start), pd.Timestamp(end) + pd.Timedelta(days=1)], dtype="datetime64[ns]")
+    first, last = np.searchsorted(timestamps, bounds)
+    return slice(first, last)
+
+
+def window_cube(windows, start, end, hours=HOURS, departments=None):
+    """The cube rows from ``start`` to ``end`` (dates, both included).
+
+    ``hours`` is an inclusive ``(first, last)`` hour of day and
+    ``departments`` a list of department names (all when empty).
+    """
+    cube = windows["cube"]
+    part = cube.iloc[_rows(cube["PURCHASE_DATE"].to_numpy(), start, end)]
+    keep = (part["HOUR"] >= hours[0]) & (part["HOUR"] <= hours[1])
+    if departments:
+        keep &= part["DEPARTMENT_NAME"].isin(departments)
+    return part[keep]
+
+
+def window_sets(windows, start, end, hours=HOURS, departments=None):
+    """Boolean order-set x department matrix, department labels and set
+    counts of the orders in the window, like
+    :func:`eda.incremental.department_sets`.
+
+    With ``departments`` only those departments are items; orders keep
+    counting towards the supports whichever departments they have.
+    """
+    orders = windows["orders"]
+    part = orders.iloc[_rows(orders["PURCHASE_DATE_TIME"].to_numpy(), start, end)]
+    hour = part["HOUR"].to_numpy()
+    masks = part["MASK"].to_numpy()[(hour >= hours[0]) & (hour <= hours[1])]
+    labels = np.asarray(windows["departments"], dtype=object)
+    bits = np.flatnonzero(np.isin(labels, departments)) if departments else np.arange(len(labels))
+    selected = np.left_shift(1, bits, dtype=np.int64).sum()
+    sets, counts = np.unique(masks & selected, return_counts=True)
+    matrix = (sets[:, None] >> bits) & 1
+    return matrix.astype(bool), pd.Index(labels[bits]), counts
+
+
+def window_rules(windows, start, end, hours=HOURS, departments=None):
+    """The report's two-way department rules (see
+    :func:`eda.basket.two_way_rules`) of the orders in the window, and the
+    number of those orders."""
+    basket, labels, counts = window_sets(windows, start, end, hours, departments)
+    with np.errstate(invalid="ignore"):
+        # an empty window has no frequent itemsets (0 / 0 supports)
+        _, rules = department_rules(basket, labels, weights=counts)
+    return two_way_rules(rules), int(counts.sum())
@@ -0,0 +1,68 @@
+"""Weighted per-group order statistics.
+
+Product-grain frames carry each product's line-item count as a weight.  The
+statistics here treat every value as if it were repeated ``weight`` times, so
+a median or quartile over the product table equals the one over the
+line-item frame without ever materializing it.
+"""
+import numpy as np
+import pandas as pd
+
+from eda.sketches import digest_quantiles, group_digests
+
+
+def _sorted_by_group(values, codes, weights):
+    keep = ~np.isnan(values) & (codes >= 0) & (weights > 0)
+    values, codes, weights = values[keep], codes[keep], weights[keep]
+    order = np.lexsort((values, codes))
+    return values[order], codes[order], weights[order]
+
+
+def group_order_statistic(values, codes, weights, n_groups, rank):
+    """Per group, the value at 0-based position ``rank(total)`` of the group's
+    sorted values, each repeated ``weight`` times.  Groups without values get
+    NaN."""
+    values, codes, weights = _sorted_by_group(values, codes, weights)
+    totals = np.bincount(codes, weights, minlength=n_groups)
+    starts = np.cumsum(totals) - totals
+    cumulative = np.cumsum(weights)
+    result = np.full(n_groups, np.nan)
+    present = totals > 0
+    positions = np.searchsorted(cumulative, starts[present] + rank(totals[present]), side="right")
+    result[present] = values[np.minimum(positions, len(values) - 1)]
+    return result
+
+
+def group_quantile(values, codes, weights, n_groups, q):
+    """Per-group ``q`` quantile with linear interpolation, like ``np.percentile``."""
+    low = group_order_statistic(values, codes, weights, n_groups, lambda n: np.floor(q * (n - 1)))
+    high = group_order_statistic(values, codes, weights, n_groups, lambda n: np.ceil(q * (n - 1)))
+    totals = np.bincount(codes[codes >= 0], weights[codes >= 0] * ~np.isnan(values[codes >= 0]),
+                         minlength=n_groups)
+    position = q * (totals - 1)
+    return low + (position - np.floor(position)) * (high - low)
+
+
+def describe(frame, columns, weights=None, approximate=False):
+    """``frame[columns].describe()`` with each row counted ``weights`` times.
+
+    With ``approximate`` the quartiles are read from a sketch (see
+    :mod:`eda.sketches`) instead of a full sort.
+    """
+    weights = np.ones(len(frame)) if weights is None else np.asarray(weights, dtype="float64")
+    codes = np.zeros(len(frame), dtype=np.int64)
+    table = {}
+    for column in columns:
+        values = frame[column].to_numpy(dtype="float64")
+        keep = ~np.isnan(values) & (weights > 0)
+        x, w = values[keep], weights[keep]
+        count = w.sum()
+        mean = (x * w).sum() / count if count else np.nan
+        std = np.sqrt((w * (x - mean) ** 2).sum() / (count - 1)) if count > 1 else np.nan
+        if approximate:
+            quartiles = digest_quantiles(group_digests(values, codes, weights), [0.25, 0.5, 0.75]).iloc[0]
+        else:
+            quartiles = [group_quantile(values, codes, weights, 1, q)[0] for q in (0.25, 0.5, 0.75)]
+        table[column] = [count, mean, std, x.min() if count else np.nan, *quartiles,
+                         x.max() if count else np.nan]
+    return pd.DataFrame(table, index=["count", "mean", "std", "min", "25%", "50%", "75%", "max"])
@@ -0,0 +1,157 @@
+"""Aggregating line items in bounded memory.
+
+The line file is the only table that grows with traffic; the purchase header
+and the product catalog are small enough to hold in memory.  Instead of
+merging all line items with both tables, line items are read in chunks and
+each chunk is joined to the header and catalog by position: the two tables
+are indexed by their keys once, and ``Index.get_indexer`` maps a chunk's
+``PURCHASE_ID`` and ``PRODUCT_ID`` to row numbers.  Every aggregate the
+report needs is then accumulated into arrays sized by the header, the catalog
+or the cube, so peak memory depends on the chunk size and not on the file.
+Charts that need individual line items get a bounded random sample of them
+from :func:`sample_lines`.
+"""
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from eda.calendar import calendar_features
+from eda.schema import SCHEMAS
+
+CHUNK_ROWS = 1_000_000
+
+# line items kept by sample_lines for previews and row-level statistics
+SAMPLE_ROWS = 200_000
+
+
+def iter_chunks(path, name="purchase_lines", columns=None, chunk_rows=CHUNK_ROWS):
+    """Yield a table as typed frames of at most ``chunk_rows`` rows."""
+    schema = SCHEMAS[name]
+    columns = list(columns) if columns is not None else list(schema)
+    if path.endswith(".parquet"):
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+    else:
+        dtypes = {c: schema[c] for c in columns}
+        yield from pd.read_csv(path, usecols=columns, dtype=dtypes, chunksize=chunk_rows)
+
+
+def _time_cells(timestamps):
+    """Code each purchase by its (date, hour) and describe the codes."""
+    codes, hours = pd.factorize(timestamps.dt.floor("h"), sort=True)
+    calendar = calendar_features(hours)
+    cells = calendar[["PURCHASE_DATE", "HOUR"]].assign(DAY_OF_WEEK=calendar["DAY_OF_WEEK"].cat.codes)
+    return codes, cells
+
+
+def _size_distribution(sizes, name):
+    # only keys that occur in the line items are counted, as in a groupby
+    distribution = pd.Series(sizes[sizes > 0]).value_counts().sort_index()
+    distribution.index.name = "LINES"
+    return distribution.rename(name).reset_index()
+
+
+def aggregate_lines(chunks, purchase_header, product):
+    """Accumulate the report's line-item aggregates over ``chunks``.
+
+    Line items are inner-joined to ``purchase_header`` on ``PURCHASE_ID`` and
+    to ``product`` on ``PRODUCT_ID``.  Returns a dict with the number of line
+    items per product (``line_counts``, indexed by ``PRODUCT_ID``), the
+    distinct ``order_departments`` pairs and, under ``cubes``, the report's
+    summary cubes:
+
+    ``department_time``
+        one row per (department, date, hour, day of week) of
+        :data:`eda.cubes.CUBE_KEYS` with the summed ``QUANTITY``, the number
+        of ``LINES`` and the number of distinct ``ORDERS``.  An order has a
+        single timestamp, so ``ORDERS`` can be summed over the time keys for
+        a department (but not across departments).
+    ``lines_per_order`` / ``lines_per_product``
+        how many orders (products) have each number of line items.
+    """
+    product = product.drop_duplicates("PRODUCT_ID")
+    orders = pd.Index(purchase_header["PURCHASE_ID"])
+    products = pd.Index(product["PRODUCT_ID"])
+    departments = product["DEPARTMENT_NAME"].astype("category")
+    # category codes are int8; cell numbers need the full range
+    department_codes = departments.cat.codes.to_numpy().astype(np.int64)
+    n_departments = len(departments.cat.categories)
+
+    time_codes, time_cells = _time_cells(purchase_header["PURCHASE_DATE_TIME"])
+    n_cells = n_departments * len(time_cells)
+
+    quantity = np.zeros(n_cells)
+    lines = np.zeros(n_cells, dtype=np.int64)
+    order_lines = np.zeros(len(orders), dtype=np.int64)
+    product_lines = np.zeros(len(products), dtype=np.int64)
+    # one flag per (order, department); an order is counted once per cube
+    # cell no matter how many chunks its lines are spread over
+    seen = np.zeros(len(orders) * n_departments, dtype=bool)
+
+    for chunk in chunks:
+        order_rows = orders.get_indexer(chunk["PURCHASE_ID"])
+        product_rows = products.get_indexer(chunk["PRODUCT_ID"])
+        joined = (order_rows >= 0) & (product_rows >= 0)
+        order_rows, product_rows = order_rows[joined], product_rows[joined]
+        order_lines += np.bincount(order_rows, minlength=len(orders))
+        product_lines += np.bincount(product_rows, minlength=len(products))
+
+        dept = department_codes[product_rows]
+        time = time_codes[order_rows]
+        keyed = (dept >= 0) & (time >= 0)
+        cell = dept[keyed] * len(time_cells) + time[keyed]
+        chunk_quantity = chunk["QUANTITY"].to_numpy(dtype="float64")[joined][keyed]
+        # QUANTITY is summed like groupby().sum() (NaN as 0) but LINES counts
+        # only non-missing quantities, like groupby().count()
+        quantity += np.bincount(cell, np.nan_to_num(chunk_quantity), minlength=n_cells)
+        lines += np.bincount(cell[~np.isnan(chunk_quantity)], minlength=n_cells)
+        seen[order_rows[keyed] * n_departments + dept[keyed]] = True
+
+    pair_order, pair_dept = np.divmod(np.flatnonzero(seen), n_departments)
+    pair_cells = pair_dept * len(time_cells) + time_codes[pair_order]
+    order_counts = np.bincount(pair_cells, minlength=n_cells)
+
+    present = np.flatnonzero(order_counts)
+    dept, time = np.divmod(present, len(time_cells))
+    department_time = pd.concat([
+        pd.DataFrame({"DEPARTMENT_NAME": pd.Categorical.from_codes(dept, departments.cat.categories)}),
+        time_cells.iloc[time].reset_index(drop=True),
+    ], axis=1).assign(QUANTITY=quantity[present], LINES=lines[present], ORDERS=order_counts[present])
+
+    return {
+        "cubes": {
+            "department_time": department_time,
+            "lines_per_order": _size_distribution(order_lines, "ORDERS"),
+            "lines_per_product": _size_distribution(product_lines, "PRODUCTS"),
+        },
+        "line_counts": pd.Series(product_lines, index=products, name="count"),
+        "order_departments": pd.DataFrame({
+            "PURCHASE_ID": orders[pair_order],
+            "DEPARTMENT_NAME": pd.Categorical.from_codes(pair_dept, departments.cat.categories),
+        }),
+    }
+
+
+def sample_lines(chunks, purchase_header, product, n=SAMPLE_ROWS, seed=0):
+    """A uniform random sample of at most ``n`` line items, in file order.
+
+    Only line items that join to ``purchase_header`` and ``product`` are
+    sampled, as in :func:`aggregate_lines`.  Every one of them gets a random
+    key and the ``n`` smallest keys are kept as the chunks go by, so memory
+    is bounded by ``n`` plus one chunk.
+    """
+    rng = np.random.default_rng(seed)
+    orders = pd.Index(purchase_header["PURCHASE_ID"])
+    products = pd.Index(product["PRODUCT_ID"].unique())
+    sample, offset = None, 0
+    for chunk in chunks:
+        joined = (orders.get_indexer(chunk["PURCHASE_ID"]) >= 0) & (products.get_indexer(chunk["PRODUCT_ID"]) >= 0)
+        rows = offset + np.flatnonzero(joined)
+        offset += len(chunk)
+        part = chunk[joined].assign(ROW=rows, KEY=rng.random(len(rows)))
+        sample = part if sample is None else pd.concat([sample, part], ignore_index=True)
+        if len(sample) > n:
+            sample = sample.iloc[np.argpartition(sample["KEY"].to_numpy(), n)[:n]]
+    if sample is None:
+        return pd.DataFrame({c: pd.Series(dtype=t) for c, t in SCHEMAS["purchase_lines"].items()})
+    return sample.sort_values("ROW").drop(columns=["ROW", "KEY"]).reset_index(drop=True)
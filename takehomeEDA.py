@@ -3,632 +3,635 @@ import pandas as pd
 import numpy as np
 import seaborn as sns
 import matplotlib.pyplot as plt
-import networkx as nx
-import missingno as msno
-from mlxtend.frequent_patterns import apriori, association_rules 
+from eda import instrument
+from eda.copurchase import METRICS, top_partners
+from eda.cubes import DAY_NAMES, rollup
+from eda.graph import draw_graph
+from eda.graph import rule_graph as build_rule_graph
+from eda.missingness import null_share_bars, pattern_matrix, sampled_matrix, share_heatmap
+from eda.parallel import MAX_WORKERS, render_panels
+from eda.pipeline import BACKENDS, get_pipeline
+from eda.plotting import bars, boxplot, histogram, regression
+from eda.products import DIMENSIONS, with_product_columns
+from eda.quality import flagged
+from eda.sketches import COMPRESSION
+from eda.slicing import HOURS, date_range, window_cube, window_rules
+from eda.stats import describe
+
+# Each section is a function of the pipeline results it names; only the
+# section picked below is run, and the pipeline computes just what it needs.
+SECTIONS = {}
+
+# products offered in the "Bought together" picker; any other one is looked
+# up by its id
+TOP_PRODUCTS = 1000
+
+
+def section(title, *inputs):
+    def register(render):
+        SECTIONS[title] = (render, inputs)
+        return render
+    return register
 
 
-product = pd.read_csv("product.csv")
-purchase_header = pd.read_csv("purchase_header.csv")
-purchase_lines = pd.read_csv("purchase_lines.csv")
-
 st.title('Take Home Challenge')
+
+# scatter panels fit their regression on every point but only draw a density
+# or a bounded sample of them
+st.sidebar.markdown("### Scatter plots")
+scatter = {
+    "mode": st.sidebar.radio("Show points as", ["hexbin", "sample"]),
+    "max_points": st.sidebar.number_input("Max sampled points", min_value=100, value=5000, step=500),
+}
+# both backends produce the same results; see python -m eda.polars_backend
+backend = st.sidebar.radio("Backend", BACKENDS, horizontal=True)
+# with more than one worker, per-department statistics and chart panels are
+# computed on a process pool and the panels are shown as separate images
+workers = st.sidebar.number_input("Worker processes", min_value=0, max_value=MAX_WORKERS, value=0,
+                                  help="0 computes everything in the app process")
+# medians and quartiles from mergeable sketches instead of full sorts
+approximate = st.sidebar.checkbox("Approximate quantiles",
+                                  help="Box plots, summary tables and imputation medians from t-digest "
+                                       f"sketches, within about {np.pi / COMPRESSION:.1%} of rank of the exact "
+                                       "values at the median and closer towards the tails")
 st.markdown('EDA of the three provided .csv files.')
 
-st.markdown("## Getting an idea of what the data looks like")
-st.dataframe(product.head())
-st.dataframe(purchase_header.head())
-st.dataframe(purchase_lines.head())
-
-merged = pd.merge(purchase_lines, purchase_header)
-product_purchase = pd.merge(merged, product, on = 'PRODUCT_ID')
-
-st.markdown("### Head of merged dataframe")
-st.dataframe(product_purchase.head())
-
-st.markdown("### Invalid Data Types")
-st.markdown("Seeing if there are numeric points that are impossible (negative height, etc.) and replacing them with NA")
-st.markdown("#### Sorted by height")
-st.dataframe(product_purchase.sort_values("HEIGHT_INCHES").head())
-st.markdown("#### Sorted by width")
-st.dataframe(product_purchase.sort_values("WIDTH_INCHES").head())
-st.markdown("#### Sorted by depth")
-st.dataframe(product_purchase.sort_values("DEPTH_INCHES").head())
-st.markdown("#### Sorted by weight")
-st.dataframe(product_purchase.sort_values("WEIGHT_GRAMS").head())
-product_purchase.loc[(product_purchase['HEIGHT_INCHES'] <= 0) | 
-                     (product_purchase['WIDTH_INCHES'] <= 0) | 
-                     (product_purchase['DEPTH_INCHES'] <= 0) | 
-                     (product_purchase['WEIGHT_GRAMS'] <= 0), 
-                     ['HEIGHT_INCHES', 'WIDTH_INCHES', 'DEPTH_INCHES', 'WEIGHT_GRAMS']] = np.nan
-st.dataframe(product_purchase.sort_values("HEIGHT_INCHES").head())
-
-st.markdown("## Missing Data Matrix")
-msno.matrix(product_purchase)
-plt.title("Missing Data Matrix")
-st.pyplot(plt)
-st.markdown("I will be imputing the missing data later in this report, but I wanted to see some of the interactions between columns before doing so.")
-
-st.markdown("## Data Frame Contents")
-st.write(f"There are {len(product_purchase['PURCHASE_ID'].unique())} unique orders.")
-st.write(f"There are {len(product_purchase['PRODUCT_ID'].unique())} unique products.")
-
-st.markdown("## Distribution of number of items per order")
-order_counts = product_purchase.groupby('PURCHASE_ID')['QUANTITY'].count()
-plt.figure(figsize=(10, 6))
-sns.histplot(order_counts, bins=range(order_counts.min(), 95, 2), kde=False)
-plt.xlabel("Total Number of Items in an Order")
-plt.ylabel("Number of Occurrences")
-st.pyplot(plt)
-st.markdown("Most of the orders in the dataset contain between 5 and 25 items.")
-
-st.markdown("## Distribution of items per product")
-product_counts = product_purchase.groupby('PRODUCT_ID')['QUANTITY'].count()
-plt.figure(figsize=(10, 6))
-sns.histplot(product_counts, bins=range(0, 100, 2), kde=False)
-plt.xlabel("Number of Items of Each Product in an Order")
-st.pyplot(plt)
-st.markdown("Most orders do not exceed 10 of a specific product.")
-
-st.markdown("## Distribution of number of items from each department")
-department_counts = product_purchase.groupby('DEPARTMENT_NAME')['QUANTITY'].sum()
-department_counts = department_counts.sort_values()
-plt.figure()
-department_counts.plot(kind="barh")
-plt.ylabel("Department Name")
-plt.xlabel("Total Number of Items Purchased")
-st.pyplot(plt)
-st.markdown("Produce is by far the most popular department when it comes to most items ordered.")
-
-st.markdown("### Investigating Produce a Little Further")
-st.write(f"Number of produce items purchased: {round(product_purchase[product_purchase['DEPARTMENT_NAME'] == 'Produce']['QUANTITY'].sum(), 2)}")
-st.markdown("That's interesting, not every item purchased is an integer. Let's see a few examples.")
-st.dataframe(product_purchase[(product_purchase["DEPARTMENT_NAME"] == "Produce") & (product_purchase['QUANTITY'] % 1 != 0)].head())
-st.markdown("It seems like a lot of produce purchases are in halves or quarters, so this could indicate weight rather than count.")
-
-st.markdown("Produce might be the most popular when it comes to most items ordered, but which department appears in the most orders?")
-st.markdown("### Distribution of most popular departments per order")
-order_counts = product_purchase.groupby('DEPARTMENT_NAME').size()
-order_counts = order_counts.sort_values()
-plt.figure()
-order_counts.plot(kind="barh")
-plt.ylabel("Department Name")
-plt.xlabel("Total Number of Orders that Include Each Department")
-st.pyplot(plt)
-st.markdown("Produce is still the most commonly ordered department, but it is not overwhelming like it was by item.")
-st.markdown("This makes sense because most produce items are not bought individually like items from other departments (e.g. multiple apples vs. a stick of deodorant)")
-
-st.markdown("## Distribution of Each Numeric Column")
-fig, axs = plt.subplots(2, 2, figsize=(15,12))
-sns.histplot(data=product_purchase, x="HEIGHT_INCHES", bins=range(0, 30), kde=False, ax=axs[0, 0])
-axs[0,0].grid(True)
-sns.histplot(data=product_purchase, x="WIDTH_INCHES", bins=range(0, 30), kde=False, ax=axs[0,1])
-axs[0,1].grid(True)
-sns.histplot(data=product_purchase, x="DEPTH_INCHES", bins=range(0, 30), kde=False, ax=axs[1,0])
-axs[1,0].grid(True)
-sns.histplot(data=product_purchase, x="WEIGHT_GRAMS", bins=500, kde=False, ax=axs[1,1])
-axs[1,1].set_xlim(0,5000)
-axs[1,1].grid(True)
-fig.tight_layout()
-st.pyplot(fig)
-st.markdown("As expected, height, width, depth and weight are right-skewed, as there are typically fewer products with more extreme dimensions.")
-
-st.markdown("#### How Height, Weight, and Depth Affect Weight")
-fig, axs = plt.subplots(1, 3, figsize=(15, 12))
-sns.regplot(data = product_purchase, x = "HEIGHT_INCHES", y = "WEIGHT_GRAMS", ax = axs[0])
-axs[0].set_xlabel(r"Height (in)")
-axs[0].set_ylabel("Weight (g)")
-axs[0].set_xlim(0, 30) 
-axs[0].set_ylim(0, 20000)
-axs[0].grid(True)
-sns.regplot(data = product_purchase, x = "WIDTH_INCHES", y = "WEIGHT_GRAMS", ax = axs[1])
-axs[1].set_xlabel(r"Width (in)")
-axs[1].set_ylabel("Weight (g)")
-axs[1].set_xlim(0,30)
-axs[1].set_ylim(0, 20000)
-axs[1].grid(True)
-sns.regplot(data = product_purchase, x = "DEPTH_INCHES", y = "WEIGHT_GRAMS", ax = axs[2])
-axs[2].set_xlabel(r"Depth (in)")
-axs[2].set_ylabel("Weight (g)")
-axs[2].set_xlim(0, 30)
-axs[2].set_ylim(0, 20000)
-axs[2].grid(True)
-fig.tight_layout()
-st.pyplot(fig)
-st.markdown("There seems to be some subtle linear trend between height and width to volume, but surprisingly depth has the most strong linear trend.")
-
-st.markdown("## Side-by-side Boxplots of Departments vs. Weight")
-plt.figure(figsize = (12,6))
-plt.xlim(0, 10000) # ignoring outliers, getting a closer look at the boxes
-sns.boxplot(data = product_purchase, x = "WEIGHT_GRAMS", y = "DEPARTMENT_NAME")
-plt.ylabel("Department Name")
-plt.xlabel("Weight (grams)")
-st.pyplot(plt)
-st.markdown("The heaviest departments are beverage and alcohol, which makes sense because many of those products come in boxes and packs of multiple cans/bottles.")
-st.markdown("This data contains a ton of outliers, and there was one dairy item that weighed over 120,000 grams, which I'd assume was a bulk order of something like milk jugs.")
-st.markdown("The lightest departments were personal care and babies, which is understandable because of items like deodorant, toothpaste or diapers.")
-
-st.markdown("## Distributions of Date and Times")
-st.markdown("For this section I sliced the string of the `PURCHASE_DATE_TIME` column to get just date and just time.")
-# date column
-product_purchase['PURCHASE_DATE_TIME'] = pd.to_datetime(product_purchase['PURCHASE_DATE_TIME'])
-product_purchase["PURCHASE_DATE"] = product_purchase["PURCHASE_DATE_TIME"].dt.date
-product_purchase["PURCHASE_TIME"] = product_purchase["PURCHASE_DATE_TIME"].dt.time
-
-# plot
-fig, ax = plt.subplots(figsize=(10,6))
-date_counts = product_purchase["PURCHASE_DATE"].value_counts().sort_index()
-date_counts.plot(kind="bar")
-ax.set_xlabel("Date")
-ax.set_ylabel("Number of Purhcases")
-st.pyplot(fig)
-st.markdown("This data contains dates from 3/25/2020 to 4/12/2020, but most of the data takes place in April, with April 6th and 7th being the two most popular dates.")
-
-# day of the week column
-product_purchase["DAY_OF_WEEK"] = product_purchase["PURCHASE_DATE_TIME"].dt.dayofweek
-day_names = {0: 'Monday', 1: 'Tuesday', 2: 'Wednesday', 3: 'Thursday', 4: 'Friday', 5: 'Saturday', 6: 'Sunday'}
-product_purchase["DAY_OF_WEEK"] = product_purchase["DAY_OF_WEEK"].map(day_names)
-ordered_days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-product_purchase["DAY_OF_WEEK"] = pd.Categorical(product_purchase["DAY_OF_WEEK"], categories=ordered_days, ordered=True)
-
-# plot
-fig, ax = plt.subplots(figsize=(10,6))
-date_counts = product_purchase["DAY_OF_WEEK"].value_counts().sort_index()
-date_counts.plot(kind="bar")
-ax.set_xlabel("Day of the Week")
-ax.set_ylabel("Number of Purchases")
-st.pyplot(fig)
-st.markdown("Unfortunately all days of the week seem relatively uniform, let's dig into the top 10 most popular departments to see if there are any trends between department and day of the week.")
-
-st.markdown("### Finding the top 10 most common departments")
-most_popular = department_counts.sort_values(ascending=False).head(10)
-top_10_depts = most_popular.index.tolist()
-most_pop_depts = product_purchase[product_purchase["DEPARTMENT_NAME"].isin(top_10_depts)]
-st.markdown("Top 10 most popular departments:")
-st.write(top_10_depts)
-# plot
-st.markdown("### Days of the Week Distribution of Top 10 Departments")
-plt.figure(figsize=(16,10))
-g = sns.FacetGrid(most_pop_depts, col="DEPARTMENT_NAME", col_wrap=2, height=10, aspect=1.5)
-g.map(sns.countplot, "DAY_OF_WEEK")
-st.pyplot(g)
-st.markdown("Surprisingly, there is not a specific trend with some departments being purchased on certain days of the week, all these distributions closely resemble the total distribution.")
-
-st.markdown("### Most Popular Times of Day")
-fig, ax = plt.subplots(figsize=(10,6))
-hour_counts = product_purchase["PURCHASE_TIME"].astype(str).str[:2].astype(int).value_counts().sort_index()
-hour_counts.plot(kind="bar")
-ax.set_xlabel("Time (hour)")
-st.pyplot(fig)
-st.markdown("The middle of the day (10am - 2pm) seems to be the most popular for purchases.")
-
-st.markdown("### Most Popular Times of Day by Top 10 Departments")
-most_pop_depts['HOUR'] = most_pop_depts['PURCHASE_TIME'].astype(str).str[:2].astype(int)
-g = sns.FacetGrid(most_pop_depts, col="DEPARTMENT_NAME", col_wrap=2, height=10, aspect=1.5)
-g.map(plt.hist, "HOUR", bins=24, range=(0, 24))
-st.pyplot(g)
-st.markdown("Again, there seems to be no correlation between department and time of day of purchase, and each of these subplots seems to resemble the total distribution.")
-
-st.markdown("## Creating a Volume Column")
-product_purchase["VOLUME_INCHES"] = product_purchase["HEIGHT_INCHES"] * product_purchase["WIDTH_INCHES"] * product_purchase["DEPTH_INCHES"]
-fig, ax = plt.subplots(figsize=(10,6))
-sns.histplot(data=product_purchase, x="VOLUME_INCHES", bins=range(0,2000,50), kde=False)
-st.pyplot(fig)
-st.markdown("Volume is very heavily right-skewed, with the majority of the data between 0 and 250 in$^3$")
-
-st.markdown("### Volume by Department")
-plt.figure(figsize = (12,6))
-sns.boxplot(data = product_purchase, x = "VOLUME_INCHES", y = "DEPARTMENT_NAME")
-plt.xlim(0, 1750) # ignoring outliers, getting a closer look at the boxes
-plt.xticks(rotation=90)
-plt.ylabel("Department Name")
-plt.xlabel(r"Item Volume (in$^3$)")
-st.pyplot(plt)
-st.markdown("Alcohol by far the department with the most voluminous items.")
-st.markdown("Many alcoholic beverages come in 12-packs or large bottles, so this makes sense.")
-
-st.markdown("## Dimensions (height, width, depth, weight) vs. Volume Scatterplots")
-fig, axs = plt.subplots(2, 2, figsize=(15, 12))
-sns.regplot(data = product_purchase, x = "HEIGHT_INCHES", y = "VOLUME_INCHES", ax = axs[0, 0])
-axs[0, 0].set_xlabel(r"Height (in)")
-axs[0, 0].set_ylabel(r"Volume (in$^3$)")
-axs[0, 0].set_xlim(0, 40) 
-axs[0, 0].set_ylim(0, 5000)
-axs[0, 0].grid(True)
-sns.regplot(data = product_purchase, x = "WIDTH_INCHES", y = "VOLUME_INCHES", ax = axs[0,1])
-axs[0, 1].set_xlabel(r"Width (in)")
-axs[0, 1].set_ylabel(r"Volume (in$^3$)")
-axs[0, 1].set_xlim(0,25)
-axs[0, 1].set_ylim(0, 5000)
-axs[0, 1].grid(True)
-sns.regplot(data = product_purchase, x = "DEPTH_INCHES", y = "VOLUME_INCHES", ax = axs[1,0])
-axs[1, 0].set_xlabel(r"Depth (in)")
-axs[1, 0].set_ylabel(r"Volume (in$^3$)")
-axs[1, 0].set_xlim(0, 25)
-axs[1, 0].set_ylim(0, 5000)
-axs[1, 0].grid(True)
-sns.regplot(data = product_purchase, x = "WEIGHT_GRAMS", y = "VOLUME_INCHES", ax = axs[1,1])
-axs[1, 1].set_xlabel(r"Weight (g)")
-axs[1, 1].set_ylabel(r"Volume (in$^3$)")
-axs[1, 1].set_xlim(0, 6000) 
-axs[1, 1].set_ylim(0, 5000)
-axs[1, 1].grid(True)
-fig.tight_layout()
-st.pyplot(fig)
-st.markdown("There seems to be a strong positive linear trend between height, width and depth width volume as expected because of the volume formula, but not as much with weight.")
-
-st.markdown("## Creating a Density Column")
-st.markdown("To do this, I need to create a `VOLUME_CM` column from `VOLUME_INCHES` for the correct units.")
-product_purchase["VOLUME_CM"] = product_purchase["VOLUME_INCHES"] * 16.387
-product_purchase["DENSITY"] = product_purchase["WEIGHT_GRAMS"] / product_purchase["VOLUME_CM"]
-fig, ax = plt.subplots(figsize=(10,6))
-sns.histplot(data=product_purchase, x="DENSITY", bins=100, kde=False)
-ax.set_xlim(0,10)
-st.pyplot(fig)
-st.markdown("Majority of density values fall between 0 and 1 g/cm$^3$.")
-
-fig, axs = plt.subplots(3, 2, figsize=(15, 12))
-
-st.markdown("### Density vs. Other Dimensionality Values")
-fig, axs = plt.subplots(3, 2, figsize=(15, 12))
-sns.regplot(data = product_purchase, x = "HEIGHT_INCHES", y = "DENSITY", ax = axs[0, 0])
-axs[0, 0].set_xlabel(r"Height (in)")
-axs[0, 0].set_ylabel("Density")
-axs[0, 0].set_xlim(0, 40) 
-axs[0, 0].set_ylim(0, 30)
-axs[0, 0].grid(True)
-sns.regplot(data = product_purchase, x = "WIDTH_INCHES", y = "DENSITY", ax = axs[0,1])
-axs[0, 1].set_xlabel(r"Width (in)")
-axs[0, 1].set_ylabel("Density")
-axs[0, 1].set_xlim(0,25)
-axs[0, 1].set_ylim(0, 50)
-axs[0, 1].grid(True)
-sns.regplot(data = product_purchase, x = "DEPTH_INCHES", y = "DENSITY", ax = axs[1,0])
-axs[1, 0].set_xlabel(r"Depth (in)")
-axs[1, 0].set_ylabel("Density")
-axs[1, 0].set_xlim(0, 25)
-axs[1, 0].set_ylim(0, 50)
-axs[1, 0].grid(True)
-sns.regplot(data = product_purchase, x = "VOLUME_INCHES", y = "DENSITY", ax = axs[1,1])
-axs[1, 1].set_xlabel(r"Volume (in$^3$)")
-axs[1, 1].set_ylabel("Density)")
-axs[1, 1].set_xlim(0, 4000) 
-axs[1, 1].set_ylim(0, 50)
-axs[1, 1].grid(True)
-sns.regplot(data = product_purchase, x = "WEIGHT_GRAMS", y = "DENSITY", ax = axs[2,0])
-axs[2, 0].set_xlabel("Weight (g)")
-axs[2, 0].set_ylabel("Density)")
-axs[2, 0].set_xlim(0, 6000) 
-axs[2, 0].set_ylim(0, 50)
-axs[2, 0].grid(True)
-fig.tight_layout()
-st.pyplot(fig)
-st.markdown("The `regplot()` function in Python usually only plots a regression line when there is a present trend. In this case this does not seem to be the case with any dimensions and density.")
-
-st.markdown("## Imputing Missing Values")
-st.markdown("It was clear from the first missing data matrix that this dataset has a ton of missing data, specifically in the height, width, depth and weight columns.")
-st.markdown("I will be filling those missing values with the department-wise mean of that specific column.")
-
-department_dims = product_purchase[["DEPARTMENT_NAME", "HEIGHT_INCHES", "WIDTH_INCHES", "DEPTH_INCHES", "WEIGHT_GRAMS"]]
-department_medians = department_dims.groupby("DEPARTMENT_NAME").transform("median")
-imputed = product_purchase.copy()
-imputed["HEIGHT_INCHES"] = imputed["HEIGHT_INCHES"].fillna(department_medians["HEIGHT_INCHES"])
-imputed["WIDTH_INCHES"] = imputed["WIDTH_INCHES"].fillna(department_medians["WIDTH_INCHES"])
-imputed["DEPTH_INCHES"] = imputed["DEPTH_INCHES"].fillna(department_medians["DEPTH_INCHES"])
-imputed["WEIGHT_GRAMS"] = imputed["WEIGHT_GRAMS"].fillna(department_medians["WEIGHT_GRAMS"])
-# imputed volume column
-imputed["VOLUME_INCHES"] = imputed["HEIGHT_INCHES"] * imputed["WIDTH_INCHES"] * imputed["DEPTH_INCHES"]
-# imputed density column
-imputed["VOLUME_CM"] = imputed["VOLUME_INCHES"] * 16.387
-imputed["DENSITY"] = imputed["WEIGHT_GRAMS"] / imputed["VOLUME_CM"]
-
-msno.matrix(imputed)
-plt.title("Imputed Missing Data Matrix")
-st.pyplot(plt)
-st.markdown("Now there are only 767 missing values in the entire dataset.")
-st.markdown("After some investigation, these values were caused by 3 departments not having any dimension data for their products.")
-st.markdown("These departments were Books, Cards, & Magazines, Floral, and Popular.")
-
-st.markdown("## Redoing Scatter Plots to Identify Trends")
-st.markdown("Now that data has been imputed, I will redo some of these scatter plots with regression lines to identify how imputation has impacted the trends.")
-st.markdown("### Imputed Height, Width, Depth vs. Volume")
-fig, axs = plt.subplots(1, 3, figsize=(15, 12))
-sns.regplot(data = imputed, x = "HEIGHT_INCHES", y = "WEIGHT_GRAMS", ax = axs[0])
-axs[0].set_xlabel(r"Height (in)")
-axs[0].set_ylabel("Weight (g)")
-axs[0].set_xlim(0, 30) 
-axs[0].set_ylim(0, 20000)
-axs[0].grid(True)
-sns.regplot(data = imputed, x = "WIDTH_INCHES", y = "WEIGHT_GRAMS", ax = axs[1])
-axs[1].set_xlabel(r"Width (in)")
-axs[1].set_ylabel("Weight (g)")
-axs[1].set_xlim(0,30)
-axs[1].set_ylim(0, 20000)
-axs[1].grid(True)
-sns.regplot(data = imputed, x = "DEPTH_INCHES", y = "WEIGHT_GRAMS", ax = axs[2])
-axs[2].set_xlabel(r"Depth (in)")
-axs[2].set_ylabel("Weight (g)")
-axs[2].set_xlim(0, 30)
-axs[2].set_ylim(0, 20000)
-axs[2].grid(True)
-fig.tight_layout()
-st.pyplot(fig) 
-st.markdown("After imputation, there does not seem to be any changes to the linear trends, which is a good sign if we were to run models.")
-
-st.markdown("### Imputed Dimensions vs. Volume")
-fig, axs = plt.subplots(2, 2, figsize=(15, 12))
-sns.regplot(data = imputed, x = "HEIGHT_INCHES", y = "VOLUME_INCHES", ax = axs[0, 0])
-axs[0, 0].set_xlabel("Height (in)")
-axs[0, 0].set_ylabel(r"Volume (in$^3$)")
-axs[0, 0].set_xlim(0, 40) 
-axs[0, 0].set_ylim(0, 6000)
-axs[0, 0].grid(True)
-sns.regplot(data = imputed, x = "WIDTH_INCHES", y = "VOLUME_INCHES", ax = axs[0,1])
-axs[0, 1].set_xlabel(r"Width (in)")
-axs[0, 1].set_ylabel(r"Volume (in$^3$)")
-axs[0, 1].set_xlim(0,25)
-axs[0, 1].set_ylim(0, 6000)
-axs[0, 1].grid(True)
-sns.regplot(data = imputed, x = "DEPTH_INCHES", y = "VOLUME_INCHES", ax = axs[1,0])
-axs[1, 0].set_xlabel(r"Depth (in)")
-axs[1, 0].set_ylabel(r"Volume (in$^3$)")
-axs[1, 0].set_xlim(0, 25)
-axs[1, 0].set_ylim(0, 6000)
-axs[1, 0].grid(True)
-sns.regplot(data = imputed, x = "WEIGHT_GRAMS", y = "VOLUME_INCHES", ax = axs[1,1])
-axs[1, 1].set_xlabel("Weight (g)")
-axs[1, 1].set_ylabel(r"Volume (in$^3$)")
-axs[1, 1].set_xlim(0, 5000) 
-axs[1, 1].set_ylim(0, 6000)
-axs[1, 1].grid(True)
-fig.tight_layout()
-st.pyplot(fig)
-
-st.markdown("### Imputed Dimensions vs. Density")
-
-sns.regplot(data = imputed, x = "HEIGHT_INCHES", y = "DENSITY", ax = axs[0,0])
-fig, axs = plt.subplots(3, 2, figsize=(15, 12))
-sns.regplot(data = imputed, x = "HEIGHT_INCHES", y = "DENSITY", ax = axs[0,0])
-axs[0, 0].set_xlabel(r"Height (in)")
-axs[0, 0].set_ylabel("Density")
-axs[0, 0].set_xlim(0, 40) 
-axs[0, 0].set_ylim(0, 30)
-axs[0, 0].grid(True)
-sns.regplot(data = imputed, x = "WIDTH_INCHES", y = "DENSITY", ax = axs[0,1])
-axs[0, 1].set_xlabel(r"Width (in)")
-axs[0, 1].set_ylabel("Density")
-axs[0, 1].set_xlim(0,25)
-axs[0, 1].set_ylim(0, 50)
-axs[0, 1].grid(True)
-sns.regplot(data = imputed, x = "WIDTH_INCHES", y = "DENSITY", ax = axs[1,0])
-axs[1, 0].set_xlabel(r"Width (in)")
-axs[1, 0].set_ylabel("Density")
-axs[1, 0].set_xlim(0, 25)
-axs[1, 0].set_ylim(0, 50)
-axs[1, 0].grid(True)
-sns.regplot(data = imputed, x = "VOLUME_INCHES", y = "DENSITY", ax = axs[1,1])
-axs[1, 1].set_xlabel(r"Volume (in$^3$)")
-axs[1, 1].set_ylabel("Density)")
-axs[1, 1].set_xlim(0, 4000) 
-axs[1, 1].set_ylim(0, 50)
-axs[1, 1].grid(True)
-sns.regplot(data = imputed, x = "WEIGHT_GRAMS", y = "DENSITY", ax = axs[2,0])
-axs[2, 0].set_xlabel("Weight (g)")
-axs[2, 0].set_ylabel("Density)")
-axs[2, 0].set_xlim(0, 6000) 
-axs[2, 0].set_ylim(0, 50)
-axs[2, 0].grid(True)
-fig.tight_layout()
-st.pyplot(fig)
-st.markdown("It does not look like the imputation changed anything about the trends between our numerical columns.")
-st.markdown("This is a great sign for model-building, as the filling of missing data did not affect the dataset very much, and if anything just decreased the proportion of outliers.")
-
-st.markdown("## Side-by-side boxplots of imputed data")
-st.markdown("### Department vs. Weight")
-plt.figure(figsize = (12,6))
-plt.xlim(0, 10000) # ignoring outliers, getting a closer look at the boxes
-sns.boxplot(data = imputed, x = "WEIGHT_GRAMS", y = "DEPARTMENT_NAME")
-plt.xticks(rotation=90)
-plt.ylabel("Department Name")
-plt.xlabel("Weight (grams)")
-st.pyplot(plt)
-st.markdown("### Department vs. Volume")
-plt.figure(figsize = (12,6))
-sns.boxplot(data = imputed, x = "VOLUME_INCHES", y = "DEPARTMENT_NAME")
-plt.xlim(0, 1750) # ignoring outliers, getting a closer look at the boxes
-plt.xticks(rotation=90)
-plt.ylabel("Department Name")
-plt.xlabel(r"Item Volume (in$^3$)")
-st.pyplot(plt)
-st.markdown("It is very clear that despite imputing our data, there are still tons of outliers, which would make running models difficult. Let's try a log transform of our numerical columns to see what difference we can make.")
-
-st.markdown("## Log Transform for Outliers")
-st.markdown("We have clearly seen that the distributions of each of the numeric variables are not very close to any known distribution and are very skewed in many cases. How would a log transformation to some of those columns affect some relationships?")
-
-st.markdown("## Transformed vs. Non-Transformed Numeric Columns")
-product_purchase["LOG_HEIGHT"] = np.log(product_purchase["HEIGHT_INCHES"])
-product_purchase["LOG_WIDTH"] = np.log(product_purchase["WIDTH_INCHES"])
-product_purchase["LOG_DEPTH"] = np.log(product_purchase["DEPTH_INCHES"])
-product_purchase["LOG_WEIGHT"] = np.log(product_purchase["WEIGHT_GRAMS"])
-st.dataframe(product_purchase[['LOG_HEIGHT', 'LOG_WIDTH', 'LOG_DEPTH', 'LOG_WEIGHT']].describe())
-fig, axs = plt.subplots(2, 2, figsize=(15,12))
-sns.histplot(data=product_purchase, x="LOG_HEIGHT", kde=False, bins=50, ax=axs[0,0], color='red', alpha=0.5, label='Log Height')
-sns.histplot(data=product_purchase, x="HEIGHT_INCHES", kde=False, bins=range(0, 20), ax=axs[0, 0], color='blue', alpha=0.5, label='Height')
-axs[0,0].set_xlim(0,20)
-axs[0,0].set_xlabel("Height (in)")
-axs[0,0].legend()
-axs[0,0].grid(True)
-sns.histplot(data=product_purchase, x="LOG_WIDTH", kde=False, bins=50, ax=axs[0,1], color='red', alpha=0.5, label='Log Width')
-sns.histplot(data=product_purchase, x="WIDTH_INCHES", kde=False, bins=range(0, 20), ax=axs[0,1], color='blue', alpha=0.5, label='Width')
-axs[0,1].set_xlim(0,20)
-axs[0,1].set_xlabel("Width (in)")
-axs[0,1].legend()
-axs[0,1].grid(True)
-sns.histplot(data=product_purchase, x="LOG_DEPTH", kde=False, bins=50, ax=axs[1,0], color="red", alpha=0.5, label="Log Depth")
-sns.histplot(data=product_purchase, x="DEPTH_INCHES", kde=False, bins=range(0, 20), ax=axs[1,0], color='blue', alpha=0.5, label='Depth')
-axs[1,0].set_xlabel("Depth (in)")
-axs[1,0].legend()
-axs[1,0].grid(True)
-sns.histplot(data=product_purchase, x="LOG_WEIGHT", kde=False, bins=100, ax=axs[1,1], color="red", alpha=0.5, label="Log Weight")
-sns.histplot(data=product_purchase, x="WEIGHT_GRAMS", bins=2000, kde=False, ax=axs[1,1], color="blue", alpha=0.5, label="Weight")
-axs[1,1].set_xlim(0,1000)
-axs[1,1].set_xlabel("Weight (g)")
-axs[1,1].legend()
-axs[1,1].grid(True)
-fig.tight_layout()
-st.pyplot(fig)
-st.markdown("From the plots it is clear that we have shrank down the data in all dimensions, especially weight. The data is significantly more normalized and less skewed, and there are far fewer outliers.")
-
-st.markdown("## Relationships between log height, width, and depth to weight")
-fig, axs = plt.subplots(1, 3, figsize=(15, 12))
-sns.regplot(data = product_purchase, x = "LOG_HEIGHT", y = "LOG_WEIGHT", ax = axs[0])
-axs[0].set_xlabel(r"Log Height (in)")
-axs[0].set_ylabel("Log Weight (g)")
-axs[0].grid(True)
-sns.regplot(data = product_purchase, x = "LOG_WIDTH", y = "LOG_WEIGHT", ax = axs[1])
-axs[1].set_xlabel(r"Log Width (in)")
-axs[1].set_ylabel("Log Weight (g)")
-axs[1].grid(True)
-sns.regplot(data = product_purchase, x = "LOG_DEPTH", y = "LOG_WEIGHT", ax = axs[2])
-axs[2].set_xlabel(r"Log Width (in)")
-axs[2].set_ylabel("Log Weight (g)")
-axs[2].grid(True)
-fig.tight_layout()
-st.pyplot(fig)
-
-st.markdown("## Side-by-Side Boxplot of Log Weight by Department")
-plt.figure(figsize = (12,6))
-sns.boxplot(data = product_purchase, x = "LOG_WEIGHT", y = "DEPARTMENT_NAME")
-plt.ylabel("Department Name")
-plt.xlabel("Log Weight (grams)")
-st.pyplot(plt)
-st.markdown("log transform helps a ton with bringing in outliers, we no longer have points greater than 13.")
-
-st.markdown("## Log-Volume vs. Volume")
-product_purchase["LOG_VOLUME"] = np.log(product_purchase["VOLUME_INCHES"])
-fig, axs = plt.subplots(1, 2, figsize=(15, 12))
-sns.histplot(data=product_purchase, x="LOG_VOLUME", bins=50, kde=False, color="red", alpha=0.5, label="Log Volume", ax=axs[0])
-sns.histplot(data=product_purchase, x="VOLUME_INCHES", bins=range(0,2000,50), kde=False, color="blue", alpha=0.5, label="Volue", ax=axs[1])
-axs[0].set_xlabel("Log Volume")
-axs[1].set_xlabel("Volume")
-axs[0].legend()
-axs[1].legend()
-st.pyplot(fig)
-st.markdown("From this plot it is very clear that we have shrunk down our volume and nearly removed any skew.")
-
-st.markdown("### Log Volume by Department")
-plt.figure(figsize = (12,6))
-sns.boxplot(data = product_purchase, x = "LOG_VOLUME", y = "DEPARTMENT_NAME")
-plt.xlim(0,10)
-plt.ylabel("Department Name")
-plt.xlabel(r"Log Item Volume (in$^3$)")
-st.pyplot(plt)
-st.markdown("Box plot looks much cleaner, compared to all of the outliers from earlier. all of the data is centered from 0 to 12.")
-
-st.markdown("## Log-Density vs. Density")
-product_purchase["LOG_DENSITY"] = np.log(product_purchase["DENSITY"])
-fig, axs = plt.subplots(1, 2, figsize=(15, 12))
-sns.histplot(data=product_purchase, x="LOG_DENSITY", bins=50, kde=False, color="red", ax=axs[0], alpha=.5, label="Log Density")
-sns.histplot(data=product_purchase, x="DENSITY", bins=100, kde=False, color="blue", ax=axs[1], alpha=0.5, label="Density")
-axs[0].set_xlabel("Log Density")
-axs[1].set_xlabel("Density")
-axs[0].set_xlim(-5, 4)
-axs[1].set_xlim(0,10)
-axs[0].legend()
-axs[1].legend()
-st.pyplot(fig)
-st.markdown("Taking the log of volume and density significantly helps with the skewness of the data, and much more closely resembles something more similar to a normal.")
-
-st.markdown("## Imputing Log Values")
-st.markdown("Now that we have seen that log values have much better shape and can be used more easily, let's impute those log values and do the rest of the analysis on those.")
-log_dep_dims = product_purchase[["DEPARTMENT_NAME", "LOG_HEIGHT", "LOG_WIDTH", "LOG_DEPTH", "LOG_WEIGHT", "LOG_VOLUME", "LOG_DENSITY"]]
-log_dep_medians = log_dep_dims.groupby("DEPARTMENT_NAME").transform("median")
-# imputing with the median of each department
-log_imputed = product_purchase.copy()
-log_imputed["LOG_HEIGHT"] = log_imputed["LOG_HEIGHT"].fillna(log_dep_medians["LOG_HEIGHT"])
-log_imputed["LOG_WIDTH"] = log_imputed["LOG_WIDTH"].fillna(log_dep_medians["LOG_WIDTH"])
-log_imputed["LOG_DEPTH"] = log_imputed["LOG_DEPTH"].fillna(log_dep_medians["LOG_DEPTH"])
-log_imputed["LOG_WEIGHT"] = log_imputed["LOG_WEIGHT"].fillna(log_dep_medians["LOG_WEIGHT"])
-log_imputed["LOG_VOLUME"] = log_imputed["LOG_VOLUME"].fillna(log_dep_medians["LOG_VOLUME"])
-log_imputed["LOG_DENSITY"] = log_imputed["LOG_DENSITY"].fillna(log_dep_medians["LOG_DENSITY"])
-log_imputed = log_imputed[["PURCHASE_ID", "PRODUCT_ID", "QUANTITY", "PURCHASE_DATE_TIME", "DEPARTMENT_NAME", 
-                           "PURCHASE_DATE", "PURCHASE_TIME", "DAY_OF_WEEK", "LOG_HEIGHT", "LOG_WIDTH", "LOG_DEPTH",
-                           "LOG_WEIGHT", "LOG_VOLUME", "LOG_DENSITY"]]
-
-st.markdown("## Missing Data Matrix of Imputed Log Values")
-msno.matrix(log_imputed)
-plt.title("Imputed Log Missing Data Matrix")
-st.pyplot(plt)
-
-st.markdown("## Correlation Matrix of Numerical Columns")
-st.markdown("seeing how numeric columns are correlated with each other, and where we can possibly avoid multicollinearity down the road")
-numeric = log_imputed[["QUANTITY", "LOG_HEIGHT", "LOG_WIDTH", "LOG_DEPTH", "LOG_WEIGHT", "LOG_VOLUME"]]
-correlation_matrix = numeric.corr()
-mask = np.triu(np.ones_like(correlation_matrix, dtype=bool))
-custom_palette = sns.diverging_palette(220, 20, as_cmap=True, s=90, l=50)
-custom_palette.set_bad('white')
-plt.figure(figsize=(10,8))
-sns.heatmap(correlation_matrix, annot = True, cmap = custom_palette, fmt = ".2f", 
-            linewidths = 0.5, mask=mask, annot_kws={"size": 12})
-st.pyplot(plt)
-st.markdown("There really only seems to be correlation to `LOG_VOLUME`, which makes sense because it is calculated from `LOG_HEIGHT`, `LOG_WIDTH` and `LOG_DEPTH`.")
-
-st.markdown("# Market Basket Analysis: Apriori Algorithm")
-st.markdown("Seeing how certain departments are associated with each other based on order data. I'm not sure if the data provided here is customer data or what grocery stores buy from suppliers, but if it were customer data then there could be some helpful information about the layout of stores so robots do not have to travel as far to pick up highly associated items.")
-# grouping by order to find what departments they order most from
-basket = log_imputed.groupby(['PURCHASE_ID', 'DEPARTMENT_NAME'])["QUANTITY"].sum().unstack().reset_index().fillna(0).set_index('PURCHASE_ID')
-# encoding the basket
-def hot_encode(x): 
-    if(x<= 0): 
-        return True
-    if (x > 0): 
-        return False  
-basket_encoded = basket.map(hot_encode)
-basket = basket_encoded
-# applying the model
-frq_items = apriori(basket, min_support=.6, use_colnames=True)
-rules = association_rules(frq_items, metric='lift', min_threshold=1)
-# filtering to find one-to-one relationships between departments
-one_to_one = rules[(rules['antecedents'].apply(lambda x: len(x) == 1)) & 
-                         (rules['consequents'].apply(lambda x: len(x) == 1))]
-matching_pairs = []
-for consequent in one_to_one["consequents"].unique():
-    consequent_df = one_to_one[one_to_one["consequents"] == consequent]
-    antecedents = consequent_df["antecedents"].unique()
-    for antecedent in antecedents:
-        antecedent_df = one_to_one[one_to_one["antecedents"] == antecedent]
-        for index, row in antecedent_df.iterrows():
-            if row['consequents'] == consequent:
-                matching_pairs.append((consequent, antecedent))
-matching_consequents = set(pair[0] for pair in matching_pairs)
-matching_antecedents = set(pair[1] for pair in matching_pairs)
-two_way = one_to_one[
-    (one_to_one['consequents'].isin(matching_consequents)) & 
-    (one_to_one['antecedents'].isin(matching_antecedents))
-]
-two_way = two_way.sort_values(['confidence', 'lift'], ascending=[False, False])
-high_conf = two_way[two_way["confidence"] >= .95]
-st.dataframe(high_conf.head())
-st.markdown("The confidence value in this table represents the probability that one department is present if another one is present. For example, the top value of the table is household and books, cards and magazines, and the confidence value  is 0.999707. This means that 99.97% of the orders that contain household values also contain a books, cards and magazines item.")
-st.markdown("If this is customer data, then we can take this data to help change the layout of a store, placing the household department next to books, cards and magazines. Therefore the robots will not have to travel as far and we can save energy. ")
-
-st.markdown("## Directed Graph of Highly Associated Departments")
-G = nx.DiGraph()
-
-for _, row in high_conf.iterrows():
-    antecedent = list(row['antecedents'])[0]
-    consequent = list(row['consequents'])[0]
-    confidence = round(row['confidence'], 2)
-    
-    G.add_edge(antecedent, consequent, weight=confidence)
-
-pos = nx.shell_layout(G)
-plt.figure(figsize=(12, 8))
-nx.draw(G, pos, with_labels=True, node_size=3000, node_color='skyblue', font_size=10, font_weight='bold', arrows=True)
-labels = nx.get_edge_attributes(G, 'weight')
-nx.draw_networkx_edge_labels(G, pos, edge_labels=labels)
-
-plt.title('Directed Graph of Association Rules (Confidence Greater than 0.95)')
-st.pyplot(plt)
-
-st.markdown("Here are the most highly associated departments (confidence >= .95), meaning that orders with one department are highly more likely to contain orders from another department. These are all two-way relationships, but I was having some issues making sure that all the arrows were in two directions.")
+
+def _figure_title(figure):
+    if figure.get_suptitle():
+        return figure.get_suptitle()
+    if not figure.axes:
+        return "empty figure"
+    # one titled axes names the figure; facet titles don't
+    titles = [ax.get_title() for ax in figure.axes if ax.get_title()]
+    ax = figure.axes[0]
+    labels = " by ".join(label for label in (ax.get_ylabel(), ax.get_xlabel()) if label)
+    name = (titles[0] if len(titles) == 1 else labels) or "chart"
+    return name if len(figure.axes) == 1 else f"{name} ({len(figure.axes)} panels)"
+
+
+def pyplot(fig, **kwargs):
+    """``st.pyplot``, recorded as a chart render named after the figure's title."""
+    figure = plt.gcf() if fig is plt else getattr(fig, "figure", fig)
+    title = _figure_title(figure)
+    st.pyplot(fig, **kwargs)
+    instrument.checkpoint(title)
+
+
+def show_panels(panels, ncols, figsize):
+    """Render ``(draw, args, kwargs, title)`` panels on the pool, ``ncols`` per row."""
+    images = render_panels(panels, workers, figsize=figsize)
+    for start in range(0, len(images), ncols):
+        for column, image in zip(st.columns(ncols), images[start:start + ncols]):
+            column.image(image)
+    instrument.checkpoint(f"{len(images)} panels")
+
+
+def show_facets(panels, ncols, figsize):
+    """Panels like :func:`show_panels`, drawn as one figure with a shared y
+    axis when there is no worker pool."""
+    if workers > 1:
+        show_panels(panels, ncols, figsize)
+        return
+    nrows = -(-len(panels) // ncols)
+    fig, axs = plt.subplots(nrows, ncols, figsize=(15, 3 * nrows), sharey=True, squeeze=False)
+    for ax, (draw, args, kwargs, title) in zip(axs.flat, panels):
+        draw(ax, *args, **kwargs)
+        ax.set_title(title)
+    for ax in axs.flat[len(panels):]:
+        ax.set_axis_off()
+    fig.tight_layout()
+    # Streamlit's default of 200 dpi makes encoding the PNG most of the cost
+    pyplot(fig, dpi=100)
+
+
+def show_missingness(profile, frame, title):
+    """Summary charts of a missing-data profile, and a sampled row view of ``frame`` on request."""
+    fig, axs = plt.subplots(2, 2, figsize=(15, 12))
+    pattern_matrix(axs[0, 0], profile["patterns"])
+    axs[0, 0].set_title("Null patterns")
+    null_share_bars(axs[0, 1], profile["columns"])
+    axs[0, 1].set_title("Missing values per column")
+    share_heatmap(axs[1, 0], profile["by_group"])
+    axs[1, 0].set_title("By department")
+    share_heatmap(axs[1, 1], profile["over_time"])
+    axs[1, 1].set_title("By purchase date (sampled line items)")
+    fig.suptitle(title)
+    fig.tight_layout()
+    pyplot(fig)
+    if st.checkbox("Show a sample of rows", key=title):
+        fig, ax = plt.subplots(figsize=(15, 6))
+        sampled_matrix(ax, frame)
+        ax.set_title(f"{title} (sample)")
+        pyplot(fig)
+
+
+def window_filters(windows):
+    """Sidebar filters of the windowed sections: ``(start, end, hours, departments)``.
+
+    The widgets have fixed keys, so the window carries over between the
+    sections that show them.
+    """
+    first, last = date_range(windows)
+    st.sidebar.markdown("### Time window")
+    dates = st.sidebar.date_input("Dates", (first, last), min_value=first, max_value=last, key="window_dates")
+    # a range is a single date while its end is being picked
+    dates = tuple(dates) or (first, last)
+    hours = st.sidebar.slider("Hours", 0, 23, HOURS, key="window_hours")
+    departments = st.sidebar.multiselect("Departments", windows["departments"], key="window_departments",
+                                         placeholder="All departments")
+    return dates[0], dates[-1], hours, departments
+
+
+def scatter_grid(nrows, ncols, panels, weights):
+    """Regression panels (dicts of :func:`regression` arguments), row by row."""
+    panels = [{**panel, **scatter, "weights": weights, "grid": True} for panel in panels]
+    if workers > 1:
+        show_panels([(regression, (), panel, None) for panel in panels], ncols,
+                    figsize=(15 / ncols, 12 / nrows))
+        return
+    fig, axs = plt.subplots(nrows, ncols, figsize=(15, 12))
+    for ax, panel in zip(axs.flat, panels):
+        regression(ax, **panel)
+    fig.tight_layout()
+    pyplot(fig)
+
+
+@section("Overview", "product", "purchase_header", "line_sample", "memory", "quality", "cubes")
+def overview(product, purchase_header, line_sample, memory, quality, cubes):
+    st.markdown("## Getting an idea of what the data looks like")
+    st.dataframe(product.head())
+    st.dataframe(purchase_header.head())
+
+    st.markdown("### Line items joined to their purchase and product")
+    st.write(f"A random sample of {len(line_sample):,} line items, in file order; the full line file is only "
+             "read in chunks.")
+    st.dataframe(line_sample.head())
+
+    st.markdown("### Memory footprint")
+    typed, untyped = memory["bytes"].sum(), memory["default_bytes"].sum()
+    st.write(f"The tables and line sample take {typed / 2**20:.1f} MiB with the types of `eda.schema` (int32, "
+             f"float32, categories), down from {untyped / 2**20:.1f} MiB with pandas' default types "
+             f"({1 - typed / untyped:.0%} less).")
+    st.dataframe(memory.groupby("table", sort=False)[["bytes", "default_bytes"]].sum())
+    st.dataframe(memory, hide_index=True)
+
+    st.markdown("### Invalid Data Types")
+    st.markdown("Seeing if there are numeric points that are impossible (negative height, etc.) and replacing them with NA")
+    st.markdown("Dimensions only depend on the product, so every product is checked once against the rules in `eda.quality`. A product with any non-positive dimension has all of its dimensions set to NA; outliers within each department (on the log scale) and implausible densities are only flagged.")
+    st.dataframe(quality["summary"], hide_index=True)
+    rule = st.selectbox("Products failing", quality["summary"]["rule"])
+    st.dataframe(flagged(product.drop_duplicates("PRODUCT_ID").set_index("PRODUCT_ID"), quality, rule))
+
+    st.markdown("## Data Frame Contents")
+    st.write(f"There are {cubes['lines_per_order']['ORDERS'].sum()} unique orders.")
+    st.write(f"There are {cubes['lines_per_product']['PRODUCTS'].sum()} unique products.")
+
+
+@section("Missing data", "missingness", "line_sample", "product_dims")
+def missing_data(missingness, line_sample, product_dims):
+    st.markdown("## Missing Data Matrix")
+    show_missingness(missingness, with_product_columns(line_sample, product_dims, DIMENSIONS),
+                     "Missing Data Matrix")
+    st.markdown("I will be imputing the missing data later in this report, but I wanted to see some of the interactions between columns before doing so.")
+
+
+@section("Orders & departments", "cubes", "line_sample")
+def orders_and_departments(cubes, line_sample):
+    cube = cubes["department_time"]
+
+    st.markdown("## Distribution of number of items per order")
+    order_counts = cubes["lines_per_order"]
+    plt.figure(figsize=(10, 6))
+    sns.histplot(order_counts, x="LINES", weights="ORDERS", bins=range(order_counts["LINES"].min(), 95, 2), kde=False)
+    plt.xlabel("Total Number of Items in an Order")
+    plt.ylabel("Number of Occurrences")
+    pyplot(plt)
+    st.markdown("Most of the orders in the dataset contain between 5 and 25 items.")
+
+    st.markdown("## Distribution of items per product")
+    product_counts = cubes["lines_per_product"]
+    plt.figure(figsize=(10, 6))
+    sns.histplot(product_counts, x="LINES", weights="PRODUCTS", bins=range(0, 100, 2), kde=False)
+    plt.xlabel("Number of Items of Each Product in an Order")
+    pyplot(plt)
+    st.markdown("Most orders do not exceed 10 of a specific product.")
+
+    st.markdown("## Distribution of number of items from each department")
+    department_counts = rollup(cube, "DEPARTMENT_NAME", "QUANTITY")
+    department_counts = department_counts.sort_values()
+    plt.figure()
+    department_counts.plot(kind="barh")
+    plt.ylabel("Department Name")
+    plt.xlabel("Total Number of Items Purchased")
+    pyplot(plt)
+    st.markdown("Produce is by far the most popular department when it comes to most items ordered.")
+
+    st.markdown("### Investigating Produce a Little Further")
+    st.write(f"Number of produce items purchased: {round(department_counts.get('Produce', 0), 2)}")
+    st.markdown("That's interesting, not every item purchased is an integer. Let's see a few examples.")
+    st.dataframe(line_sample[(line_sample["DEPARTMENT_NAME"] == "Produce") & (line_sample['QUANTITY'] % 1 != 0)].head())
+    st.markdown("It seems like a lot of produce purchases are in halves or quarters, so this could indicate weight rather than count.")
+
+    st.markdown("Produce might be the most popular when it comes to most items ordered, but which department appears in the most orders?")
+    st.markdown("### Distribution of most popular departments per order")
+    order_counts = rollup(cube, "DEPARTMENT_NAME")
+    order_counts = order_counts.sort_values()
+    plt.figure()
+    order_counts.plot(kind="barh")
+    plt.ylabel("Department Name")
+    plt.xlabel("Total Number of Orders that Include Each Department")
+    pyplot(plt)
+    st.markdown("Produce is still the most commonly ordered department, but it is not overwhelming like it was by item.")
+    st.markdown("This makes sense because most produce items are not bought individually like items from other departments (e.g. multiple apples vs. a stick of deodorant)")
+
+
+@section("Dimensions", "product_dims", "line_counts")
+def dimensions(product_dims, line_counts):
+    st.markdown("## Distribution of Each Numeric Column")
+    fig, axs = plt.subplots(2, 2, figsize=(15,12))
+    histogram(axs[0, 0], product_dims["HEIGHT_INCHES"], weights=line_counts, bins=range(0, 30), xlabel="HEIGHT_INCHES")
+    axs[0,0].grid(True)
+    histogram(axs[0,1], product_dims["WIDTH_INCHES"], weights=line_counts, bins=range(0, 30), xlabel="WIDTH_INCHES")
+    axs[0,1].grid(True)
+    histogram(axs[1,0], product_dims["DEPTH_INCHES"], weights=line_counts, bins=range(0, 30), xlabel="DEPTH_INCHES")
+    axs[1,0].grid(True)
+    histogram(axs[1,1], product_dims["WEIGHT_GRAMS"], weights=line_counts, bins=500, xlabel="WEIGHT_GRAMS")
+    axs[1,1].set_xlim(0,5000)
+    axs[1,1].grid(True)
+    fig.tight_layout()
+    pyplot(fig)
+    st.markdown("As expected, height, width, depth and weight are right-skewed, as there are typically fewer products with more extreme dimensions.")
+
+    st.markdown("#### How Height, Weight, and Depth Affect Weight")
+    scatter_grid(1, 3, [
+        dict(x=product_dims["HEIGHT_INCHES"], y=product_dims["WEIGHT_GRAMS"], xlim=(0, 30), ylim=(0, 20000), xlabel=r"Height (in)", ylabel="Weight (g)"),
+        dict(x=product_dims["WIDTH_INCHES"], y=product_dims["WEIGHT_GRAMS"], xlim=(0,30), ylim=(0, 20000), xlabel=r"Width (in)", ylabel="Weight (g)"),
+        dict(x=product_dims["DEPTH_INCHES"], y=product_dims["WEIGHT_GRAMS"], xlim=(0, 30), ylim=(0, 20000), xlabel=r"Depth (in)", ylabel="Weight (g)"),
+    ], line_counts)
+    st.markdown("There seems to be some subtle linear trend between height and width to volume, but surprisingly depth has the most strong linear trend.")
+
+    st.markdown("## Side-by-side Boxplots of Departments vs. Weight")
+    plt.figure(figsize = (12,6))
+    plt.xlim(0, 10000) # ignoring outliers, getting a closer look at the boxes
+    boxplot(plt.gca(), product_dims["WEIGHT_GRAMS"], product_dims["DEPARTMENT_NAME"], weights=line_counts, workers=workers, approximate=approximate)
+    plt.ylabel("Department Name")
+    plt.xlabel("Weight (grams)")
+    pyplot(plt)
+    st.markdown("The heaviest departments are beverage and alcohol, which makes sense because many of those products come in boxes and packs of multiple cans/bottles.")
+    st.markdown("This data contains a ton of outliers, and there was one dairy item that weighed over 120,000 grams, which I'd assume was a bulk order of something like milk jugs.")
+    st.markdown("The lightest departments were personal care and babies, which is understandable because of items like deodorant, toothpaste or diapers.")
+
+
+@section("Dates & times", "windows")
+def dates_and_times(windows):
+    start, end, hours, departments = window_filters(windows)
+    cube = window_cube(windows, start, end, hours, departments)
+
+    st.markdown("## Distributions of Date and Times")
+    st.markdown("For this section I split the `PURCHASE_DATE_TIME` column into just the date and just the time of day.")
+    st.caption(f"Purchases from {start:%m/%d/%Y} to {end:%m/%d/%Y}, {hours[0]}:00 to {hours[1]}:59, "
+               f"{', '.join(departments) or 'all departments'}; see the time window in the sidebar.")
+    if cube.empty:
+        st.info("There are no purchases in the selected window.")
+        return
+
+    # plot
+    fig, ax = plt.subplots(figsize=(10,6))
+    date_counts = rollup(cube, "PURCHASE_DATE")
+    # bars on a date axis; a year of dates as categorical ticks is slow to draw
+    ax.bar(date_counts.index, date_counts.to_numpy(), width=.8)
+    fig.autofmt_xdate(rotation=90)
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Number of Purhcases")
+    pyplot(fig)
+    st.markdown("This data contains dates from 3/25/2020 to 4/12/2020, but most of the data takes place in April, with April 6th and 7th being the two most popular dates.")
+
+    # plot
+    fig, ax = plt.subplots(figsize=(10,6))
+    date_counts = rollup(cube, "DAY_OF_WEEK").reindex(range(7), fill_value=0)
+    date_counts.index = [DAY_NAMES[day] for day in date_counts.index]
+    date_counts.plot(kind="bar")
+    ax.set_xlabel("Day of the Week")
+    ax.set_ylabel("Number of Purchases")
+    pyplot(fig)
+    st.markdown("Unfortunately all days of the week seem relatively uniform, let's dig into the top 10 most popular departments to see if there are any trends between department and day of the week.")
+
+    st.markdown("### Finding the top 10 most common departments")
+    department_counts = rollup(cube, "DEPARTMENT_NAME", "QUANTITY")
+    most_popular = department_counts.sort_values(ascending=False).head(10)
+    top_10_depts = most_popular.index.tolist()
+    most_pop_depts = cube[cube["DEPARTMENT_NAME"].isin(top_10_depts)]
+    most_pop_depts["DEPARTMENT_NAME"] = most_pop_depts["DEPARTMENT_NAME"].cat.remove_unused_categories()
+    st.markdown("Top 10 most popular departments:")
+    st.write(top_10_depts)
+    # plot
+    st.markdown("### Days of the Week Distribution of Top 10 Departments")
+    plt.figure(figsize=(16,10))
+    day_counts = rollup(most_pop_depts, ["DEPARTMENT_NAME", "DAY_OF_WEEK"]).reset_index()
+    day_counts["DAY_OF_WEEK"] = pd.Categorical.from_codes(day_counts["DAY_OF_WEEK"], DAY_NAMES, ordered=True)
+    show_facets([(bars, (DAY_NAMES, part.groupby("DAY_OF_WEEK", observed=False)["LINES"].sum().to_numpy()),
+                  {"ylabel": "LINES"}, f"DEPARTMENT_NAME = {department}")
+                 for department, part in day_counts.groupby("DEPARTMENT_NAME", observed=True)],
+                ncols=2, figsize=(15, 10))
+    st.markdown("Surprisingly, there is not a specific trend with some departments being purchased on certain days of the week, all these distributions closely resemble the total distribution.")
+
+    st.markdown("### Most Popular Times of Day")
+    fig, ax = plt.subplots(figsize=(10,6))
+    hour_counts = rollup(cube, "HOUR")
+    hour_counts.plot(kind="bar")
+    ax.set_xlabel("Time (hour)")
+    pyplot(fig)
+    st.markdown("The middle of the day (10am - 2pm) seems to be the most popular for purchases.")
+
+    st.markdown("### Most Popular Times of Day by Top 10 Departments")
+    hour_by_dept = rollup(most_pop_depts, ["DEPARTMENT_NAME", "HOUR"]).reset_index()
+    show_facets([(histogram, (part["HOUR"],), {"bins": range(25), "weights": part["LINES"], "xlabel": "HOUR"},
+                  f"DEPARTMENT_NAME = {department}")
+                 for department, part in hour_by_dept.groupby("DEPARTMENT_NAME", observed=True)],
+                ncols=2, figsize=(15, 10))
+    st.markdown("Again, there seems to be no correlation between department and time of day of purchase, and each of these subplots seems to resemble the total distribution.")
+
+
+@section("Volume & density", "product_dims", "line_counts")
+def volume_and_density(product_dims, line_counts):
+    st.markdown("## Creating a Volume Column")
+    fig, ax = plt.subplots(figsize=(10,6))
+    histogram(ax, product_dims["VOLUME_INCHES"], weights=line_counts, bins=range(0,2000,50), xlabel="VOLUME_INCHES")
+    pyplot(fig)
+    st.markdown("Volume is very heavily right-skewed, with the majority of the data between 0 and 250 in$^3$")
+
+    st.markdown("### Volume by Department")
+    plt.figure(figsize = (12,6))
+    boxplot(plt.gca(), product_dims["VOLUME_INCHES"], product_dims["DEPARTMENT_NAME"], weights=line_counts, workers=workers, approximate=approximate)
+    plt.xlim(0, 1750) # ignoring outliers, getting a closer look at the boxes
+    plt.xticks(rotation=90)
+    plt.ylabel("Department Name")
+    plt.xlabel(r"Item Volume (in$^3$)")
+    pyplot(plt)
+    st.markdown("Alcohol by far the department with the most voluminous items.")
+    st.markdown("Many alcoholic beverages come in 12-packs or large bottles, so this makes sense.")
+
+    st.markdown("## Dimensions (height, width, depth, weight) vs. Volume Scatterplots")
+    scatter_grid(2, 2, [
+        dict(x=product_dims["HEIGHT_INCHES"], y=product_dims["VOLUME_INCHES"], xlim=(0, 40), ylim=(0, 5000), xlabel=r"Height (in)", ylabel=r"Volume (in$^3$)"),
+        dict(x=product_dims["WIDTH_INCHES"], y=product_dims["VOLUME_INCHES"], xlim=(0,25), ylim=(0, 5000), xlabel=r"Width (in)", ylabel=r"Volume (in$^3$)"),
+        dict(x=product_dims["DEPTH_INCHES"], y=product_dims["VOLUME_INCHES"], xlim=(0, 25), ylim=(0, 5000), xlabel=r"Depth (in)", ylabel=r"Volume (in$^3$)"),
+        dict(x=product_dims["WEIGHT_GRAMS"], y=product_dims["VOLUME_INCHES"], xlim=(0, 6000), ylim=(0, 5000), xlabel=r"Weight (g)", ylabel=r"Volume (in$^3$)"),
+    ], line_counts)
+    st.markdown("There seems to be a strong positive linear trend between height, width and depth width volume as expected because of the volume formula, but not as much with weight.")
+
+    st.markdown("## Creating a Density Column")
+    st.markdown("To do this, I need to create a `VOLUME_CM` column from `VOLUME_INCHES` for the correct units.")
+    fig, ax = plt.subplots(figsize=(10,6))
+    histogram(ax, product_dims["DENSITY"], weights=line_counts, bins=100, xlabel="DENSITY")
+    ax.set_xlim(0,10)
+    pyplot(fig)
+    st.markdown("Majority of density values fall between 0 and 1 g/cm$^3$.")
+
+    st.markdown("### Density vs. Other Dimensionality Values")
+    scatter_grid(3, 2, [
+        dict(x=product_dims["HEIGHT_INCHES"], y=product_dims["DENSITY"], xlim=(0, 40), ylim=(0, 30), xlabel=r"Height (in)", ylabel="Density"),
+        dict(x=product_dims["WIDTH_INCHES"], y=product_dims["DENSITY"], xlim=(0,25), ylim=(0, 50), xlabel=r"Width (in)", ylabel="Density"),
+        dict(x=product_dims["DEPTH_INCHES"], y=product_dims["DENSITY"], xlim=(0, 25), ylim=(0, 50), xlabel=r"Depth (in)", ylabel="Density"),
+        dict(x=product_dims["VOLUME_INCHES"], y=product_dims["DENSITY"], xlim=(0, 4000), ylim=(0, 50), xlabel=r"Volume (in$^3$)", ylabel="Density)"),
+        dict(x=product_dims["WEIGHT_GRAMS"], y=product_dims["DENSITY"], xlim=(0, 6000), ylim=(0, 50), xlabel="Weight (g)", ylabel="Density)"),
+    ], line_counts)
+    st.markdown("The `regplot()` function in Python usually only plots a regression line when there is a present trend. In this case this does not seem to be the case with any dimensions and density.")
+
+
+@section("Imputation", "imputed_dims", "imputed_cells", "imputed_sample", "imputed_missingness", "line_counts")
+def imputation(imputed_dims, imputed_cells, imputed_sample, imputed_missingness, line_counts):
+    st.markdown("## Imputing Missing Values")
+    st.markdown("It was clear from the first missing data matrix that this dataset has a ton of missing data, specifically in the height, width, depth and weight columns.")
+    st.markdown("I will be filling those missing values with the department-wise mean of that specific column.")
+
+    st.markdown("Imputed values per column (products, and the line items they cover):")
+    st.dataframe(imputed_cells)
+
+    show_missingness(imputed_missingness, imputed_sample, "Imputed Missing Data Matrix")
+    st.markdown("Now there are only 767 missing values in the entire dataset.")
+    st.markdown("After some investigation, these values were caused by 3 departments not having any dimension data for their products.")
+    st.markdown("These departments were Books, Cards, & Magazines, Floral, and Popular.")
+
+    st.markdown("## Redoing Scatter Plots to Identify Trends")
+    st.markdown("Now that data has been imputed, I will redo some of these scatter plots with regression lines to identify how imputation has impacted the trends.")
+    st.markdown("### Imputed Height, Width, Depth vs. Volume")
+    scatter_grid(1, 3, [
+        dict(x=imputed_dims["HEIGHT_INCHES"], y=imputed_dims["WEIGHT_GRAMS"], xlim=(0, 30), ylim=(0, 20000), xlabel=r"Height (in)", ylabel="Weight (g)"),
+        dict(x=imputed_dims["WIDTH_INCHES"], y=imputed_dims["WEIGHT_GRAMS"], xlim=(0,30), ylim=(0, 20000), xlabel=r"Width (in)", ylabel="Weight (g)"),
+        dict(x=imputed_dims["DEPTH_INCHES"], y=imputed_dims["WEIGHT_GRAMS"], xlim=(0, 30), ylim=(0, 20000), xlabel=r"Depth (in)", ylabel="Weight (g)"),
+    ], line_counts)
+    st.markdown("After imputation, there does not seem to be any changes to the linear trends, which is a good sign if we were to run models.")
+
+    st.markdown("### Imputed Dimensions vs. Volume")
+    scatter_grid(2, 2, [
+        dict(x=imputed_dims["HEIGHT_INCHES"], y=imputed_dims["VOLUME_INCHES"], xlim=(0, 40), ylim=(0, 6000), xlabel="Height (in)", ylabel=r"Volume (in$^3$)"),
+        dict(x=imputed_dims["WIDTH_INCHES"], y=imputed_dims["VOLUME_INCHES"], xlim=(0,25), ylim=(0, 6000), xlabel=r"Width (in)", ylabel=r"Volume (in$^3$)"),
+        dict(x=imputed_dims["DEPTH_INCHES"], y=imputed_dims["VOLUME_INCHES"], xlim=(0, 25), ylim=(0, 6000), xlabel=r"Depth (in)", ylabel=r"Volume (in$^3$)"),
+        dict(x=imputed_dims["WEIGHT_GRAMS"], y=imputed_dims["VOLUME_INCHES"], xlim=(0, 5000), ylim=(0, 6000), xlabel="Weight (g)", ylabel=r"Volume (in$^3$)"),
+    ], line_counts)
+
+    st.markdown("### Imputed Dimensions vs. Density")
+    scatter_grid(3, 2, [
+        dict(x=imputed_dims["HEIGHT_INCHES"], y=imputed_dims["DENSITY"], xlim=(0, 40), ylim=(0, 30), xlabel=r"Height (in)", ylabel="Density"),
+        dict(x=imputed_dims["WIDTH_INCHES"], y=imputed_dims["DENSITY"], xlim=(0,25), ylim=(0, 50), xlabel=r"Width (in)", ylabel="Density"),
+        dict(x=imputed_dims["WIDTH_INCHES"], y=imputed_dims["DENSITY"], xlim=(0, 25), ylim=(0, 50), xlabel=r"Width (in)", ylabel="Density"),
+        dict(x=imputed_dims["VOLUME_INCHES"], y=imputed_dims["DENSITY"], xlim=(0, 4000), ylim=(0, 50), xlabel=r"Volume (in$^3$)", ylabel="Density)"),
+        dict(x=imputed_dims["WEIGHT_GRAMS"], y=imputed_dims["DENSITY"], xlim=(0, 6000), ylim=(0, 50), xlabel="Weight (g)", ylabel="Density)"),
+    ], line_counts)
+    st.markdown("It does not look like the imputation changed anything about the trends between our numerical columns.")
+    st.markdown("This is a great sign for model-building, as the filling of missing data did not affect the dataset very much, and if anything just decreased the proportion of outliers.")
+
+    st.markdown("## Side-by-side boxplots of imputed data")
+    st.markdown("### Department vs. Weight")
+    plt.figure(figsize = (12,6))
+    plt.xlim(0, 10000) # ignoring outliers, getting a closer look at the boxes
+    boxplot(plt.gca(), imputed_dims["WEIGHT_GRAMS"], imputed_dims["DEPARTMENT_NAME"], weights=line_counts, workers=workers, approximate=approximate)
+    plt.xticks(rotation=90)
+    plt.ylabel("Department Name")
+    plt.xlabel("Weight (grams)")
+    pyplot(plt)
+    st.markdown("### Department vs. Volume")
+    plt.figure(figsize = (12,6))
+    boxplot(plt.gca(), imputed_dims["VOLUME_INCHES"], imputed_dims["DEPARTMENT_NAME"], weights=line_counts, workers=workers, approximate=approximate)
+    plt.xlim(0, 1750) # ignoring outliers, getting a closer look at the boxes
+    plt.xticks(rotation=90)
+    plt.ylabel("Department Name")
+    plt.xlabel(r"Item Volume (in$^3$)")
+    pyplot(plt)
+    st.markdown("It is very clear that despite imputing our data, there are still tons of outliers, which would make running models difficult. Let's try a log transform of our numerical columns to see what difference we can make.")
+
+
+@section("Log transforms", "product_dims", "line_counts")
+def log_transforms(product_dims, line_counts):
+    st.markdown("## Log Transform for Outliers")
+    st.markdown("We have clearly seen that the distributions of each of the numeric variables are not very close to any known distribution and are very skewed in many cases. How would a log transformation to some of those columns affect some relationships?")
+
+    st.markdown("## Transformed vs. Non-Transformed Numeric Columns")
+    st.dataframe(describe(product_dims, ['LOG_HEIGHT', 'LOG_WIDTH', 'LOG_DEPTH', 'LOG_WEIGHT'], weights=line_counts, approximate=approximate))
+    fig, axs = plt.subplots(2, 2, figsize=(15,12))
+    histogram(axs[0,0], product_dims["LOG_HEIGHT"], weights=line_counts, bins=50, color='red', alpha=0.5, label='Log Height')
+    histogram(axs[0, 0], product_dims["HEIGHT_INCHES"], weights=line_counts, bins=range(0, 20), color='blue', alpha=0.5, label='Height')
+    axs[0,0].set_xlim(0,20)
+    axs[0,0].set_xlabel("Height (in)")
+    axs[0,0].legend()
+    axs[0,0].grid(True)
+    histogram(axs[0,1], product_dims["LOG_WIDTH"], weights=line_counts, bins=50, color='red', alpha=0.5, label='Log Width')
+    histogram(axs[0,1], product_dims["WIDTH_INCHES"], weights=line_counts, bins=range(0, 20), color='blue', alpha=0.5, label='Width')
+    axs[0,1].set_xlim(0,20)
+    axs[0,1].set_xlabel("Width (in)")
+    axs[0,1].legend()
+    axs[0,1].grid(True)
+    histogram(axs[1,0], product_dims["LOG_DEPTH"], weights=line_counts, bins=50, color="red", alpha=0.5, label="Log Depth")
+    histogram(axs[1,0], product_dims["DEPTH_INCHES"], weights=line_counts, bins=range(0, 20), color='blue', alpha=0.5, label='Depth')
+    axs[1,0].set_xlabel("Depth (in)")
+    axs[1,0].legend()
+    axs[1,0].grid(True)
+    histogram(axs[1,1], product_dims["LOG_WEIGHT"], weights=line_counts, bins=100, color="red", alpha=0.5, label="Log Weight")
+    histogram(axs[1,1], product_dims["WEIGHT_GRAMS"], weights=line_counts, bins=2000, color="blue", alpha=0.5, label="Weight")
+    axs[1,1].set_xlim(0,1000)
+    axs[1,1].set_xlabel("Weight (g)")
+    axs[1,1].legend()
+    axs[1,1].grid(True)
+    fig.tight_layout()
+    pyplot(fig)
+    st.markdown("From the plots it is clear that we have shrank down the data in all dimensions, especially weight. The data is significantly more normalized and less skewed, and there are far fewer outliers.")
+
+    st.markdown("## Relationships between log height, width, and depth to weight")
+    scatter_grid(1, 3, [
+        dict(x=product_dims["LOG_HEIGHT"], y=product_dims["LOG_WEIGHT"], xlabel=r"Log Height (in)", ylabel="Log Weight (g)"),
+        dict(x=product_dims["LOG_WIDTH"], y=product_dims["LOG_WEIGHT"], xlabel=r"Log Width (in)", ylabel="Log Weight (g)"),
+        dict(x=product_dims["LOG_DEPTH"], y=product_dims["LOG_WEIGHT"], xlabel=r"Log Width (in)", ylabel="Log Weight (g)"),
+    ], line_counts)
+
+    st.markdown("## Side-by-Side Boxplot of Log Weight by Department")
+    plt.figure(figsize = (12,6))
+    boxplot(plt.gca(), product_dims["LOG_WEIGHT"], product_dims["DEPARTMENT_NAME"], weights=line_counts, workers=workers, approximate=approximate)
+    plt.ylabel("Department Name")
+    plt.xlabel("Log Weight (grams)")
+    pyplot(plt)
+    st.markdown("log transform helps a ton with bringing in outliers, we no longer have points greater than 13.")
+
+    st.markdown("## Log-Volume vs. Volume")
+    fig, axs = plt.subplots(1, 2, figsize=(15, 12))
+    histogram(axs[0], product_dims["LOG_VOLUME"], weights=line_counts, bins=50, color="red", alpha=0.5, label="Log Volume")
+    histogram(axs[1], product_dims["VOLUME_INCHES"], weights=line_counts, bins=range(0,2000,50), color="blue", alpha=0.5, label="Volue")
+    axs[0].set_xlabel("Log Volume")
+    axs[1].set_xlabel("Volume")
+    axs[0].legend()
+    axs[1].legend()
+    pyplot(fig)
+    st.markdown("From this plot it is very clear that we have shrunk down our volume and nearly removed any skew.")
+
+    st.markdown("### Log Volume by Department")
+    plt.figure(figsize = (12,6))
+    boxplot(plt.gca(), product_dims["LOG_VOLUME"], product_dims["DEPARTMENT_NAME"], weights=line_counts, workers=workers, approximate=approximate)
+    plt.xlim(0,10)
+    plt.ylabel("Department Name")
+    plt.xlabel(r"Log Item Volume (in$^3$)")
+    pyplot(plt)
+    st.markdown("Box plot looks much cleaner, compared to all of the outliers from earlier. all of the data is centered from 0 to 12.")
+
+    st.markdown("## Log-Density vs. Density")
+    fig, axs = plt.subplots(1, 2, figsize=(15, 12))
+    histogram(axs[0], product_dims["LOG_DENSITY"], weights=line_counts, bins=50, color="red", alpha=.5, label="Log Density")
+    histogram(axs[1], product_dims["DENSITY"], weights=line_counts, bins=100, color="blue", alpha=0.5, label="Density")
+    axs[0].set_xlabel("Log Density")
+    axs[1].set_xlabel("Density")
+    axs[0].set_xlim(-5, 4)
+    axs[1].set_xlim(0,10)
+    axs[0].legend()
+    axs[1].legend()
+    pyplot(fig)
+    st.markdown("Taking the log of volume and density significantly helps with the skewness of the data, and much more closely resembles something more similar to a normal.")
+
+
+@section("Log imputation", "log_sample", "log_missingness")
+def log_imputation(log_sample, log_missingness):
+    st.markdown("## Imputing Log Values")
+    st.markdown("Now that we have seen that log values have much better shape and can be used more easily, let's impute those log values and do the rest of the analysis on those.")
+
+    st.markdown("## Missing Data Matrix of Imputed Log Values")
+    show_missingness(log_missingness, log_sample, "Imputed Log Missing Data Matrix")
+
+    st.markdown("## Correlation Matrix of Numerical Columns")
+    st.markdown("seeing how numeric columns are correlated with each other, and where we can possibly avoid multicollinearity down the road")
+    st.write(f"Computed on the random sample of {len(log_sample):,} line items.")
+    numeric = log_sample[["QUANTITY", "LOG_HEIGHT", "LOG_WIDTH", "LOG_DEPTH", "LOG_WEIGHT", "LOG_VOLUME"]]
+    correlation_matrix = numeric.corr()
+    mask = np.triu(np.ones_like(correlation_matrix, dtype=bool))
+    custom_palette = sns.diverging_palette(220, 20, as_cmap=True, s=90, l=50)
+    custom_palette.set_bad('white')
+    plt.figure(figsize=(10,8))
+    sns.heatmap(correlation_matrix, annot = True, cmap = custom_palette, fmt = ".2f", 
+                linewidths = 0.5, mask=mask, annot_kws={"size": 12})
+    pyplot(plt)
+    st.markdown("There really only seems to be correlation to `LOG_VOLUME`, which makes sense because it is calculated from `LOG_HEIGHT`, `LOG_WIDTH` and `LOG_DEPTH`.")
+
+
+@section("Market basket", "two_way", "rule_graph", "windows")
+def market_basket(two_way, rule_graph, windows):
+    start, end, hours, departments = window_filters(windows)
+    st.markdown("# Market Basket Analysis: Apriori Algorithm")
+    st.markdown("Seeing how certain departments are associated with each other based on order data. I'm not sure if the data provided here is customer data or what grocery stores buy from suppliers, but if it were customer data then there could be some helpful information about the layout of stores so robots do not have to travel as far to pick up highly associated items.")
+    if (start, end) != date_range(windows) or tuple(hours) != HOURS or departments:
+        # the rules of the whole data set are precomputed; a window's are mined from its orders
+        two_way, n_orders = window_rules(windows, start, end, hours, departments)
+        rule_graph = build_rule_graph(two_way, min_weight=.95)
+        st.caption(f"Rules of the {n_orders:,} orders from {start:%m/%d/%Y} to {end:%m/%d/%Y}, "
+                   f"{hours[0]}:00 to {hours[1]}:59, between {', '.join(departments) or 'all departments'}.")
+    high_conf = two_way[two_way["confidence"] >= .95]
+    st.dataframe(high_conf.head())
+    st.markdown("The confidence value in this table represents the probability that one department is present if another one is present. For example, the top value of the table is household and books, cards and magazines, and the confidence value  is 0.999707. This means that 99.97% of the orders that contain household values also contain a books, cards and magazines item.")
+    st.markdown("If this is customer data, then we can take this data to help change the layout of a store, placing the household department next to books, cards and magazines. Therefore the robots will not have to travel as far and we can save energy. ")
+
+    st.markdown("## Graph of Highly Associated Departments")
+    fig, ax = plt.subplots(figsize=(12, 8))
+    draw_graph(ax, rule_graph)
+    ax.set_title('Association Rules with Confidence Greater than 0.95')
+    pyplot(fig)
+
+    st.markdown("Here are the most highly associated departments (confidence >= .95), meaning that orders with one department are highly more likely to contain orders from another department. Pairs where the rule holds in both directions are drawn as a single line labelled with both confidences (alphabetically first department to second, then back); an arrow marks a rule that only reaches 0.95 in one direction.")
+
+
+@section("Bought together", "copurchase", "product_dims")
+def bought_together(copurchase, product_dims):
+    st.markdown("# Products Bought Together")
+    st.markdown("The department rules above are too coarse for slotting individual products. For any product, these are the products most often found in the same orders, from a sparse index of every pair of products that was ever bought together.")
+    products = copurchase["products"]
+    departments = product_dims["DEPARTMENT_NAME"]
+    picker = st.columns(2)
+    product_id = picker[0].selectbox(f"Product (the {TOP_PRODUCTS:,} most ordered)", products.nlargest(TOP_PRODUCTS).index,
+                                     format_func=lambda id: f"{id} ({departments.get(id, 'unknown')}, {products[id]:,} orders)")
+    typed_id = picker[1].number_input("Or any product ID", min_value=0, value=None, step=1)
+    if typed_id is not None:
+        product_id = int(typed_id)
+        if product_id not in products.index:
+            st.warning(f"Product {product_id} isn't in any order.")
+            return
+    columns = st.columns(3)
+    by = columns[0].radio("Rank by", METRICS, index=2, horizontal=True)
+    min_orders = columns[1].number_input("Min. orders together", min_value=1, value=2,
+                                         help="Pairs bought together fewer times are left out; a single shared order gives rare products a huge lift")
+    k = columns[2].slider("Partners", min_value=5, max_value=50, value=10)
+    if product_id is None:
+        return
+    partners = top_partners(copurchase, product_id, k=k, by=by, min_orders=min_orders)
+    partners.insert(1, "DEPARTMENT_NAME", departments.reindex(partners["PRODUCT_ID"]).to_numpy())
+    st.dataframe(partners, hide_index=True)
+    st.markdown(f"Support is the share of all {copurchase['orders']:,} orders that contain both products, confidence the share of orders with product {product_id} that also contain the partner, and lift how much more often that happens than if the two were bought independently.")
+
+
+choice = st.radio("Section", list(SECTIONS), horizontal=True, label_visibility="collapsed")
+render, inputs = SECTIONS[choice]
+pipeline = get_pipeline(backend=backend, approximate=approximate)
+pipeline.configure(workers=workers)
+with instrument.collect() as records:
+    values = [pipeline.get(name) for name in inputs]
+    with instrument.track(choice, kind="section"):
+        render(*values)
+
+# stages are listed when this run computed them; later runs reuse the results
+with st.expander("Performance"):
+    st.dataframe(instrument.summary(records), hide_index=True)
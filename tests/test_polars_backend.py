@@ -0,0 +1,24 @@
+"""Both backends give the same aggregates, types included, on synthetic data."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from benchmarks.synthetic import generate  # noqa: E402
+from eda.polars_backend import compare, summary_cubes  # noqa: E402
+
+
+@pytest.fixture(scope="module", params=[False, True], ids=["csv", "parquet"])
+def data_dir(request, tmp_path_factory):
+    out_dir = tmp_path_factory.mktemp("parquet" if request.param else "csv")
+    generate(str(out_dir), 20_000, n_products=2_000, parquet=request.param)
+    return str(out_dir)
+
+
+def test_backends_agree(data_dir):
+    assert compare(data_dir) == {}
+
+
+def test_cube_quantity_is_float64(data_dir):
+    assert summary_cubes(data_dir)["department_time"]["QUANTITY"].dtype == "float64"